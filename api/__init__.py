@@ -0,0 +1,7 @@
+"""
+API package - Headless JSON HTTP API over the service layer
+
+Run from the project root:
+
+    python -m api --host 127.0.0.1 --port 8502
+"""
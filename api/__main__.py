@@ -0,0 +1,33 @@
+"""
+Start the JSON API server
+"""
+
+import argparse
+import asyncio
+import logging
+from api.routes import build_router
+from api.server import HANDLER_THREADS, Server
+from database import init_databases
+from services.content_index_service import start_background_reindex
+from services.notes_service import start_recommendation_rebuilder
+from services.retention_service import start_archive_sweeper
+
+def main():
+    parser = argparse.ArgumentParser(description='Uni-Connect JSON API')
+    parser.add_argument('--host', default='127.0.0.1', help='interface to bind (default: localhost only)')
+    parser.add_argument('--port', type=int, default=8502)
+    parser.add_argument('--threads', type=int, default=HANDLER_THREADS, help='threads for blocking handlers')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    init_databases()
+    start_archive_sweeper()
+    start_recommendation_rebuilder()
+    start_background_reindex()
+    try:
+        asyncio.run(Server(build_router(), args.threads).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
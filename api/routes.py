@@ -0,0 +1,189 @@
+"""
+API Routes - JSON endpoints over the service layer
+
+Item verification codes and claimers' private details are never returned,
+except the new item's own code in the response to the reporter who filed it.
+"""
+
+import os
+from typing import Dict, List
+from api.server import HTTPError, Request, Router, file_response, json_response
+from services.activity_service import record_activity
+from services import (
+    add_found_item,
+    auth_service,
+    add_lost_item,
+    analytics_service,
+    claim_item,
+    facets_service,
+    find_potential_matches,
+    get_item_by_id,
+    get_item_claims,
+    notes_service,
+    search_notes
+)
+from services.lost_found_service import search_items
+
+# Default and maximum page size for list endpoints
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+def _public_item(item: Dict) -> Dict:
+    public = dict(item)
+    public.pop('verification_code', None)
+    public.pop('possible_duplicates', None)
+    return public
+
+def _page(request: Request, rows: List) -> Dict:
+    offset = max(0, int(request.query.get('offset', 0)))
+    limit = min(MAX_PAGE_SIZE, max(1, int(request.query.get('limit', PAGE_SIZE))))
+    return {'total': len(rows), 'offset': offset, 'limit': limit, 'results': rows[offset:offset + limit]}
+
+def _require(data: Dict, fields: List[str]):
+    missing = [field for field in fields if not str(data.get(field) or '').strip()]
+    if missing:
+        raise HTTPError(400, f"Missing fields: {', '.join(missing)}")
+
+def _get_item(item_id: str) -> Dict:
+    item = get_item_by_id(int(item_id))
+    if not item:
+        raise HTTPError(404, 'Item not found')
+    return item
+
+def list_items(request: Request):
+    """GET /api/items?type=&status=&category=&location=&offset=&limit="""
+    filters = {field: request.query.get(field) for field in facets_service.ITEM_FACETS}
+    items, counts = facets_service.filter_items(filters)
+    page = _page(request, [_public_item(item) for item in items])
+    page['facets'] = counts
+    return page
+
+def report_item(request: Request):
+    """POST /api/items with type 'lost' or 'found' and the report fields"""
+    data = request.json()
+    _require(data, ['type', 'category', 'location', 'description', 'reporter_name', 'reporter_contact'])
+    if data['type'] not in ('lost', 'found'):
+        raise HTTPError(400, "type must be 'lost' or 'found'")
+    add = add_lost_item if data['type'] == 'lost' else add_found_item
+    item = add(item_name=data.get('item_name') or data['category'], category=data['category'],
+               location=data['location'], description=data['description'],
+               reporter_name=data['reporter_name'], reporter_contact=data['reporter_contact'])
+    record_activity(None, 'item_reported')
+    created = _public_item(item)
+    created['verification_code'] = item['verification_code']
+    created['possible_duplicates'] = [{'id': dup['id'], 'similarity': dup['similarity']}
+                                      for dup in item['possible_duplicates']]
+    return json_response(created, 201)
+
+def get_item(request: Request, item_id: str):
+    """GET /api/items/<id>"""
+    return _public_item(_get_item(item_id))
+
+def item_matches(request: Request, item_id: str):
+    """GET /api/items/<id>/matches - open reports of the opposite type in the same category"""
+    item = _get_item(item_id)
+    matches = find_potential_matches(item['type'], item['category'], item['location'])
+    return {'results': [_public_item(match) for match in matches]}
+
+def item_claims(request: Request, item_id: str):
+    """GET /api/items/<id>/claims - claim history without claimers' contact details"""
+    _get_item(item_id)
+    return {'results': [{key: claim[key] for key in ('id', 'claimer_name', 'claimed_at', 'accepted')}
+                        for claim in get_item_claims(int(item_id))]}
+
+def claim(request: Request, item_id: str):
+    """POST /api/items/<id>/claim with the reporter's verification code and proof of ownership"""
+    item = _get_item(item_id)
+    data = request.json()
+    _require(data, ['verification_code', 'claimer_name', 'claimer_contact', 'verification_detail'])
+    if str(data['verification_code']).strip() != str(item.get('verification_code', '')).strip():
+        raise HTTPError(400, 'Incorrect verification code')
+    if len(data['verification_detail'].strip()) < 10:
+        raise HTTPError(400, 'verification_detail must be at least 10 characters')
+    winner = claim_item(int(item_id), data['claimer_name'], data['verification_detail'],
+                        data.get('claimer_email', ''), data['claimer_contact'])
+    if not winner or (winner['claimer_name'], winner['claimer_contact']) != (data['claimer_name'], data['claimer_contact']):
+        raise HTTPError(409, 'Item has already been claimed')
+    return json_response({key: winner[key] for key in ('id', 'item_id', 'claimer_name', 'claimed_at')}, 201)
+
+def list_notes(request: Request):
+    """GET /api/notes?subject=&semester=&sort=recent|downloads|subject&offset=&limit="""
+    filters = {field: request.query.get(field) for field in facets_service.NOTE_FACETS}
+    order = request.query.get('sort', 'recent')
+    if order not in facets_service.NOTE_ORDERS:
+        raise HTTPError(400, f"sort must be one of: {', '.join(facets_service.NOTE_ORDERS)}")
+    notes, counts = facets_service.filter_notes(filters, order)
+    page = _page(request, notes)
+    page['facets'] = counts
+    return page
+
+def trending_notes(request: Request):
+    """GET /api/notes/trending?limit="""
+    return {'results': notes_service.get_popular_notes(min(MAX_PAGE_SIZE, int(request.query.get('limit', 12))))}
+
+def get_note(request: Request, note_id: str):
+    """GET /api/notes/<id>"""
+    note = notes_service.get_note_by_id(int(note_id))
+    if not note:
+        raise HTTPError(404, 'Note not found')
+    note['rating_summary'] = notes_service.get_rating_summary(int(note_id))
+    note['also_downloaded'] = notes_service.get_also_downloaded(int(note_id))
+    return note
+
+def note_file(request: Request, note_id: str):
+    """
+    GET /files/notes/<id>?user=&expires=&sig= - the note's file, resumable with Range
+
+    A download is counted once, when a GET starts at the first byte; resumed
+    ranges, conditional 304s and HEADs are not counted again. It is attributed
+    to `user` only when the link's signature checks out (see
+    notes_service.note_file_url); otherwise it counts as anonymous.
+    """
+    note = notes_service.get_note_by_id(int(note_id))
+    path = notes_service.note_file_path(note['file_name']) if note else None
+    if not path or not os.path.isfile(path):
+        raise HTTPError(404, 'File not found')
+    response = file_response(request, path, note['file_name'])
+    if request.method == 'GET' and response.status in (200, 206) and response.offset == 0:
+        user_id = auth_service.verify_download(int(note_id), request.query.get('user'),
+                                               request.query.get('expires'), request.query.get('sig'))
+        notes_service.increment_download_count(int(note_id), user_id)
+        if user_id:
+            record_activity(user_id, 'note_downloaded')
+    return response
+
+def search(request: Request):
+    """GET /api/search?q=&kind=items|notes (both when kind is omitted)"""
+    query = request.query.get('q', '').strip()
+    if not query:
+        raise HTTPError(400, 'q is required')
+    kind = request.query.get('kind')
+    results = {}
+    if kind in (None, 'items'):
+        results['items'] = [_public_item(item) for item in search_items(query)]
+    if kind in (None, 'notes'):
+        results['notes'] = search_notes(query)
+    return results
+
+def stats(request: Request):
+    """GET /api/stats - dashboard aggregates; 503 if any of them failed"""
+    data = analytics_service.get_dashboard_stats()
+    if data.errors:
+        raise HTTPError(503, f"Unavailable: {', '.join(sorted(data.errors))}")
+    return data.results
+
+def build_router() -> Router:
+    router = Router()
+    router.add('GET', r'/api/items', list_items)
+    router.add('POST', r'/api/items', report_item)
+    router.add('GET', r'/api/items/(?P<item_id>\d+)', get_item)
+    router.add('GET', r'/api/items/(?P<item_id>\d+)/matches', item_matches)
+    router.add('GET', r'/api/items/(?P<item_id>\d+)/claims', item_claims)
+    router.add('POST', r'/api/items/(?P<item_id>\d+)/claim', claim)
+    router.add('GET', r'/api/notes', list_notes)
+    router.add('GET', r'/api/notes/trending', trending_notes)
+    router.add('GET', r'/api/notes/(?P<note_id>\d+)', get_note)
+    router.add('GET', r'/files/notes/(?P<note_id>\d+)', note_file)
+    router.add('GET', r'/api/search', search)
+    router.add('GET', r'/api/stats', stats)
+    return router
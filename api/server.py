@@ -0,0 +1,293 @@
+"""
+HTTP Server - Minimal asyncio HTTP/1.1 server for the JSON API
+
+Standard library only. Connections are kept alive between requests, JSON
+bodies are gzip-compressed for clients that accept it, and GET responses
+carry an ETag so unchanged lists cost a 304 instead of a payload. Handlers
+call the blocking (SQLite) service layer, so they run on a bounded thread
+pool rather than on the event loop. Files are sent with loop.sendfile (zero
+copy where the platform supports it) and honour single byte-range requests
+so interrupted downloads can resume.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+logger = logging.getLogger(__name__)
+
+# Threads available to run blocking handlers
+HANDLER_THREADS = 8
+
+# Seconds an idle keep-alive connection is held open
+KEEP_ALIVE_TIMEOUT = 15
+
+# Largest request body accepted
+MAX_BODY_BYTES = 1 << 20
+
+# Responses smaller than this are not worth compressing
+GZIP_MIN_BYTES = 1024
+
+STATUS_TEXT = {200: 'OK', 201: 'Created', 206: 'Partial Content', 304: 'Not Modified',
+               400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 409: 'Conflict',
+               413: 'Payload Too Large', 416: 'Range Not Satisfiable', 500: 'Internal Server Error',
+               503: 'Service Unavailable'}
+
+class HTTPError(Exception):
+    """Raised by handlers to return an error status with a JSON message"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+class Request:
+    """A parsed HTTP request"""
+
+    def __init__(self, method: str, target: str, headers: Dict[str, str], body: bytes):
+        parts = urlsplit(target)
+        self.method = method
+        self.path = unquote(parts.path)
+        self.query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        self.headers = headers
+        self.body = body
+
+    def json(self) -> Dict:
+        """The request body parsed as a JSON object"""
+        try:
+            data = json.loads(self.body or b'{}')
+        except ValueError:
+            raise HTTPError(400, 'Request body is not valid JSON')
+        if not isinstance(data, dict):
+            raise HTTPError(400, 'Request body must be a JSON object')
+        return data
+
+class Response:
+    """An HTTP response"""
+
+    def __init__(self, status: int = 200, body: bytes = b'', content_type: str = 'application/json',
+                 headers: Optional[Dict[str, str]] = None):
+        self.status = status
+        self.body = body
+        self.headers = {'Content-Type': content_type}
+        self.headers.update(headers or {})
+
+class FileResponse(Response):
+    """A response whose body is `length` bytes of a file starting at `offset`"""
+
+    def __init__(self, status: int, path: str, offset: int, length: int, content_type: str,
+                 headers: Optional[Dict[str, str]] = None):
+        super().__init__(status, b'', content_type, headers)
+        self.path = path
+        self.offset = offset
+        self.length = length
+
+def json_response(data, status: int = 200) -> Response:
+    return Response(status, json.dumps(data, default=str).encode('utf-8'))
+
+def error_response(status: int, message: str) -> Response:
+    return json_response({'error': message}, status)
+
+def etag_matches(header: str, etag: str) -> bool:
+    """Whether an If-None-Match header matches an ETag (weak comparison)"""
+    candidates = [tag.strip() for tag in header.split(',')]
+    return '*' in candidates or any((tag[2:] if tag.startswith('W/') else tag) == etag for tag in candidates)
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single 'bytes=' range into (start, end) inclusive
+
+    Returns None when the header should be ignored (absent, malformed or
+    multiple ranges - the full file is sent instead) and raises HTTPError 416
+    when the range lies outside the file.
+    """
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        return None
+    first, dash, last = spec.strip().partition('-')
+    if not dash or not (first or last) or not all(part.isdigit() for part in (first, last) if part):
+        return None
+    if not first:
+        if not int(last):
+            raise HTTPError(416, 'Range not satisfiable')
+        start, end = max(0, size - int(last)), size - 1
+    else:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise HTTPError(416, 'Range not satisfiable')
+    return start, end
+
+def file_response(request: Request, path: str, download_name: str) -> Response:
+    """
+    Serve a file with ETag/Last-Modified validation and Range support
+
+    Answers 304 when the client's copy is current, 206 for a satisfiable
+    range (unless If-Range names an older version, which gets the full 200)
+    and 416 for a range beyond the end of the file.
+    """
+    stat = os.stat(path)
+    etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+    headers = {'ETag': etag, 'Last-Modified': formatdate(stat.st_mtime, usegmt=True),
+               'Accept-Ranges': 'bytes',
+               'Content-Disposition': f'attachment; filename="{download_name.replace(chr(34), "")}"'}
+    content_type = mimetypes.guess_type(download_name)[0] or 'application/octet-stream'
+    if 'if-none-match' in request.headers:
+        if etag_matches(request.headers['if-none-match'], etag):
+            return Response(304, b'', content_type, headers)
+    elif _not_modified_since(request.headers.get('if-modified-since'), stat.st_mtime):
+        return Response(304, b'', content_type, headers)
+
+    if_range = request.headers.get('if-range')
+    if 'range' in request.headers and (not if_range or if_range in (etag, headers['Last-Modified'])):
+        try:
+            byte_range = _parse_range(request.headers['range'], stat.st_size)
+        except HTTPError:
+            headers['Content-Range'] = f'bytes */{stat.st_size}'
+            return Response(416, b'', content_type, headers)
+        if byte_range:
+            start, end = byte_range
+            headers['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+            return FileResponse(206, path, start, end - start + 1, content_type, headers)
+    return FileResponse(200, path, 0, stat.st_size, content_type, headers)
+
+def _not_modified_since(header: Optional[str], mtime: float) -> bool:
+    if not header:
+        return False
+    try:
+        return int(mtime) <= parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+def finalize(request: Request, response: Response) -> Response:
+    """Add ETag/304 handling for GETs and gzip when the client accepts it"""
+    if response.status != 200 or isinstance(response, FileResponse):
+        return response
+    if request.method == 'GET':
+        etag = '"' + hashlib.sha1(response.body).hexdigest() + '"'
+        response.headers['ETag'] = etag
+        if etag_matches(request.headers.get('if-none-match', ''), etag):
+            return Response(304, b'', response.headers['Content-Type'], {'ETag': etag})
+    if len(response.body) >= GZIP_MIN_BYTES and 'gzip' in request.headers.get('accept-encoding', ''):
+        response.body = gzip.compress(response.body, compresslevel=5)
+        response.headers['Content-Encoding'] = 'gzip'
+        response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+Route = Tuple[str, 're.Pattern', Callable]
+
+class Router:
+    """Maps (method, path pattern) to handlers; path groups become keyword arguments"""
+
+    def __init__(self):
+        self.routes: List[Route] = []
+
+    def add(self, method: str, pattern: str, handler: Callable):
+        """Register a handler(request, **groups) returning JSON-able data or a Response"""
+        self.routes.append((method, re.compile(pattern + '$'), handler))
+
+    def match(self, method: str, path: str):
+        allowed = False
+        for route_method, pattern, handler in self.routes:
+            found = pattern.match(path)
+            if found:
+                if route_method == method or (route_method == 'GET' and method == 'HEAD'):
+                    return handler, found.groupdict()
+                allowed = True
+        raise HTTPError(405 if allowed else 404, 'Method not allowed' if allowed else 'Not found')
+
+class Server:
+    """asyncio HTTP/1.1 server dispatching to a Router"""
+
+    def __init__(self, router: Router, threads: int = HANDLER_THREADS):
+        self.router = router
+        self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='api')
+
+    async def dispatch(self, request: Request) -> Response:
+        try:
+            handler, params = self.router.match(request.method, request.path)
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self.pool, lambda: handler(request, **params))
+            response = result if isinstance(result, Response) else json_response(result)
+        except HTTPError as e:
+            response = error_response(e.status, e.message)
+        except ValueError as e:
+            response = error_response(400, str(e))
+        except Exception:
+            logger.exception("API error on %s %s", request.method, request.path)
+            response = error_response(500, 'Internal server error')
+        return finalize(request, response)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), KEEP_ALIVE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line.strip():
+                    break
+                parts = request_line.decode('latin-1').split()
+                headers = await self._read_headers(reader)
+                if len(parts) != 3:
+                    await self._send(writer, None, error_response(400, 'Malformed request line'), False)
+                    break
+                method, target, version = parts
+                length = int(headers.get('content-length') or 0)
+                if length > MAX_BODY_BYTES:
+                    await self._send(writer, None, error_response(413, 'Request body too large'), False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+                request = Request(method, target, headers, body)
+                response = await self.dispatch(request)
+                await self._send(writer, request, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_headers(self, reader: asyncio.StreamReader) -> Dict[str, str]:
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                return headers
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+    async def _send(self, writer: asyncio.StreamWriter, request: Optional[Request],
+                    response: Response, keep_alive: bool):
+        is_file = isinstance(response, FileResponse)
+        head = [f"HTTP/1.1 {response.status} {STATUS_TEXT.get(response.status, '')}",
+                f"Content-Length: {response.length if is_file else len(response.body)}",
+                f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        head += [f"{name}: {value}" for name, value in response.headers.items()]
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1'))
+        if request is not None and request.method == 'HEAD':
+            await writer.drain()
+        elif is_file:
+            await writer.drain()
+            with open(response.path, 'rb') as file:
+                await asyncio.get_running_loop().sendfile(writer.transport, file, response.offset,
+                                                          response.length)
+        else:
+            writer.write(response.body)
+            await writer.drain()
+
+    async def serve(self, host: str, port: int):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        logger.info("API listening on http://%s:%s", host, port)
+        async with server:
+            await server.serve_forever()
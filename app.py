@@ -6,23 +6,98 @@ Author: Gaurav Pathak
 Description: Campus utility platform using in-memory Python data structures
 """
 
+import importlib
+import os
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from database import init_databases
 from database.users_db import signup_user, login_user, get_user_by_id
-from ui.dashboard_ui import render_dashboard
-from ui.lost_found_ui import render_lost_found
-from ui.notes_ui import render_notes_exchange
+from utils.passwords import HashingBusy
+from utils.session_state import MAX_CARD_STATES, get_session_report, record_session_usage, reset_card_states
 from utils.validators import validate_name, validate_email, validate_roll_no
 
+# Page key -> (module, render function). Modules are imported on first visit.
+PAGES = {
+    'dashboard': ('ui.dashboard_ui', 'render_dashboard'),
+    'lost_found': ('ui.lost_found_ui', 'render_lost_found'),
+    'notes': ('ui.notes_ui', 'render_notes_exchange'),
+}
+
+# Emails or roll numbers (comma-separated) that see the admin panel
+ADMINS = {entry.strip().lower() for entry in os.environ.get('UNI_CONNECT_ADMINS', '').split(',') if entry.strip()}
+
 
 def load_custom_css():
-    """Inject custom CSS for the app (placeholder)."""
+    """Inject custom CSS for the app"""
     st.markdown("""
         <style>
         /* Example: Make sidebar background dark */
         .css-1d391kg { background: #222 !important; }
+        /* Make all Streamlit form labels dark and bold */
+        label, .stTextInput label, .stSelectbox label, .stTextArea label, .css-1c7y2kd, .css-1n76uvr {
+            color: #222 !important;
+            font-weight: 700 !important;
+            background: transparent !important;
+        }
         </style>
     """, unsafe_allow_html=True)
 
+def get_page_renderer(page: str):
+    """Return the render function for a page, importing its module on first use"""
+    module_name, func_name = PAGES.get(page, PAGES['dashboard'])
+    return getattr(importlib.import_module(module_name), func_name)
+
+def is_admin(user) -> bool:
+    """Whether a logged-in user is listed in UNI_CONNECT_ADMINS"""
+    return bool(user) and bool({user['email'].lower(), user['roll_no'].lower()} & ADMINS)
+
+def render_admin_panel():
+    """Approximate session-state memory of recently active sessions"""
+    with st.expander("🛠️ Admin: Session Memory"):
+        report = get_session_report()
+        st.markdown(f"**{len(report)}** active session(s), "
+                    f"~{sum(usage['bytes'] for usage in report) / 1024:.1f} KB of session state")
+        for usage in report:
+            st.markdown(f"- {usage['user'] or 'anonymous'}: ~{usage['bytes'] / 1024:.1f} KB, "
+                        f"{usage['card_states']}/{MAX_CARD_STATES} card states")
+            st.caption(", ".join(f"{key} {size} B" for key, size in usage['keys'][:5]))
+
+def render_archive_panel():
+    """Item archive size and the retention sweeper's last run"""
+    from services.retention_service import count_archived_items, get_last_sweep, sweep
+    with st.expander("🗄️ Admin: Item Archive"):
+        if st.button("Run sweep now", key="admin_run_sweep"):
+            sweep()
+        st.markdown(f"**{count_archived_items()}** archived report(s)")
+        last = get_last_sweep()
+        if last:
+            st.caption(f"Last sweep: {last['archived']} item(s) in {last['batches']} batch(es), "
+                       f"{last['seconds']:.2f}s, {last['items_per_second']:.0f} items/s, "
+                       f"longest batch {last['longest_batch_ms']:.1f} ms")
+        else:
+            st.caption("No sweep has run in this process yet")
+
+def start_session(user):
+    """Put a signed session token in the URL so a refresh stays logged in"""
+    from services.auth_service import create_session
+    st.query_params['session'] = create_session(user)
+
+def restore_session():
+    """Log in from the URL's session token, dropping it if it is no longer valid"""
+    from services.auth_service import resolve_session
+    user = resolve_session(st.query_params['session'])
+    if user:
+        st.session_state.user = user
+    else:
+        del st.query_params['session']
+
+def end_session():
+    """Revoke the URL's session token"""
+    if 'session' in st.query_params:
+        from services.auth_service import revoke_session
+        revoke_session(st.query_params['session'])
+        del st.query_params['session']
+
 def render_sidebar():
     """Render the sidebar with navigation and user info"""
     with st.sidebar:
@@ -39,6 +114,8 @@ def render_sidebar():
         # User session state
         if 'user' not in st.session_state:
             st.session_state.user = None
+        if st.session_state.user is None and 'session' in st.query_params:
+            restore_session()
 
         if st.session_state.user is None:
             tabs = st.tabs(["Login", "Sign Up"])
@@ -53,9 +130,15 @@ def render_sidebar():
                         if not email_valid:
                             st.error(email_error)
                         else:
-                            user = login_user(email, password)
-                            if user:
+                            try:
+                                user, busy = login_user(email, password), False
+                            except HashingBusy:
+                                user, busy = None, True
+                            if busy:
+                                st.warning("⏳ Too many sign-ins right now. Please try again in a moment.")
+                            elif user:
                                 st.session_state.user = user
+                                start_session(user)
                                 st.success(f"Welcome, {user['name']}! 🎉")
                                 st.rerun()
                             else:
@@ -81,8 +164,13 @@ def render_sidebar():
                         elif not password or len(password) < 6:
                             st.error("Password must be at least 6 characters.")
                         else:
-                            success = signup_user(name, roll_no, email, password)
-                            if success:
+                            try:
+                                success, busy = signup_user(name, roll_no, email, password), False
+                            except HashingBusy:
+                                success, busy = False, True
+                            if busy:
+                                st.warning("⏳ Too many sign-ups right now. Please try again in a moment.")
+                            elif success:
                                 st.success("Signup successful! Please login.")
                             else:
                                 st.error("Email or roll number already exists.")
@@ -100,8 +188,13 @@ def render_sidebar():
             """, unsafe_allow_html=True)
             if st.button("🚪 Logout", use_container_width=True):
                 st.session_state.user = None
+                end_session()
+                reset_card_states(st.session_state)
                 st.success("Logged out successfully!")
                 st.rerun()
+            if is_admin(user):
+                render_admin_panel()
+                render_archive_panel()
 
         st.markdown("<hr style='border: 1px solid rgba(255,255,255,0.3); margin: 1.5rem 0;'>", unsafe_allow_html=True)
 
@@ -163,9 +256,21 @@ def render_sidebar():
             </div>
         """, unsafe_allow_html=True)
 
+def start_background_jobs():
+    """Start process-wide maintenance threads; each starts once per process"""
+    from services.content_index_service import start_background_reindex
+    from services.notes_service import start_recommendation_rebuilder
+    from services.retention_service import start_archive_sweeper
+    start_archive_sweeper()
+    start_recommendation_rebuilder()
+    start_background_reindex()
+
 def main():
     """Main application logic"""
     
+    # One-time schema setup (a no-op after the first run in this process)
+    init_databases()
+    
     # Load custom CSS
     load_custom_css()
     
@@ -176,16 +281,18 @@ def main():
     # Get current page from session state
     current_page = st.session_state.get('page', 'dashboard')
     
-    # Render appropriate page
-    if current_page == 'dashboard':
-        render_dashboard()
-    elif current_page == 'lost_found':
-        render_lost_found()
-    elif current_page == 'notes':
-        render_notes_exchange()
-    else:
-        # Default to dashboard
-        render_dashboard()
+    # Render appropriate page (unknown pages fall back to the dashboard)
+    get_page_renderer(current_page)()
+    
+    # After the page, so the first render is not held up by importing services
+    start_background_jobs()
+    
+    # Measure this session's state for the admin panel, which only exists
+    # when UNI_CONNECT_ADMINS names someone
+    if ADMINS:
+        ctx = get_script_run_ctx()
+        user = st.session_state.get('user')
+        record_session_usage(ctx.session_id if ctx else 'local', st.session_state, user['email'] if user else None)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,114 @@
+"""
+API Load Test - Throughput and latency of the JSON API under concurrent keep-alive clients
+
+Starts `python -m api` on a free local port (or targets --url), then runs
+--clients concurrent connections, each sending --requests GETs over one
+kept-alive connection. Run from the project root:
+
+    python benchmarks/bench_api.py --clients 50 --requests 200
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PATHS = ['/api/items', '/api/notes', '/api/notes/trending', '/api/stats', '/api/search?q=library']
+
+async def fetch(reader, writer, host: str, path: str, extra: str = ''):
+    """Send one GET on an open connection; returns (status, headers, body)"""
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nAccept-Encoding: gzip\r\n{extra}\r\n".encode())
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get('content-length', 0)))
+    return status, headers, body
+
+async def client(host: str, port: int, requests: int, conditional: bool, latencies: list, errors: list):
+    reader, writer = await asyncio.open_connection(host, port)
+    etags = {}
+    try:
+        for i in range(requests):
+            path = PATHS[i % len(PATHS)]
+            extra = f"If-None-Match: {etags[path]}\r\n" if conditional and path in etags else ''
+            start = time.perf_counter()
+            status, headers, _ = await fetch(reader, writer, host, path, extra)
+            latencies.append(time.perf_counter() - start)
+            if status not in (200, 304):
+                errors.append(status)
+            if 'etag' in headers:
+                etags[path] = headers['etag']
+    finally:
+        writer.close()
+
+async def run(host: str, port: int, clients: int, requests: int, conditional: bool):
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, requests, conditional, latencies, errors) for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    label = 'conditional (If-None-Match)' if conditional else 'unconditional'
+    print(f"{label}: {len(latencies)} requests in {elapsed:.2f}s = {len(latencies) / elapsed:.0f} req/s, "
+          f"p50 {statistics.median(latencies) * 1000:.1f} ms, "
+          f"p95 {latencies[int(0.95 * (len(latencies) - 1))] * 1000:.1f} ms, errors {len(errors)}")
+
+async def report_sizes(host: str, port: int):
+    reader, writer = await asyncio.open_connection(host, port)
+    for path in PATHS:
+        status, headers, body = await fetch(reader, writer, host, path)
+        print(f"  {path:<24} {status} {len(body):>7} bytes {headers.get('content-encoding', 'identity')}")
+    writer.close()
+
+def wait_for_port(host: str, port: int, timeout: float = 15):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection((host, port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"API did not start on {host}:{port}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=200, help='requests per client')
+    parser.add_argument('--url', help='existing server to target, e.g. http://127.0.0.1:8502')
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        parts = urlsplit(args.url)
+        host, port = parts.hostname, parts.port
+    else:
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            host, port = s.getsockname()
+        server = subprocess.Popen([sys.executable, '-m', 'api', '--port', str(port)], cwd=ROOT,
+                                  stdout=subprocess.DEVNULL)
+    try:
+        wait_for_port(host, port)
+        print(f"Target http://{host}:{port}, {args.clients} clients x {args.requests} requests")
+        asyncio.run(report_sizes(host, port))
+        asyncio.run(run(host, port, args.clients, args.requests, conditional=False))
+        asyncio.run(run(host, port, args.clients, args.requests, conditional=True))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Login Benchmark - Logins per second at each password hashing cost
+
+Signs up synthetic users in a throwaway users database at each cost (log2
+of scrypt's n), then logs them in from --clients concurrent threads through
+the bounded hashing pool. Reports throughput, p50/p95 latency and how many
+logins admission control turned away. Run from the project root:
+
+    python benchmarks/bench_login.py --costs 12,13,14,15 --clients 32 --logins 200
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from database import users_db
+from utils import passwords
+
+USERS = 20
+
+def login_once(email: str):
+    start = time.perf_counter()
+    try:
+        ok = users_db.login_user(email, 'correct horse') is not None
+    except passwords.HashingBusy:
+        ok = None
+    return ok, time.perf_counter() - start
+
+def run(cost: int, clients: int, logins: int):
+    passwords.HASH_COST = cost
+    emails = [f'bench{cost}_{i}@example.com' for i in range(USERS)]
+    for i, email in enumerate(emails):
+        users_db.signup_user(f'Bench {i}', f'B{cost}-{i}', email, 'correct horse')
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        results = list(pool.map(login_once, (emails[i % USERS] for i in range(logins))))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for ok, latency in results if ok)
+    busy = sum(1 for ok, _ in results if ok is None)
+    failed = sum(1 for ok, _ in results if ok is False)
+    p95 = latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0
+    print(f"cost {cost:>2} (n=2^{cost}): {len(latencies) / elapsed:7.1f} logins/s  "
+          f"p50 {statistics.median(latencies) * 1000 if latencies else 0:7.1f} ms  p95 {p95 * 1000:7.1f} ms  "
+          f"busy {busy}  failed {failed}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--costs', default='12,13,14,15', help='comma-separated log2(n) values')
+    parser.add_argument('--clients', type=int, default=32, help='concurrent login threads')
+    parser.add_argument('--logins', type=int, default=200, help='logins per cost')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        users_db.DB_PATH = os.path.join(tmp, 'users.db')
+        print(f"Hash workers: {passwords.HASH_WORKERS}, admission limit: {passwords.MAX_PENDING_HASHES} "
+              f"(wait {passwords.ADMISSION_TIMEOUT}s), {args.clients} clients")
+        for cost in (int(cost) for cost in args.costs.split(',')):
+            run(cost, args.clients, args.logins)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Row Records Benchmark - Memory and time of dict rows vs records vs streaming
+
+Fills a throwaway copy of the items table with synthetic rows, then compares
+get_all_items() (a dict per row), get_all_item_records() and iter_items().
+Run from the project root:
+
+    python benchmarks/bench_records.py --rows 100000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from database import lost_found_db
+
+CATEGORIES = ['ID Card', 'Bottle', 'Charger', 'Book', 'Umbrella', 'Keys', 'Phone', 'Wallet']
+LOCATIONS = ['Library', 'Canteen', 'Main Building', 'Hostel', 'Sports Complex', 'Auditorium']
+
+def fill(rows: int):
+    conn = lost_found_db._get_conn()
+    conn.executemany(
+        '''INSERT INTO lost_found_items (type, item_name, category, location, description,
+           reporter_name, reporter_contact, date, status, matched_with, verification_code, image_path)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+        ((('lost', 'found')[i % 2], f'Item {i}', CATEGORIES[i % len(CATEGORIES)], LOCATIONS[i % len(LOCATIONS)],
+          f'Synthetic report number {i} with a short description', f'Reporter {i % 500}', '9876543210',
+          f'2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}', 'open', None, f'{10000 + i % 90000}', None)
+         for i in range(rows)))
+    conn.commit()
+    conn.close()
+
+def measure(label: str, load):
+    """Time a full pass, then repeat it under tracemalloc for the peak memory"""
+    start = time.perf_counter()
+    total = load()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    load()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<24} {elapsed * 1000:9.1f} ms  peak {peak / 1e6:8.1f} MB  (rows counted: {total})")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000, help='synthetic rows to insert')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        lost_found_db.DB_PATH = os.path.join(tmp, 'bench.db')
+        fill(args.rows)
+        print(f"Rows: {args.rows}")
+
+        # Each loader keeps its rows alive until it has scanned them, like a caller would
+        def dicts():
+            rows = lost_found_db.get_all_items()
+            return sum(1 for row in rows if row['status'] == 'open')
+
+        def records():
+            rows = lost_found_db.get_all_item_records()
+            return sum(1 for row in rows if row['status'] == 'open')
+
+        def streamed():
+            return sum(1 for row in lost_found_db.iter_items() if row['status'] == 'open')
+
+        measure('get_all_items (dicts)', dicts)
+        measure('get_all_item_records', records)
+        measure('iter_items (streaming)', streamed)
+
+if __name__ == '__main__':
+    main()
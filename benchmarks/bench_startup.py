@@ -0,0 +1,71 @@
+"""
+Startup Benchmark - Cold-start time from `import app` to the first rendered page
+
+Each sample runs in a fresh Python process so nothing is cached in
+sys.modules. Run from the project root:
+
+    python benchmarks/bench_startup.py --runs 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Executed in the child process; prints one JSON line with the timings
+CHILD_SCRIPT = r'''
+import json, os, sys, time
+sys.path.insert(0, os.getcwd())
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t2 = time.perf_counter()
+at = AppTest.from_file(os.path.join(os.getcwd(), 'app.py'), default_timeout=60)
+at.run()
+t3 = time.perf_counter()
+print(json.dumps({
+    'import_ms': (t1 - t0) * 1000,
+    'first_render_ms': (t3 - t2) * 1000,
+    'exception': bool(at.exception),
+    'ui_modules': sorted(m for m in sys.modules if m.startswith('ui.')),
+}))
+'''
+
+def run_once() -> dict:
+    """Run one cold start in a subprocess and return its timings"""
+    out = subprocess.run(
+        [sys.executable, '-c', CHILD_SCRIPT],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='number of cold starts to sample')
+    args = parser.parse_args()
+
+    samples = [run_once() for _ in range(args.runs)]
+    totals = [s['import_ms'] + s['first_render_ms'] for s in samples]
+
+    print(f"Cold starts: {args.runs}")
+    for key in ('import_ms', 'first_render_ms'):
+        values = [s[key] for s in samples]
+        print(f"  {key:<16} median {statistics.median(values):8.1f}   p95 {percentile(values, 95):8.1f}")
+    print(f"  {'total_ms':<16} median {statistics.median(totals):8.1f}   p95 {percentile(totals, 95):8.1f}")
+    print(f"  UI modules loaded for the dashboard: {', '.join(samples[-1]['ui_modules']) or 'none'}")
+    if any(s['exception'] for s in samples):
+        print("  WARNING: the first render raised an exception")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
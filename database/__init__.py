@@ -1,3 +1,14 @@
 """
 Database package - SQLite persistent data storage
 """
+
+
+def init_databases():
+    """Run the one-time schema setup for every database up front.
+
+    Each module also does this lazily on its first connection, so calling
+    this is optional; it just moves the cost to a point of our choosing.
+    """
+    from . import alerts_db, lost_found_db, notes_db, users_db
+    for module in (lost_found_db, alerts_db, notes_db, users_db):
+        module._init_db()
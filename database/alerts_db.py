@@ -0,0 +1,216 @@
+"""
+Alerts Database - Standing searches and per-user inbox (SQLite persistent storage)
+
+Standing searches are stored as a reverse index from terms to subscriptions,
+so a new found item is only compared with subscriptions that share a term.
+"""
+
+import sqlite3
+import threading
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+DB_PATH = os.path.join(os.path.dirname(__file__), 'lost_found.db')
+
+# Schema setup runs once per process, on first connection rather than at import
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+def _get_conn():
+    if not _schema_ready:
+        _init_db()
+    return sqlite3.connect(DB_PATH)
+
+def _init_db():
+    """Create tables if needed. Memoized so repeated calls are free."""
+    global _schema_ready
+    with _schema_lock:
+        if _schema_ready:
+            return
+        _create_schema()
+        _schema_ready = True
+
+def _create_schema():
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute('''CREATE TABLE IF NOT EXISTS subscriptions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        source TEXT,
+        lost_item_id INTEGER,
+        query TEXT,
+        required_count INTEGER,
+        active INTEGER DEFAULT 1,
+        created_at TEXT
+    )''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_subscriptions_user ON subscriptions(user_id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_subscriptions_lost_item ON subscriptions(lost_item_id)')
+    # Reverse index: term -> subscriptions. Only active subscriptions have postings.
+    c.execute('''CREATE TABLE IF NOT EXISTS subscription_terms (
+        term TEXT NOT NULL,
+        subscription_id INTEGER NOT NULL,
+        required INTEGER NOT NULL,
+        PRIMARY KEY (term, subscription_id)
+    ) WITHOUT ROWID''')
+    # Required-term postings alone, so candidate lookup never touches optional ones
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_subscription_terms_required
+                 ON subscription_terms(term, subscription_id) WHERE required = 1''')
+    c.execute('''CREATE TABLE IF NOT EXISTS inbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        subscription_id INTEGER NOT NULL,
+        item_id INTEGER NOT NULL,
+        score INTEGER DEFAULT 0,
+        created_at TEXT,
+        is_read INTEGER DEFAULT 0,
+        UNIQUE (subscription_id, item_id)
+    )''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_inbox_user ON inbox(user_id, is_read)')
+    conn.commit()
+    conn.close()
+
+SUBSCRIPTION_KEYS = ['id', 'user_id', 'source', 'lost_item_id', 'query', 'required_count', 'active', 'created_at']
+INBOX_KEYS = ['id', 'user_id', 'subscription_id', 'item_id', 'score', 'created_at', 'is_read']
+
+def add_subscription(subscription: Dict, required_terms: Iterable[str], optional_terms: Iterable[str] = ()) -> int:
+    """Register a standing search and its index terms. Returns new subscription id."""
+    required_terms = set(required_terms)
+    optional_terms = set(optional_terms) - required_terms
+    conn = _get_conn()
+    c = conn.cursor()
+    c.execute('''INSERT INTO subscriptions (
+        user_id, source, lost_item_id, query, required_count, active, created_at
+    ) VALUES (?, ?, ?, ?, ?, 1, ?)''', (
+        subscription['user_id'], subscription.get('source', 'search'), subscription.get('lost_item_id'),
+        subscription.get('query', ''), len(required_terms),
+        subscription.get('created_at', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    ))
+    subscription_id = c.lastrowid
+    c.executemany('INSERT INTO subscription_terms (term, subscription_id, required) VALUES (?, ?, ?)',
+                  [(term, subscription_id, 1) for term in required_terms] +
+                  [(term, subscription_id, 0) for term in optional_terms])
+    conn.commit()
+    conn.close()
+    return subscription_id
+
+def find_matching_subscriptions(terms: Iterable[str]) -> List[Dict]:
+    """Find active subscriptions whose required terms are all present in `terms`.
+
+    Candidates come from the required-term postings only, so the cost depends
+    on how many subscriptions require one of the item's terms, not on how many
+    merely list a common optional term. Each result carries a `score`: the
+    number of its optional terms present, counted for candidates only.
+    """
+    terms = list(set(terms))
+    if not terms:
+        return []
+    placeholders = ','.join('?' * len(terms))
+    conn = _get_conn()
+    c = conn.cursor()
+    c.execute(f'''SELECT s.id, s.user_id, s.source, s.lost_item_id, s.query,
+                         (SELECT COUNT(*) FROM subscription_terms o
+                          WHERE o.subscription_id = s.id AND o.required = 0 AND o.term IN ({placeholders}))
+                  FROM subscription_terms t INDEXED BY idx_subscription_terms_required
+                  JOIN subscriptions s ON s.id = t.subscription_id
+                  WHERE t.term IN ({placeholders}) AND t.required = 1
+                  GROUP BY s.id
+                  HAVING COUNT(*) = s.required_count''', terms + terms)
+    rows = c.fetchall()
+    conn.close()
+    return [{'id': row[0], 'user_id': row[1], 'source': row[2], 'lost_item_id': row[3],
+             'query': row[4], 'score': row[5]} for row in rows]
+
+def deactivate_subscription(subscription_id: int, user_id: Optional[int] = None) -> bool:
+    """Deactivate a subscription and drop its index postings. Returns True if found."""
+    conn = _get_conn()
+    c = conn.cursor()
+    if user_id is not None:
+        c.execute('UPDATE subscriptions SET active = 0 WHERE id = ? AND user_id = ?', (subscription_id, user_id))
+    else:
+        c.execute('UPDATE subscriptions SET active = 0 WHERE id = ?', (subscription_id,))
+    found = c.rowcount > 0
+    if found:
+        c.execute('DELETE FROM subscription_terms WHERE subscription_id = ?', (subscription_id,))
+    conn.commit()
+    conn.close()
+    return found
+
+def deactivate_subscriptions_for_item(lost_item_id: int):
+    """Deactivate the standing search registered for a lost report."""
+    conn = _get_conn()
+    c = conn.cursor()
+    c.execute('SELECT id FROM subscriptions WHERE lost_item_id = ? AND active = 1', (lost_item_id,))
+    ids = [row[0] for row in c.fetchall()]
+    c.executemany('UPDATE subscriptions SET active = 0 WHERE id = ?', [(i,) for i in ids])
+    c.executemany('DELETE FROM subscription_terms WHERE subscription_id = ?', [(i,) for i in ids])
+    conn.commit()
+    conn.close()
+
+def deactivate_lost_report_subscriptions(user_id: int, required_term: str) -> int:
+    """Deactivate a user's lost-report standing searches that require a term. Returns how many."""
+    conn = _get_conn()
+    c = conn.cursor()
+    c.execute('''SELECT s.id FROM subscriptions s JOIN subscription_terms t ON t.subscription_id = s.id
+                 WHERE s.user_id = ? AND s.source = 'lost_report' AND s.active = 1
+                   AND t.term = ? AND t.required = 1''', (user_id, required_term))
+    ids = [row[0] for row in c.fetchall()]
+    c.executemany('UPDATE subscriptions SET active = 0 WHERE id = ?', [(i,) for i in ids])
+    c.executemany('DELETE FROM subscription_terms WHERE subscription_id = ?', [(i,) for i in ids])
+    conn.commit()
+    conn.close()
+    return len(ids)
+
+def get_user_subscriptions(user_id: int) -> List[Dict]:
+    """Get a user's active subscriptions, newest first."""
+    conn = _get_conn()
+    c = conn.cursor()
+    c.execute('SELECT * FROM subscriptions WHERE user_id = ? AND active = 1 ORDER BY id DESC', (user_id,))
+    rows = c.fetchall()
+    conn.close()
+    return [dict(zip(SUBSCRIPTION_KEYS, row)) for row in rows]
+
+def add_inbox_entries(entries: List[Dict]) -> int:
+    """Write matches to users' inboxes, skipping duplicates. Returns number added."""
+    if not entries:
+        return 0
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    conn = _get_conn()
+    c = conn.cursor()
+    before = conn.total_changes
+    c.executemany('''INSERT OR IGNORE INTO inbox (user_id, subscription_id, item_id, score, created_at)
+                     VALUES (?, ?, ?, ?, ?)''',
+                  [(e['user_id'], e['subscription_id'], e['item_id'], e.get('score', 0), now) for e in entries])
+    added = conn.total_changes - before
+    conn.commit()
+    conn.close()
+    return added
+
+def get_inbox(user_id: int, unread_only: bool = False) -> List[Dict]:
+    """Get a user's inbox entries, newest first."""
+    conn = _get_conn()
+    c = conn.cursor()
+    if unread_only:
+        c.execute('SELECT * FROM inbox WHERE user_id = ? AND is_read = 0 ORDER BY id DESC', (user_id,))
+    else:
+        c.execute('SELECT * FROM inbox WHERE user_id = ? ORDER BY id DESC', (user_id,))
+    rows = c.fetchall()
+    conn.close()
+    return [dict(zip(INBOX_KEYS, row)) for row in rows]
+
+def count_unread(user_id: int) -> int:
+    """Count unread inbox entries for a user."""
+    conn = _get_conn()
+    c = conn.cursor()
+    c.execute('SELECT COUNT(*) FROM inbox WHERE user_id = ? AND is_read = 0', (user_id,))
+    count = c.fetchone()[0]
+    conn.close()
+    return count
+
+def mark_inbox_read(user_id: int):
+    """Mark all of a user's inbox entries as read."""
+    conn = _get_conn()
+    c = conn.cursor()
+    c.execute('UPDATE inbox SET is_read = 1 WHERE user_id = ? AND is_read = 0', (user_id,))
+    conn.commit()
+    conn.close()
@@ -0,0 +1,279 @@
+"""
+Backup - Online backups of the SQLite databases and uploaded files
+
+Each database is copied with SQLite's backup API, PAGES_PER_STEP pages at a
+time with STEP_SLEEP seconds between steps. A step holds only a read lock on
+the live database, so app writes wait at most one step, and the longest such
+step is reported as the pause the backup imposed. Uploaded files are stored
+once by SHA-256 under <backup dir>/blobs and listed in each snapshot's
+manifest, so unchanged files are neither copied nor (when size and mtime
+match the previous manifest) re-hashed.
+
+Snapshots live in <backup dir>/<timestamp>/ with a manifest.json. After each
+run the snapshot is verified by restoring it to a temporary directory, and
+all but the newest KEEP_BACKUPS snapshots are removed. Run from the project
+root:
+
+    python -m database.backup                      # back up once
+    python -m database.backup --every 3600         # back up every hour
+    python -m database.backup --verify backups/20260101-030000
+    python -m database.backup --restore backups/20260101-030000 --target /tmp/restored
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATABASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATABASES = ['lost_found.db', 'notes.db', 'users.db']
+BLOB_DIRS = ['uploaded_notes', 'uploaded_images']
+
+BACKUP_DIR = os.environ.get('UNI_CONNECT_BACKUP_DIR', os.path.join(ROOT, 'backups'))
+KEEP_BACKUPS = 7
+
+# Pages copied per step (256 x 4 KB pages = 1 MB) and seconds to sleep between steps
+PAGES_PER_STEP = 256
+STEP_SLEEP = 0.05
+
+# A write by the app restarts the copy; after this many restarts the rest is copied in one step
+MAX_RESTARTS = 5
+
+MANIFEST = 'manifest.json'
+
+class _TooManyRestarts(Exception):
+    pass
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _blob_path(backup_dir: str, digest: str) -> str:
+    return os.path.join(backup_dir, 'blobs', digest[:2], digest)
+
+def _list_snapshots(backup_dir: str) -> List[str]:
+    """Snapshot directories, oldest first"""
+    if not os.path.isdir(backup_dir):
+        return []
+    return sorted(os.path.join(backup_dir, name) for name in os.listdir(backup_dir)
+                  if os.path.isfile(os.path.join(backup_dir, name, MANIFEST)))
+
+def _load_manifest(snapshot: str) -> Dict:
+    with open(os.path.join(snapshot, MANIFEST)) as f:
+        return json.load(f)
+
+def backup_database(source_path: str, dest_path: str, pages: int = PAGES_PER_STEP,
+                    sleep: float = STEP_SLEEP) -> Dict:
+    """Copy a live database in small steps; returns size, timing and the longest step"""
+    source = sqlite3.connect(f'file:{source_path}?mode=ro', uri=True)
+    dest = sqlite3.connect(dest_path + '.tmp')
+    stats = {'steps': 0, 'restarts': 0, 'longest_pause': 0.0}
+    last = {'at': time.perf_counter(), 'remaining': None}
+
+    def progress(status, remaining, total):
+        # Time since the previous step ended is how long this step held its read lock
+        stats['longest_pause'] = max(stats['longest_pause'], time.perf_counter() - last['at'])
+        stats['steps'] += 1
+        if last['remaining'] is not None and remaining > last['remaining']:
+            stats['restarts'] += 1
+            if stats['restarts'] > MAX_RESTARTS:
+                raise _TooManyRestarts()
+        last['remaining'] = remaining
+        if status == sqlite3.SQLITE_OK and remaining:
+            time.sleep(sleep)
+            last['at'] = time.perf_counter()
+        else:
+            # SQLite itself sleeps after a busy step, before the next one starts
+            last['at'] = time.perf_counter() + sleep
+
+    start = time.perf_counter()
+    try:
+        try:
+            source.backup(dest, pages=pages, progress=progress, sleep=sleep)
+        except _TooManyRestarts:
+            step_start = time.perf_counter()
+            source.backup(dest)
+            stats['longest_pause'] = max(stats['longest_pause'], time.perf_counter() - step_start)
+    finally:
+        source.close()
+        dest.close()
+    os.replace(dest_path + '.tmp', dest_path)
+    stats['seconds'] = time.perf_counter() - start
+    stats['bytes'] = os.path.getsize(dest_path)
+    stats['sha256'] = _sha256(dest_path)
+    return stats
+
+def snapshot_files(backup_dir: str, previous: Optional[Dict] = None) -> Dict:
+    """Store new or changed uploaded files by hash; returns the files manifest and copy counts"""
+    known = (previous or {}).get('files', {})
+    files, copied, copied_bytes = {}, 0, 0
+    for blob_dir in BLOB_DIRS:
+        for folder, _, names in os.walk(os.path.join(ROOT, blob_dir)):
+            for name in sorted(names):
+                path = os.path.join(folder, name)
+                rel = os.path.relpath(path, ROOT)
+                stat = os.stat(path)
+                entry = known.get(rel)
+                if not (entry and entry['bytes'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns):
+                    entry = {'sha256': _sha256(path), 'bytes': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+                blob = _blob_path(backup_dir, entry['sha256'])
+                if not os.path.exists(blob):
+                    os.makedirs(os.path.dirname(blob), exist_ok=True)
+                    shutil.copyfile(path, blob + '.tmp')
+                    os.replace(blob + '.tmp', blob)
+                    copied += 1
+                    copied_bytes += entry['bytes']
+                files[rel] = entry
+    return {'files': files, 'copied': copied, 'copied_bytes': copied_bytes}
+
+def run_backup(backup_dir: str = BACKUP_DIR, pages: int = PAGES_PER_STEP, sleep: float = STEP_SLEEP,
+               keep: int = KEEP_BACKUPS) -> Dict:
+    """Take a snapshot, verify it, rotate old ones, and print a report"""
+    start = time.perf_counter()
+    snapshots = _list_snapshots(backup_dir)
+    previous = _load_manifest(snapshots[-1]) if snapshots else None
+    snapshot = os.path.join(backup_dir, datetime.now().strftime('%Y%m%d-%H%M%S'))
+    while os.path.exists(snapshot):
+        snapshot += '_'
+    os.makedirs(snapshot)
+
+    manifest = {'created_at': time.time(), 'databases': {}}
+    for name in DATABASES:
+        source = os.path.join(DATABASE_DIR, name)
+        if not os.path.exists(source):
+            continue
+        stats = backup_database(source, os.path.join(snapshot, name), pages, sleep)
+        manifest['databases'][name] = {'sha256': stats['sha256'], 'bytes': stats['bytes'],
+                                       'longest_pause': stats['longest_pause']}
+        print(f"{name:<16} {stats['bytes'] / 1e6:8.2f} MB in {stats['seconds']:6.2f}s "
+              f"({stats['bytes'] / 1e6 / stats['seconds']:7.2f} MB/s), {stats['steps']} step(s), "
+              f"{stats['restarts']} restart(s), longest pause {stats['longest_pause'] * 1000:.1f} ms")
+
+    blobs = snapshot_files(backup_dir, previous)
+    manifest['files'] = blobs['files']
+    with open(os.path.join(snapshot, MANIFEST + '.tmp'), 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(os.path.join(snapshot, MANIFEST + '.tmp'), os.path.join(snapshot, MANIFEST))
+    print(f"{'files':<16} {len(blobs['files'])} file(s), {blobs['copied']} new "
+          f"({blobs['copied_bytes'] / 1e6:.2f} MB copied)")
+
+    problems = verify_snapshot(snapshot)
+    # A snapshot that fails verification never displaces older good ones
+    removed = rotate(backup_dir, keep) if not problems else []
+    seconds = time.perf_counter() - start
+    total_bytes = sum(db['bytes'] for db in manifest['databases'].values()) + blobs['copied_bytes']
+    longest = max([db['longest_pause'] for db in manifest['databases'].values()] or [0.0])
+    print(f"Backup {os.path.basename(snapshot)}: {total_bytes / 1e6:.2f} MB in {seconds:.2f}s "
+          f"({total_bytes / 1e6 / seconds:.2f} MB/s), longest pause {longest * 1000:.1f} ms, "
+          f"{'verified' if not problems else 'VERIFY FAILED'}, {len(removed)} old snapshot(s) removed")
+    for problem in problems:
+        print(f"  {problem}")
+    return {'snapshot': snapshot, 'seconds': seconds, 'bytes': total_bytes,
+            'longest_pause': longest, 'problems': problems, 'removed': removed}
+
+def restore(snapshot: str, target: str) -> List[str]:
+    """Restore a snapshot's databases and files under target; returns what could not be restored"""
+    backup_dir = os.path.dirname(os.path.abspath(snapshot))
+    manifest = _load_manifest(snapshot)
+    problems = []
+    copies = [(os.path.join(snapshot, name), os.path.join(target, 'database', name), entry['sha256'])
+              for name, entry in manifest['databases'].items()]
+    copies += [(_blob_path(backup_dir, entry['sha256']), os.path.join(target, rel), entry['sha256'])
+               for rel, entry in manifest['files'].items()]
+    for source, dest, digest in copies:
+        if not os.path.exists(source):
+            problems.append(f"{os.path.relpath(dest, target)}: missing from backup")
+            continue
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        shutil.copyfile(source, dest + '.tmp')
+        if _sha256(dest + '.tmp') != digest:
+            os.remove(dest + '.tmp')
+            problems.append(f"{os.path.relpath(dest, target)}: checksum mismatch")
+            continue
+        os.replace(dest + '.tmp', dest)
+    return problems
+
+def verify_snapshot(snapshot: str) -> List[str]:
+    """Restore a snapshot to a temporary directory and integrity-check its databases"""
+    with tempfile.TemporaryDirectory() as target:
+        problems = restore(snapshot, target)
+        for name in _load_manifest(snapshot)['databases']:
+            path = os.path.join(target, 'database', name)
+            if not os.path.exists(path):
+                continue
+            conn = sqlite3.connect(path)
+            try:
+                result = conn.execute('PRAGMA integrity_check').fetchone()[0]
+            except sqlite3.DatabaseError as e:
+                result = str(e)
+            finally:
+                conn.close()
+            if result != 'ok':
+                problems.append(f"database/{name}: {result}")
+    return problems
+
+def rotate(backup_dir: str = BACKUP_DIR, keep: int = KEEP_BACKUPS) -> List[str]:
+    """Delete all but the newest `keep` snapshots and any blobs no snapshot lists"""
+    snapshots = _list_snapshots(backup_dir)
+    removed = snapshots[:-keep] if keep > 0 else []
+    for snapshot in removed:
+        shutil.rmtree(snapshot)
+    referenced = {entry['sha256'] for snapshot in snapshots[len(removed):]
+                  for entry in _load_manifest(snapshot)['files'].values()}
+    for folder, _, names in os.walk(os.path.join(backup_dir, 'blobs')):
+        for name in names:
+            if name not in referenced:
+                os.remove(os.path.join(folder, name))
+    return removed
+
+def main():
+    parser = argparse.ArgumentParser(description='Back up Uni-Connect databases and uploaded files')
+    parser.add_argument('--dest', default=BACKUP_DIR, help='backup directory')
+    parser.add_argument('--keep', type=int, default=KEEP_BACKUPS, help='snapshots to keep')
+    parser.add_argument('--pages', type=int, default=PAGES_PER_STEP, help='pages copied per step')
+    parser.add_argument('--sleep', type=float, default=STEP_SLEEP, help='seconds between steps')
+    parser.add_argument('--every', type=float, help='keep running, backing up every this many seconds')
+    parser.add_argument('--verify', metavar='SNAPSHOT', help='verify an existing snapshot and exit')
+    parser.add_argument('--restore', metavar='SNAPSHOT', help='restore a snapshot under --target and exit')
+    parser.add_argument('--target', help='directory to restore into (the project root to restore in place)')
+    args = parser.parse_args()
+
+    if args.verify or args.restore:
+        if args.restore and not args.target:
+            parser.error('--restore needs --target')
+        problems = restore(args.restore, args.target) if args.restore else verify_snapshot(args.verify)
+        for problem in problems:
+            print(problem)
+        print('OK' if not problems else f'{len(problems)} problem(s)')
+        raise SystemExit(1 if problems else 0)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    while True:
+        try:
+            run_backup(args.dest, args.pages, args.sleep, args.keep)
+        except Exception:
+            if not args.every:
+                raise
+            logger.exception("Backup failed; retrying in %.0fs", args.every)
+        if not args.every:
+            break
+        try:
+            time.sleep(args.every)
+        except KeyboardInterrupt:
+            break
+
+if __name__ == '__main__':
+    main()
@@ -4,17 +4,35 @@ Lost & Found Database - SQLite persistent storage
 """
 
 import sqlite3
+import threading
 import os
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Iterator, Optional, Tuple
+from database.records import Record
+from utils.helpers import date_to_epoch
 
 DB_PATH = os.path.join(os.path.dirname(__file__), 'lost_found.db')
 
+# Schema setup runs once per process, on first connection rather than at import
+_schema_ready = False
+_schema_lock = threading.Lock()
+
 def _get_conn():
+    if not _schema_ready:
+        _init_db()
     return sqlite3.connect(DB_PATH)
 
 def _init_db():
-    conn = _get_conn()
+    """Create tables if needed. Memoized so repeated calls are free."""
+    global _schema_ready
+    with _schema_lock:
+        if _schema_ready:
+            return
+        _create_schema()
+        _schema_ready = True
+
+def _create_schema():
+    conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
     c.execute('''CREATE TABLE IF NOT EXISTS lost_found_items (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -31,21 +49,90 @@ def _init_db():
         verification_code TEXT,
         image_path TEXT
     )''')
+    # Creation time as epoch seconds, indexed for time-window queries; rows from
+    # before the column existed get local midnight of their date
+    columns = {row[1] for row in c.execute('PRAGMA table_info(lost_found_items)')}
+    if 'created_at' not in columns:
+        c.execute('ALTER TABLE lost_found_items ADD COLUMN created_at INTEGER')
+        c.execute("UPDATE lost_found_items SET created_at = CAST(strftime('%s', date, 'utc') AS INTEGER)")
+    c.execute('CREATE INDEX IF NOT EXISTS idx_items_created ON lost_found_items(created_at)')
+    # Change log for incremental readers: one row per item whose status changed
+    # or that was deleted, stamped with an increasing sequence number
+    c.execute('''CREATE TABLE IF NOT EXISTS item_changes (
+        item_id INTEGER PRIMARY KEY,
+        seq INTEGER NOT NULL
+    )''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_item_changes_seq ON item_changes(seq)')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS trg_items_status_changed
+                 AFTER UPDATE OF status ON lost_found_items WHEN OLD.status IS NOT NEW.status
+                 BEGIN
+                     INSERT OR REPLACE INTO item_changes (item_id, seq)
+                     VALUES (NEW.id, (SELECT IFNULL(MAX(seq), 0) + 1 FROM item_changes));
+                 END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS trg_items_deleted AFTER DELETE ON lost_found_items
+                 BEGIN
+                     INSERT OR REPLACE INTO item_changes (item_id, seq)
+                     VALUES (OLD.id, (SELECT IFNULL(MAX(seq), 0) + 1 FROM item_changes));
+                 END''')
+    # Claims ledger: every claim attempt, with at most one accepted claim per item
+    c.execute('''CREATE TABLE IF NOT EXISTS claims (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        item_id INTEGER NOT NULL,
+        claimer_name TEXT,
+        claimer_email TEXT,
+        claimer_contact TEXT,
+        verification_detail TEXT,
+        claimed_at TEXT,
+        accepted INTEGER DEFAULT 0,
+        FOREIGN KEY(item_id) REFERENCES lost_found_items(id)
+    )''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_claims_item ON claims(item_id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_claims_claimer ON claims(claimer_email)')
+    c.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_claims_accepted ON claims(item_id) WHERE accepted = 1')
+    # MinHash signatures and LSH band buckets for duplicate detection
+    c.execute('''CREATE TABLE IF NOT EXISTS item_signatures (
+        item_id INTEGER PRIMARY KEY,
+        signature BLOB NOT NULL
+    )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS item_lsh_buckets (
+        band INTEGER NOT NULL,
+        bucket INTEGER NOT NULL,
+        item_id INTEGER NOT NULL,
+        PRIMARY KEY (band, bucket, item_id)
+    ) WITHOUT ROWID''')
+    # Expired open reports, moved out of lost_found_items by the retention sweeper;
+    # ids are kept (AUTOINCREMENT never reuses them) and only searched on request
+    c.execute('''CREATE TABLE IF NOT EXISTS lost_found_archive (
+        id INTEGER PRIMARY KEY,
+        type TEXT,
+        item_name TEXT,
+        category TEXT,
+        location TEXT,
+        description TEXT,
+        reporter_name TEXT,
+        reporter_contact TEXT,
+        date TEXT,
+        status TEXT,
+        matched_with INTEGER,
+        verification_code TEXT,
+        image_path TEXT,
+        created_at INTEGER,
+        archived_at INTEGER
+    )''')
     conn.commit()
     conn.close()
 
-_init_db()
-
 def add_item(item: Dict) -> int:
     """Add a lost or found item to the database. Returns new item id."""
     conn = _get_conn()
     c = conn.cursor()
     c.execute('''INSERT INTO lost_found_items (
-        type, item_name, category, location, description, reporter_name, reporter_contact, date, status, matched_with, verification_code, image_path
-    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''', (
+        type, item_name, category, location, description, reporter_name, reporter_contact, date, status, matched_with, verification_code, image_path, created_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''', (
         item['type'], item['item_name'], item['category'], item['location'], item['description'],
         item['reporter_name'], item['reporter_contact'], item.get('date', datetime.now().strftime('%Y-%m-%d')),
-        item.get('status', 'open'), item.get('matched_with'), item.get('verification_code'), item.get('image_path')
+        item.get('status', 'open'), item.get('matched_with'), item.get('verification_code'), item.get('image_path'),
+        item.get('created_at') or date_to_epoch(item.get('date'))
     ))
     item_id = c.lastrowid
     conn.commit()
@@ -59,8 +146,7 @@ def get_all_items() -> List[Dict]:
     c.execute('SELECT * FROM lost_found_items')
     rows = c.fetchall()
     conn.close()
-    keys = ['id', 'type', 'item_name', 'category', 'location', 'description', 'reporter_name', 'reporter_contact', 'date', 'status', 'matched_with', 'verification_code', 'image_path']
-    return [dict(zip(keys, row)) for row in rows]
+    return [dict(zip(ITEM_KEYS, row)) for row in rows]
 
 def get_item_by_id(item_id: int) -> Optional[Dict]:
     """Get a single item by id."""
@@ -70,10 +156,98 @@ def get_item_by_id(item_id: int) -> Optional[Dict]:
     row = c.fetchone()
     conn.close()
     if row:
-        keys = ['id', 'type', 'item_name', 'category', 'location', 'description', 'reporter_name', 'reporter_contact', 'date', 'status', 'matched_with', 'verification_code', 'image_path']
-        return dict(zip(keys, row))
+        return dict(zip(ITEM_KEYS, row))
     return None
 
+ITEM_KEYS = ['id', 'type', 'item_name', 'category', 'location', 'description', 'reporter_name', 'reporter_contact', 'date', 'status', 'matched_with', 'verification_code', 'image_path', 'created_at']
+
+class ItemRecord(Record):
+    """Read-only lost & found item row"""
+    __slots__ = ()
+    KEYS = tuple(ITEM_KEYS)
+
+def get_all_item_records() -> List[ItemRecord]:
+    """Get all items as compact read-only records (see database.records)."""
+    conn = _get_conn()
+    conn.row_factory = ItemRecord.row_factory
+    rows = conn.execute('SELECT * FROM lost_found_items').fetchall()
+    conn.close()
+    return rows
+
+def _where(filters: Optional[Dict[str, Any]], columns: List[str]) -> Tuple[str, tuple]:
+    """WHERE clause for equality filters on known columns"""
+    if not filters:
+        return '', ()
+    unknown = set(filters) - set(columns)
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(sorted(unknown))}")
+    return ' WHERE ' + ' AND '.join(f'{column} = ?' for column in filters), tuple(filters.values())
+
+def iter_items(filters: Optional[Dict[str, Any]] = None, batch_size: int = 500) -> Iterator[ItemRecord]:
+    """Yield items as records, reading batch_size rows at a time.
+
+    filters maps column names to required values, e.g. {'type': 'lost'}.
+    Only one batch is held in memory, and the connection is closed as soon as
+    the caller stops iterating.
+    """
+    where, params = _where(filters, ITEM_KEYS)
+    conn = _get_conn()
+    conn.row_factory = ItemRecord.row_factory
+    try:
+        c = conn.execute('SELECT * FROM lost_found_items' + where, params)
+        while True:
+            rows = c.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        conn.close()
+
+def get_recent_items(limit: int = 10) -> List[Dict]:
+    """Get the most recently created items (a backward scan of the created_at index)."""
+    conn = _get_conn()
+    rows = conn.execute('SELECT * FROM lost_found_items ORDER BY created_at DESC, id DESC LIMIT ?', (limit,)).fetchall()
+    conn.close()
+    return [dict(zip(ITEM_KEYS, row)) for row in rows]
+
+def items_between(start: float, end: float) -> List[Dict]:
+    """Get items created in [start, end) epoch seconds, newest first (an index range scan)."""
+    conn = _get_conn()
+    rows = conn.execute('''SELECT * FROM lost_found_items WHERE created_at >= ? AND created_at < ?
+                           ORDER BY created_at DESC, id DESC''', (start, end)).fetchall()
+    conn.close()
+    return [dict(zip(ITEM_KEYS, row)) for row in rows]
+
+def get_items_after(last_id: int) -> List[Dict]:
+    """Get items with an id above last_id, in id order."""
+    conn = _get_conn()
+    c = conn.cursor()
+    c.execute('SELECT * FROM lost_found_items WHERE id > ? ORDER BY id', (last_id,))
+    rows = c.fetchall()
+    conn.close()
+    return [dict(zip(ITEM_KEYS, row)) for row in rows]
+
+def get_item_change_seq() -> int:
+    """Sequence number of the latest item change (0 when none)."""
+    conn = _get_conn()
+    seq = conn.execute('SELECT IFNULL(MAX(seq), 0) FROM item_changes').fetchone()[0]
+    conn.close()
+    return seq
+
+def get_item_changes(since_seq: int) -> Tuple[int, List[Tuple[int, Optional[str]]]]:
+    """Items whose status changed or that were deleted after since_seq.
+
+    Returns (latest seq, [(item id, current status)]), with status None for
+    deleted items. Reads only the change log rows past since_seq.
+    """
+    conn = _get_conn()
+    rows = conn.execute('''SELECT c.seq, c.item_id, i.id IS NOT NULL, i.status
+                           FROM item_changes c LEFT JOIN lost_found_items i ON i.id = c.item_id
+                           WHERE c.seq > ?''', (since_seq,)).fetchall()
+    conn.close()
+    latest = max([since_seq] + [row[0] for row in rows])
+    return latest, [(row[1], row[3] if row[2] else None) for row in rows]
+
 def update_item_status(item_id: int, status: str, matched_with: Optional[int] = None):
     """Update the status and optionally matched_with for an item."""
     conn = _get_conn()
@@ -85,14 +259,166 @@ def update_item_status(item_id: int, status: str, matched_with: Optional[int] =
     conn.commit()
     conn.close()
 
+CLAIM_KEYS = ['id', 'item_id', 'claimer_name', 'claimer_email', 'claimer_contact', 'verification_detail', 'claimed_at', 'accepted']
+
+def claim_open_item(item_id: int, claim: Dict) -> Optional[Dict]:
+    """Atomically claim an open item and record the attempt in the claims ledger.
+
+    The status change is a single conditional UPDATE (open -> claimed) done in
+    the same transaction as the ledger insert, so concurrent claimers cannot
+    both win. Returns the accepted claim for the item, which belongs to another
+    claimer if they got there first, or None if the item has no accepted claim
+    (it does not exist or was closed some other way).
+    """
+    conn = _get_conn()
+    c = conn.cursor()
+    try:
+        c.execute("UPDATE lost_found_items SET status = 'claimed' WHERE id = ? AND status = 'open'", (item_id,))
+        won = c.rowcount == 1
+        exists = won or c.execute('SELECT 1 FROM lost_found_items WHERE id = ?', (item_id,)).fetchone() is not None
+        if exists:
+            c.execute('''INSERT INTO claims (
+                item_id, claimer_name, claimer_email, claimer_contact, verification_detail, claimed_at, accepted
+            ) VALUES (?, ?, ?, ?, ?, ?, ?)''', (
+                item_id, claim.get('claimer_name'), claim.get('claimer_email'), claim.get('claimer_contact'),
+                claim.get('verification_detail'), claim.get('claimed_at', datetime.now().strftime('%Y-%m-%d %H:%M:%S')),
+                1 if won else 0
+            ))
+        conn.commit()
+        c.execute('SELECT * FROM claims WHERE item_id = ? AND accepted = 1', (item_id,))
+        row = c.fetchone()
+    finally:
+        conn.close()
+    return dict(zip(CLAIM_KEYS, row)) if row else None
+
+def get_claims_for_item(item_id: int) -> List[Dict]:
+    """Get the claim history for an item, oldest first."""
+    conn = _get_conn()
+    c = conn.cursor()
+    c.execute('SELECT * FROM claims WHERE item_id = ? ORDER BY id', (item_id,))
+    rows = c.fetchall()
+    conn.close()
+    return [dict(zip(CLAIM_KEYS, row)) for row in rows]
+
+def get_claims_by_claimer(claimer_email: str) -> List[Dict]:
+    """Get all claims made by a claimer (by email), newest first."""
+    conn = _get_conn()
+    c = conn.cursor()
+    c.execute('SELECT * FROM claims WHERE claimer_email = ? ORDER BY id DESC', (claimer_email,))
+    rows = c.fetchall()
+    conn.close()
+    return [dict(zip(CLAIM_KEYS, row)) for row in rows]
+
 def delete_item(item_id: int):
     """Delete an item from the database."""
     conn = _get_conn()
     c = conn.cursor()
     c.execute('DELETE FROM lost_found_items WHERE id = ?', (item_id,))
+    c.execute('DELETE FROM item_signatures WHERE item_id = ?', (item_id,))
+    c.execute('DELETE FROM item_lsh_buckets WHERE item_id = ?', (item_id,))
+    conn.commit()
+    conn.close()
+
+ARCHIVE_KEYS = ITEM_KEYS + ['archived_at']
+
+def archive_expired_items(cutoffs: Dict[str, float], default_cutoff: float, batch_size: int = 200) -> List[Tuple[int, str]]:
+    """Move up to batch_size expired open items to lost_found_archive in one transaction.
+
+    An open item expires when its created_at is before its category's cutoff
+    in cutoffs, or before default_cutoff for other categories. Only the
+    created_at index range below the latest cutoff is scanned. Returns the
+    (id, type) of the items moved; call again until it returns nothing.
+    """
+    latest = max([default_cutoff, *cutoffs.values()])
+    expiry = 'CASE category ' + 'WHEN ? THEN ? ' * len(cutoffs) + 'ELSE ? END'
+    params = [value for pair in cutoffs.items() for value in pair] + [default_cutoff]
+    columns = ', '.join(ITEM_KEYS)
+    selected = ', '.join("'archived'" if key == 'status' else key for key in ITEM_KEYS)
+    conn = _get_conn()
+    try:
+        c = conn.cursor()
+        c.execute('BEGIN IMMEDIATE')
+        c.execute(f'''SELECT id, type FROM lost_found_items
+                     WHERE created_at < ? AND status = 'open' AND created_at < {expiry}
+                     ORDER BY created_at LIMIT ?''', [latest, *params, batch_size])
+        rows = c.fetchall()
+        if rows:
+            ids = [row[0] for row in rows]
+            marks = ', '.join('?' * len(ids))
+            c.execute(f'''INSERT INTO lost_found_archive ({columns}, archived_at)
+                         SELECT {selected}, ? FROM lost_found_items WHERE id IN ({marks})''',
+                      [int(datetime.now().timestamp()), *ids])
+            for table, column in (('lost_found_items', 'id'), ('item_signatures', 'item_id'),
+                                  ('item_lsh_buckets', 'item_id')):
+                c.execute(f'DELETE FROM {table} WHERE {column} IN ({marks})', ids)
+        conn.commit()
+        return rows
+    finally:
+        conn.close()
+
+def search_archive(query: str, limit: int = 100) -> List[Dict]:
+    """Search archived items by name, category, location or description, most recently archived first."""
+    pattern = '%' + query.replace('!', '!!').replace('%', '!%').replace('_', '!_') + '%'
+    conn = _get_conn()
+    rows = conn.execute('''SELECT * FROM lost_found_archive
+                           WHERE item_name LIKE ?1 ESCAPE '!' OR category LIKE ?1 ESCAPE '!'
+                              OR location LIKE ?1 ESCAPE '!' OR description LIKE ?1 ESCAPE '!'
+                           ORDER BY archived_at DESC, id DESC LIMIT ?2''', (pattern, limit)).fetchall()
+    conn.close()
+    return [dict(zip(ARCHIVE_KEYS, row)) for row in rows]
+
+def count_archived_items() -> int:
+    """Number of items in the archive."""
+    conn = _get_conn()
+    count = conn.execute('SELECT COUNT(*) FROM lost_found_archive').fetchone()[0]
+    conn.close()
+    return count
+
+def save_item_signatures(entries: List[Tuple[int, bytes, List[Tuple[int, int]]]]):
+    """Store (item_id, signature, band_keys) entries, replacing any existing ones."""
+    conn = _get_conn()
+    c = conn.cursor()
+    for item_id, signature, band_keys in entries:
+        c.execute('DELETE FROM item_lsh_buckets WHERE item_id = ?', (item_id,))
+        c.execute('INSERT OR REPLACE INTO item_signatures (item_id, signature) VALUES (?, ?)', (item_id, signature))
+        c.executemany('INSERT OR IGNORE INTO item_lsh_buckets (band, bucket, item_id) VALUES (?, ?, ?)',
+                      [(band, bucket, item_id) for band, bucket in band_keys])
     conn.commit()
     conn.close()
 
+def find_signature_candidates(band_keys: List[Tuple[int, int]]) -> List[Tuple[int, bytes]]:
+    """Get (item_id, signature) for items sharing any LSH bucket with the given keys."""
+    if not band_keys:
+        return []
+    clause = ' OR '.join(['(b.band = ? AND b.bucket = ?)'] * len(band_keys))
+    params = [value for key in band_keys for value in key]
+    conn = _get_conn()
+    c = conn.cursor()
+    c.execute(f'''SELECT DISTINCT s.item_id, s.signature
+                  FROM item_lsh_buckets b JOIN item_signatures s ON s.item_id = b.item_id
+                  WHERE {clause}''', params)
+    rows = c.fetchall()
+    conn.close()
+    return rows
+
+def remove_item_signature(item_id: int):
+    """Drop an item from the duplicate-detection index."""
+    conn = _get_conn()
+    c = conn.cursor()
+    c.execute('DELETE FROM item_signatures WHERE item_id = ?', (item_id,))
+    c.execute('DELETE FROM item_lsh_buckets WHERE item_id = ?', (item_id,))
+    conn.commit()
+    conn.close()
+
+def get_item_signatures() -> Dict[int, bytes]:
+    """Get all stored signatures keyed by item id."""
+    conn = _get_conn()
+    c = conn.cursor()
+    c.execute('SELECT item_id, signature FROM item_signatures')
+    rows = c.fetchall()
+    conn.close()
+    return dict(rows)
+
 def get_next_id() -> int:
     """Generate next unique ID for items"""
     global item_id_counter
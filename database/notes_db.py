@@ -2,18 +2,38 @@
 Notes Exchange Database - SQLite persistent storage
 """
 
+import math
 import sqlite3
+import threading
 import os
+import time
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from database.records import Record
+from utils.helpers import date_to_epoch
 
 DB_PATH = os.path.join(os.path.dirname(__file__), 'notes.db')
 
+# Schema setup runs once per process, on first connection rather than at import
+_schema_ready = False
+_schema_lock = threading.Lock()
+
 def _get_conn():
+    if not _schema_ready:
+        _init_db()
     return sqlite3.connect(DB_PATH)
 
 def _init_db():
-    conn = _get_conn()
+    """Create tables if needed. Memoized so repeated calls are free."""
+    global _schema_ready
+    with _schema_lock:
+        if _schema_ready:
+            return
+        _create_schema()
+        _schema_ready = True
+
+def _create_schema():
+    conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
     c.execute('''CREATE TABLE IF NOT EXISTS notes (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -27,27 +47,274 @@ def _init_db():
         downloads INTEGER DEFAULT 0,
         rating REAL DEFAULT 0.0
     )''')
+    # Per-user download log plus an item-item co-download index built from it
+    c.execute('''CREATE TABLE IF NOT EXISTS download_events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        note_id INTEGER NOT NULL,
+        downloaded_at TEXT
+    )''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_download_events_user ON download_events(user_id, note_id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_download_events_note ON download_events(note_id)')
+    c.execute('''CREATE TABLE IF NOT EXISTS note_cooccurrence (
+        note_a INTEGER NOT NULL,
+        note_b INTEGER NOT NULL,
+        weight REAL NOT NULL,
+        PRIMARY KEY (note_a, note_b)
+    ) WITHOUT ROWID''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_note_cooccurrence_weight ON note_cooccurrence(note_a, weight)')
+    # Precomputed top-k neighbours so recommendations are a single indexed read
+    c.execute('''CREATE TABLE IF NOT EXISTS note_neighbours (
+        note_id INTEGER NOT NULL,
+        rank INTEGER NOT NULL,
+        neighbour_id INTEGER NOT NULL,
+        score REAL NOT NULL,
+        PRIMARY KEY (note_id, rank)
+    ) WITHOUT ROWID''')
+    # Full-text index over the contents of uploaded note files
+    c.execute('''CREATE TABLE IF NOT EXISTS note_files (
+        note_id INTEGER PRIMARY KEY,
+        file_hash TEXT,
+        mtime REAL,
+        size INTEGER,
+        term_count INTEGER DEFAULT 0,
+        indexed_at TEXT
+    )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS note_terms (
+        term TEXT NOT NULL,
+        note_id INTEGER NOT NULL,
+        tf INTEGER NOT NULL,
+        PRIMARY KEY (term, note_id)
+    ) WITHOUT ROWID''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_note_terms_note ON note_terms(note_id)')
+    # Time-decayed trending score (see increment_download); its epoch lives in notes_meta
+    c.execute('CREATE TABLE IF NOT EXISTS notes_meta (key TEXT PRIMARY KEY, value REAL)')
+    columns = {row[1] for row in c.execute('PRAGMA table_info(notes)')}
+    if 'trend_score' not in columns:
+        c.execute('ALTER TABLE notes ADD COLUMN trend_score REAL DEFAULT 0')
+        _backfill_trend(c)
+    c.execute('CREATE INDEX IF NOT EXISTS idx_notes_trend ON notes(trend_score, downloads)')
+    # One rating per user per note; notes carry running totals and a Bayesian average
+    c.execute('''CREATE TABLE IF NOT EXISTS note_ratings (
+        note_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        rating INTEGER NOT NULL,
+        rated_at TEXT,
+        PRIMARY KEY (note_id, user_id)
+    ) WITHOUT ROWID''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_note_ratings_user ON note_ratings(user_id)')
+    if 'bayes_rating' not in columns:
+        c.execute('ALTER TABLE notes ADD COLUMN rating_sum REAL DEFAULT 0')
+        c.execute('ALTER TABLE notes ADD COLUMN rating_count INTEGER DEFAULT 0')
+        c.execute(f'ALTER TABLE notes ADD COLUMN bayes_rating REAL DEFAULT {RATING_PRIOR_MEAN}')
+    # Matches the subject expression used by get_notes_by_subject / get_best_rated_notes
+    c.execute('CREATE INDEX IF NOT EXISTS idx_notes_subject_bayes ON notes(lower(trim(subject)), bayes_rating)')
+    # Contributor leaderboard keyed by the uploader's user id, maintained on
+    # upload, delete and download; contributor_subjects counts notes per subject
+    if 'uploader_id' not in columns:
+        c.execute('ALTER TABLE notes ADD COLUMN uploader_id INTEGER')
+    # Creation time as epoch seconds, indexed for time-window queries; rows from
+    # before the column existed get local midnight of their upload date
+    if 'created_at' not in columns:
+        c.execute('ALTER TABLE notes ADD COLUMN created_at INTEGER')
+        c.execute("UPDATE notes SET created_at = CAST(strftime('%s', upload_date, 'utc') AS INTEGER)")
+    c.execute('CREATE INDEX IF NOT EXISTS idx_notes_created ON notes(created_at)')
+    # Change log for incremental readers: one row per note whose download count
+    # changed or that was deleted, stamped with an increasing sequence number
+    c.execute('''CREATE TABLE IF NOT EXISTS note_changes (
+        note_id INTEGER PRIMARY KEY,
+        seq INTEGER NOT NULL
+    )''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_note_changes_seq ON note_changes(seq)')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS trg_notes_downloads_changed
+                 AFTER UPDATE OF downloads ON notes WHEN OLD.downloads IS NOT NEW.downloads
+                 BEGIN
+                     INSERT OR REPLACE INTO note_changes (note_id, seq)
+                     VALUES (NEW.id, (SELECT IFNULL(MAX(seq), 0) + 1 FROM note_changes));
+                 END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS trg_notes_deleted AFTER DELETE ON notes
+                 BEGIN
+                     INSERT OR REPLACE INTO note_changes (note_id, seq)
+                     VALUES (OLD.id, (SELECT IFNULL(MAX(seq), 0) + 1 FROM note_changes));
+                 END''')
+    c.execute('''CREATE TABLE IF NOT EXISTS contributors (
+        user_id INTEGER PRIMARY KEY,
+        name TEXT,
+        uploads INTEGER NOT NULL DEFAULT 0,
+        total_downloads INTEGER NOT NULL DEFAULT 0,
+        subject_count INTEGER NOT NULL DEFAULT 0
+    )''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_contributors_rank ON contributors(uploads, total_downloads)')
+    c.execute('''CREATE TABLE IF NOT EXISTS contributor_subjects (
+        user_id INTEGER NOT NULL,
+        subject_key TEXT NOT NULL,
+        subject TEXT,
+        notes INTEGER NOT NULL,
+        PRIMARY KEY (user_id, subject_key)
+    ) WITHOUT ROWID''')
     conn.commit()
     conn.close()
 
-_init_db()
+NOTE_KEYS = ['id', 'subject', 'topic', 'semester', 'uploaded_by', 'file_name', 'description', 'upload_date', 'downloads', 'rating']
+
+# Number of neighbours kept per note
+NEIGHBOURS_K = 10
+
+# Trending: a download at time t adds exp(rate * (t - epoch)) to trend_score, so
+# ranking by the stored value is ranking by exponentially decayed download
+# counts, and each download is an O(1) update. The epoch is moved forward
+# (rescaling every score) once it is TREND_RESCALE_DAYS old, so weights stay small.
+TREND_HALF_LIFE_DAYS = 7
+TREND_RESCALE_DAYS = 30
+_TREND_RATE = math.log(2) / (TREND_HALF_LIFE_DAYS * 86400)
+
+# Bayesian average: every note starts as if it had RATING_PRIOR_WEIGHT ratings of
+# RATING_PRIOR_MEAN, so a single 5-star rating does not top the subject
+RATING_PRIOR_MEAN = 3.0
+RATING_PRIOR_WEIGHT = 5
+
+_BAYES_SQL = f'''UPDATE notes SET
+    bayes_rating = ({RATING_PRIOR_WEIGHT * RATING_PRIOR_MEAN} + rating_sum) / ({RATING_PRIOR_WEIGHT} + rating_count),
+    rating = CASE WHEN rating_count > 0 THEN ROUND(rating_sum / rating_count, 1) ELSE 0 END'''
+
+def _trend_epoch(c) -> float:
+    c.execute("SELECT value FROM notes_meta WHERE key = 'trend_epoch'")
+    row = c.fetchone()
+    if row:
+        return row[0]
+    epoch = time.time()
+    c.execute("INSERT INTO notes_meta (key, value) VALUES ('trend_epoch', ?)", (epoch,))
+    return epoch
+
+def _rescale_trend(c, epoch: float, now: float) -> float:
+    """Move the epoch to now, scaling every score to match. Returns the new epoch."""
+    c.execute('UPDATE notes SET trend_score = trend_score * ? WHERE trend_score > 0',
+              (math.exp(-_TREND_RATE * (now - epoch)),))
+    c.execute("UPDATE notes_meta SET value = ? WHERE key = 'trend_epoch'", (now,))
+    return now
+
+def _backfill_trend(c):
+    """Seed trend scores from the per-user download log"""
+    epoch = _trend_epoch(c)
+    scores = {}
+    for note_id, downloaded_at in c.execute('SELECT note_id, downloaded_at FROM download_events').fetchall():
+        t = datetime.strptime(downloaded_at, '%Y-%m-%d %H:%M:%S').timestamp()
+        scores[note_id] = scores.get(note_id, 0.0) + math.exp(_TREND_RATE * (t - epoch))
+    c.executemany('UPDATE notes SET trend_score = ? WHERE id = ?', [(score, note_id) for note_id, score in scores.items()])
 
 def add_note(note: Dict) -> int:
     """Add a note to the database. Returns new note id."""
     conn = _get_conn()
     c = conn.cursor()
     c.execute('''INSERT INTO notes (
-        subject, topic, semester, uploaded_by, file_name, description, upload_date, downloads, rating
-    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''', (
+        subject, topic, semester, uploaded_by, file_name, description, upload_date, downloads, rating, uploader_id, created_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''', (
         note['subject'], note['topic'], note['semester'], note['uploaded_by'], note['file_name'],
         note['description'], note.get('upload_date', datetime.now().strftime('%Y-%m-%d')),
-        note.get('downloads', 0), note.get('rating', 0.0)
+        note.get('downloads', 0), note.get('rating', 0.0), note.get('uploader_id'),
+        note.get('created_at') or date_to_epoch(note.get('upload_date'))
     ))
     note_id = c.lastrowid
+    if note.get('uploader_id'):
+        _add_contribution(c, note['uploader_id'], note['uploaded_by'], note['subject'], note.get('downloads', 0))
     conn.commit()
     conn.close()
     return note_id
 
+def _add_contribution(c, user_id: int, name: str, subject: str, downloads: int):
+    """Count one uploaded note towards a contributor"""
+    key = ' '.join(subject.casefold().split())
+    c.execute('''INSERT INTO contributor_subjects (user_id, subject_key, subject, notes) VALUES (?, ?, ?, 1)
+                 ON CONFLICT(user_id, subject_key) DO UPDATE SET notes = notes + 1''', (user_id, key, subject))
+    c.execute('SELECT notes FROM contributor_subjects WHERE user_id = ? AND subject_key = ?', (user_id, key))
+    new_subject = c.fetchone()[0] == 1
+    c.execute('''INSERT INTO contributors (user_id, name, uploads, total_downloads, subject_count) VALUES (?, ?, 1, ?, ?)
+                 ON CONFLICT(user_id) DO UPDATE SET name = excluded.name, uploads = uploads + 1,
+                     total_downloads = total_downloads + excluded.total_downloads,
+                     subject_count = subject_count + excluded.subject_count''',
+              (user_id, name, downloads, 1 if new_subject else 0))
+
+def _remove_contribution(c, user_id: int, subject: str, downloads: int):
+    """Undo _add_contribution for a deleted note"""
+    key = ' '.join(subject.casefold().split())
+    c.execute('UPDATE contributor_subjects SET notes = notes - 1 WHERE user_id = ? AND subject_key = ?', (user_id, key))
+    c.execute('DELETE FROM contributor_subjects WHERE user_id = ? AND subject_key = ? AND notes <= 0', (user_id, key))
+    last_of_subject = c.rowcount > 0
+    c.execute('''UPDATE contributors SET uploads = uploads - 1, total_downloads = total_downloads - ?,
+                     subject_count = subject_count - ? WHERE user_id = ?''',
+              (downloads, 1 if last_of_subject else 0, user_id))
+    c.execute('DELETE FROM contributors WHERE user_id = ? AND uploads <= 0', (user_id,))
+
+def get_top_contributors(limit: int = 10) -> List[Dict]:
+    """Get the leaderboard (most uploads, then most downloads), read in index order."""
+    conn = _get_conn()
+    c = conn.cursor()
+    c.execute('''SELECT user_id, name, uploads, total_downloads, subject_count FROM contributors
+                 ORDER BY uploads DESC, total_downloads DESC LIMIT ?''', (limit,))
+    contributors = [dict(zip(['user_id', 'name', 'uploads', 'total_downloads', 'subject_count'], row))
+                    for row in c.fetchall()]
+    subjects = {}
+    if contributors:
+        ids = [contrib['user_id'] for contrib in contributors]
+        c.execute(f'SELECT user_id, subject FROM contributor_subjects WHERE user_id IN ({", ".join("?" * len(ids))})', ids)
+        for user_id, subject in c.fetchall():
+            subjects.setdefault(user_id, []).append(subject)
+    conn.close()
+    for contrib in contributors:
+        contrib['subjects'] = subjects.get(contrib['user_id'], [])
+    return contributors
+
+def get_contributor_rank(user_id: int) -> Optional[Dict]:
+    """Get a user's leaderboard entry with its 1-based 'rank' and the number of contributors.
+
+    The rank is counted from the rank index, so it does not depend on the number of notes.
+    """
+    conn = _get_conn()
+    c = conn.cursor()
+    c.execute('SELECT name, uploads, total_downloads, subject_count FROM contributors WHERE user_id = ?', (user_id,))
+    row = c.fetchone()
+    if not row:
+        conn.close()
+        return None
+    c.execute('''SELECT COUNT(*) FROM contributors
+                 WHERE uploads > ? OR (uploads = ? AND total_downloads > ?)''', (row[1], row[1], row[2]))
+    ahead = c.fetchone()[0]
+    c.execute('SELECT COUNT(*) FROM contributors')
+    total = c.fetchone()[0]
+    conn.close()
+    return {'user_id': user_id, 'name': row[0], 'uploads': row[1], 'total_downloads': row[2],
+            'subject_count': row[3], 'rank': ahead + 1, 'contributors': total}
+
+def contributors_built() -> bool:
+    """Whether the leaderboard has been built (see rebuild_contributors)."""
+    conn = _get_conn()
+    c = conn.cursor()
+    c.execute("SELECT value FROM notes_meta WHERE key = 'contributors_built'")
+    built = c.fetchone() is not None
+    conn.close()
+    return built
+
+def rebuild_contributors(uploader_ids: Optional[Dict[str, int]] = None):
+    """Rebuild the leaderboard from the notes table.
+
+    uploader_ids maps uploader names to user ids and is used to fill in
+    uploader_id on notes uploaded before it was recorded.
+    """
+    conn = _get_conn()
+    c = conn.cursor()
+    c.execute('BEGIN IMMEDIATE')
+    if uploader_ids:
+        c.executemany('UPDATE notes SET uploader_id = ? WHERE uploader_id IS NULL AND uploaded_by = ?',
+                      [(user_id, name) for name, user_id in uploader_ids.items()])
+    c.execute('DELETE FROM contributors')
+    c.execute('DELETE FROM contributor_subjects')
+    c.execute('SELECT uploader_id, uploaded_by, subject, downloads FROM notes WHERE uploader_id IS NOT NULL ORDER BY id')
+    for user_id, name, subject, downloads in c.fetchall():
+        _add_contribution(c, user_id, name, subject, downloads or 0)
+    c.execute("INSERT OR REPLACE INTO notes_meta (key, value) VALUES ('contributors_built', ?)", (time.time(),))
+    conn.commit()
+    conn.close()
+
 def get_all_notes() -> List[Dict]:
     """Get all notes from the database."""
     conn = _get_conn()
@@ -59,10 +326,10 @@ def get_all_notes() -> List[Dict]:
     return [dict(zip(keys, row)) for row in rows]
 
 def get_notes_by_subject(subject: str) -> List[Dict]:
-    """Get all notes for a given subject."""
+    """Get all notes for a given subject, ignoring case and surrounding spaces."""
     conn = _get_conn()
     c = conn.cursor()
-    c.execute('SELECT * FROM notes WHERE subject = ?', (subject,))
+    c.execute('SELECT * FROM notes WHERE lower(trim(subject)) = lower(trim(?))', (subject,))
     rows = c.fetchall()
     conn.close()
     keys = ['id', 'subject', 'topic', 'semester', 'uploaded_by', 'file_name', 'description', 'upload_date', 'downloads', 'rating']
@@ -80,11 +347,349 @@ def get_note_by_id(note_id: int) -> Optional[Dict]:
         return dict(zip(keys, row))
     return None
 
-def increment_download(note_id: int):
-    """Increment the download count for a note."""
+def get_notes_by_ids(note_ids: List[int]) -> List[Dict]:
+    """Get several notes in one query, in the order of note_ids; missing ids are skipped."""
+    if not note_ids:
+        return []
+    conn = _get_conn()
+    c = conn.cursor()
+    c.execute(f'SELECT {", ".join(NOTE_KEYS)} FROM notes WHERE id IN ({", ".join("?" * len(note_ids))})', list(note_ids))
+    notes = {row[0]: dict(zip(NOTE_KEYS, row)) for row in c.fetchall()}
+    conn.close()
+    return [notes[note_id] for note_id in note_ids if note_id in notes]
+
+class NoteRecord(Record):
+    """Read-only note row"""
+    __slots__ = ()
+    KEYS = tuple(NOTE_KEYS)
+
+def get_all_note_records() -> List[NoteRecord]:
+    """Get all notes as compact read-only records (see database.records)."""
+    conn = _get_conn()
+    conn.row_factory = NoteRecord.row_factory
+    rows = conn.execute('SELECT * FROM notes').fetchall()
+    conn.close()
+    return rows
+
+def _where(filters: Optional[Dict[str, Any]], columns: List[str]) -> Tuple[str, tuple]:
+    """WHERE clause for equality filters on known columns"""
+    if not filters:
+        return '', ()
+    unknown = set(filters) - set(columns)
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(sorted(unknown))}")
+    return ' WHERE ' + ' AND '.join(f'{column} = ?' for column in filters), tuple(filters.values())
+
+def iter_notes(filters: Optional[Dict[str, Any]] = None, batch_size: int = 500) -> Iterator[NoteRecord]:
+    """Yield notes as records, reading batch_size rows at a time.
+
+    filters maps column names to required values, e.g. {'semester': 'Semester 3'}.
+    Only one batch is held in memory, and the connection is closed as soon as
+    the caller stops iterating.
+    """
+    where, params = _where(filters, NOTE_KEYS)
+    conn = _get_conn()
+    conn.row_factory = NoteRecord.row_factory
+    try:
+        c = conn.execute('SELECT * FROM notes' + where, params)
+        while True:
+            rows = c.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        conn.close()
+
+def get_recent_notes(limit: int = 10) -> List[Dict]:
+    """Get the most recently uploaded notes (a backward scan of the created_at index)."""
+    conn = _get_conn()
+    rows = conn.execute(f'SELECT {", ".join(NOTE_KEYS)}, created_at FROM notes ORDER BY created_at DESC, id DESC LIMIT ?',
+                        (limit,)).fetchall()
+    conn.close()
+    return [dict(zip(NOTE_KEYS + ['created_at'], row)) for row in rows]
+
+def notes_since(timestamp: float) -> List[Dict]:
+    """Get notes uploaded at or after an epoch timestamp, newest first (an index range scan)."""
+    conn = _get_conn()
+    rows = conn.execute(f'''SELECT {", ".join(NOTE_KEYS)}, created_at FROM notes WHERE created_at >= ?
+                            ORDER BY created_at DESC, id DESC''', (timestamp,)).fetchall()
+    conn.close()
+    return [dict(zip(NOTE_KEYS + ['created_at'], row)) for row in rows]
+
+def get_notes_after(last_id: int) -> List[Dict]:
+    """Get notes with an id above last_id, in id order."""
+    conn = _get_conn()
+    c = conn.cursor()
+    c.execute('SELECT * FROM notes WHERE id > ? ORDER BY id', (last_id,))
+    rows = c.fetchall()
+    conn.close()
+    return [dict(zip(NOTE_KEYS, row)) for row in rows]
+
+def get_note_change_seq() -> int:
+    """Sequence number of the latest note change (0 when none)."""
+    conn = _get_conn()
+    seq = conn.execute('SELECT IFNULL(MAX(seq), 0) FROM note_changes').fetchone()[0]
+    conn.close()
+    return seq
+
+def get_note_changes(since_seq: int) -> Tuple[int, List[Tuple[int, Optional[int]]]]:
+    """Notes whose download count changed or that were deleted after since_seq.
+
+    Returns (latest seq, [(note id, current downloads)]), with downloads None
+    for deleted notes. Reads only the change log rows past since_seq.
+    """
+    conn = _get_conn()
+    rows = conn.execute('''SELECT c.seq, c.note_id, n.id IS NOT NULL, n.downloads
+                           FROM note_changes c LEFT JOIN notes n ON n.id = c.note_id
+                           WHERE c.seq > ?''', (since_seq,)).fetchall()
+    conn.close()
+    latest = max([since_seq] + [row[0] for row in rows])
+    return latest, [(row[1], row[3] if row[2] else None) for row in rows]
+
+def increment_download(note_id: int) -> Optional[int]:
+    """Increment the download count and trending score for a note. Returns the new count."""
+    now = time.time()
+    conn = _get_conn()
+    c = conn.cursor()
+    c.execute('BEGIN IMMEDIATE')  # the epoch must not move between reading and using it
+    epoch = _trend_epoch(c)
+    if now - epoch > TREND_RESCALE_DAYS * 86400:
+        epoch = _rescale_trend(c, epoch, now)
+    c.execute('UPDATE notes SET downloads = downloads + 1, trend_score = trend_score + ? WHERE id = ?',
+              (math.exp(_TREND_RATE * (now - epoch)), note_id))
+    c.execute('''UPDATE contributors SET total_downloads = total_downloads + 1
+                 WHERE user_id = (SELECT uploader_id FROM notes WHERE id = ?)''', (note_id,))
+    c.execute('SELECT downloads FROM notes WHERE id = ?', (note_id,))
+    row = c.fetchone()
+    conn.commit()
+    conn.close()
+    return row[0] if row else None
+
+def rescale_trending() -> bool:
+    """Periodic job: rescale trend scores if the epoch is due. Returns True if it was."""
+    now = time.time()
+    conn = _get_conn()
+    c = conn.cursor()
+    c.execute('BEGIN IMMEDIATE')
+    epoch = _trend_epoch(c)
+    due = now - epoch > TREND_RESCALE_DAYS * 86400
+    if due:
+        _rescale_trend(c, epoch, now)
+    conn.commit()
+    conn.close()
+    return due
+
+def get_trending_notes(limit: int = 10) -> List[Dict]:
+    """Get the top notes by decayed downloads, read in index order.
+
+    Each note's 'trending' key is its decayed download count as of now.
+    """
+    conn = _get_conn()
+    c = conn.cursor()
+    decay = math.exp(-_TREND_RATE * (time.time() - _trend_epoch(c)))
+    c.execute(f'SELECT {", ".join(NOTE_KEYS)}, trend_score FROM notes '
+              'ORDER BY trend_score DESC, downloads DESC LIMIT ?', (limit,))
+    rows = c.fetchall()
+    conn.commit()
+    conn.close()
+    notes = []
+    for row in rows:
+        note = dict(zip(NOTE_KEYS, row))
+        note['trending'] = round(row[-1] * decay, 2)
+        notes.append(note)
+    return notes
+
+def _refresh_neighbours(c, note_ids, k: int = NEIGHBOURS_K):
+    """Recompute the stored top-k neighbours of the given notes from the co-download index."""
+    for note_id in note_ids:
+        c.execute('DELETE FROM note_neighbours WHERE note_id = ?', (note_id,))
+        c.execute('''SELECT note_b, weight FROM note_cooccurrence
+                     WHERE note_a = ? ORDER BY weight DESC, note_b LIMIT ?''', (note_id, k))
+        c.executemany('INSERT INTO note_neighbours (note_id, rank, neighbour_id, score) VALUES (?, ?, ?, ?)',
+                      [(note_id, rank, neighbour, weight) for rank, (neighbour, weight) in enumerate(c.fetchall())])
+
+def record_download(user_id: int, note_id: int):
+    """Log a download and update the co-download index incrementally.
+
+    Only a user's first download of a note adds co-occurrences (one per other
+    note they have downloaded), and only the affected notes' neighbour lists
+    are refreshed.
+    """
+    conn = _get_conn()
+    c = conn.cursor()
+    c.execute('SELECT 1 FROM download_events WHERE user_id = ? AND note_id = ? LIMIT 1', (user_id, note_id))
+    first_time = c.fetchone() is None
+    c.execute('INSERT INTO download_events (user_id, note_id, downloaded_at) VALUES (?, ?, ?)',
+              (user_id, note_id, datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+    if first_time:
+        c.execute('SELECT DISTINCT note_id FROM download_events WHERE user_id = ? AND note_id != ?', (user_id, note_id))
+        others = [row[0] for row in c.fetchall()]
+        c.executemany('''INSERT INTO note_cooccurrence (note_a, note_b, weight) VALUES (?, ?, 1)
+                         ON CONFLICT(note_a, note_b) DO UPDATE SET weight = weight + 1''',
+                      [(note_id, other) for other in others] + [(other, note_id) for other in others])
+        if others:
+            _refresh_neighbours(c, [note_id] + others)
+    conn.commit()
+    conn.close()
+
+def get_neighbour_notes(note_id: int, limit: int = 5) -> List[Dict]:
+    """Get the precomputed co-download neighbours of a note, best first."""
+    conn = _get_conn()
+    c = conn.cursor()
+    c.execute('''SELECT n.* FROM note_neighbours nb JOIN notes n ON n.id = nb.neighbour_id
+                 WHERE nb.note_id = ? ORDER BY nb.rank LIMIT ?''', (note_id, limit))
+    rows = c.fetchall()
+    conn.close()
+    return [dict(zip(NOTE_KEYS, row)) for row in rows]
+
+def rebuild_cooccurrence(half_life_days: float, max_per_user: int = 50, k: int = NEIGHBOURS_K):
+    """Rebuild the co-download index from the event log with exponential time decay.
+
+    Each pair a user downloaded contributes 0.5 ** (age / half_life), where age
+    is measured from the later of the two downloads. Only each user's most
+    recent `max_per_user` distinct notes are paired.
+    """
     conn = _get_conn()
     c = conn.cursor()
-    c.execute('UPDATE notes SET downloads = downloads + 1 WHERE id = ?', (note_id,))
+    c.execute('''SELECT user_id, note_id, MIN(downloaded_at) FROM download_events
+                 GROUP BY user_id, note_id ORDER BY user_id, 3 DESC''')
+    now = datetime.now()
+    per_user = {}
+    for user_id, note_id, downloaded_at in c.fetchall():
+        notes = per_user.setdefault(user_id, [])
+        if len(notes) < max_per_user:
+            age_days = (now - datetime.strptime(downloaded_at, '%Y-%m-%d %H:%M:%S')).total_seconds() / 86400
+            notes.append((note_id, max(age_days, 0.0)))
+    weights = {}
+    for notes in per_user.values():
+        for i, (a, age_a) in enumerate(notes):
+            for b, age_b in notes[i + 1:]:
+                decay = 0.5 ** (min(age_a, age_b) / half_life_days)
+                weights[(a, b)] = weights.get((a, b), 0.0) + decay
+                weights[(b, a)] = weights.get((b, a), 0.0) + decay
+    c.execute('DELETE FROM note_cooccurrence')
+    c.executemany('INSERT INTO note_cooccurrence (note_a, note_b, weight) VALUES (?, ?, ?)',
+                  [(a, b, w) for (a, b), w in weights.items()])
+    c.execute('DELETE FROM note_neighbours')
+    _refresh_neighbours(c, {a for a, _ in weights}, k)
+    conn.commit()
+    conn.close()
+
+def get_note_file_states() -> Dict[int, Dict]:
+    """Get the indexed file state (hash, mtime, size) of every indexed note."""
+    conn = _get_conn()
+    c = conn.cursor()
+    c.execute('SELECT note_id, file_hash, mtime, size FROM note_files')
+    rows = c.fetchall()
+    conn.close()
+    return {row[0]: {'file_hash': row[1], 'mtime': row[2], 'size': row[3]} for row in rows}
+
+def save_note_terms(note_id: int, file_hash: str, mtime: float, size: int, term_counts: Optional[Dict[str, int]]):
+    """Record a note file's state and, if term_counts is given, replace its postings.
+
+    Passing None for term_counts only refreshes the stored mtime/size (the file
+    was touched but its content hash is unchanged).
+    """
+    conn = _get_conn()
+    c = conn.cursor()
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    if term_counts is None:
+        c.execute('UPDATE note_files SET mtime = ?, size = ? WHERE note_id = ?', (mtime, size, note_id))
+    else:
+        c.execute('DELETE FROM note_terms WHERE note_id = ?', (note_id,))
+        c.executemany('INSERT INTO note_terms (term, note_id, tf) VALUES (?, ?, ?)',
+                      [(term, note_id, tf) for term, tf in term_counts.items()])
+        c.execute('''INSERT OR REPLACE INTO note_files (note_id, file_hash, mtime, size, term_count, indexed_at)
+                     VALUES (?, ?, ?, ?, ?, ?)''', (note_id, file_hash, mtime, size, sum(term_counts.values()), now))
+    conn.commit()
+    conn.close()
+
+def remove_note_terms(note_id: int):
+    """Drop a note from the full-text index."""
+    conn = _get_conn()
+    c = conn.cursor()
+    c.execute('DELETE FROM note_terms WHERE note_id = ?', (note_id,))
+    c.execute('DELETE FROM note_files WHERE note_id = ?', (note_id,))
+    conn.commit()
+    conn.close()
+
+def search_note_terms(terms: List[str]) -> Dict[int, float]:
+    """Score notes by TF-IDF over the given terms using the content index."""
+    terms = list(set(terms))
+    if not terms:
+        return {}
+    placeholders = ','.join('?' * len(terms))
+    conn = _get_conn()
+    c = conn.cursor()
+    total = c.execute('SELECT COUNT(*) FROM note_files').fetchone()[0]
+    c.execute(f'SELECT term, note_id, tf FROM note_terms WHERE term IN ({placeholders})', terms)
+    postings = c.fetchall()
+    conn.close()
+    doc_freq = {}
+    for term, _, _ in postings:
+        doc_freq[term] = doc_freq.get(term, 0) + 1
+    scores = {}
+    for term, note_id, tf in postings:
+        idf = math.log(1 + total / doc_freq[term])
+        scores[note_id] = scores.get(note_id, 0.0) + (1 + math.log(tf)) * idf
+    return scores
+
+def rate_note(note_id: int, user_id: int, rating: int) -> bool:
+    """Record or change a user's 1-5 rating of a note.
+
+    The note's running sum and count are adjusted by the difference from the
+    user's previous rating in the same transaction, so averages never need a
+    scan of note_ratings. Returns False if the note does not exist.
+    """
+    conn = _get_conn()
+    c = conn.cursor()
+    c.execute('BEGIN IMMEDIATE')
+    c.execute('SELECT rating FROM note_ratings WHERE note_id = ? AND user_id = ?', (note_id, user_id))
+    previous = c.fetchone()
+    c.execute('UPDATE notes SET rating_sum = rating_sum + ?, rating_count = rating_count + ? WHERE id = ?',
+              (rating - (previous[0] if previous else 0), 0 if previous else 1, note_id))
+    if c.rowcount == 0:
+        conn.rollback()
+        conn.close()
+        return False
+    c.execute(_BAYES_SQL + ' WHERE id = ?', (note_id,))
+    c.execute('''INSERT INTO note_ratings (note_id, user_id, rating, rated_at) VALUES (?, ?, ?, ?)
+                 ON CONFLICT(note_id, user_id) DO UPDATE SET rating = excluded.rating, rated_at = excluded.rated_at''',
+              (note_id, user_id, rating, datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+    conn.commit()
+    conn.close()
+    return True
+
+def get_rating_summary(note_id: int, user_id: Optional[int] = None) -> Dict:
+    """Get a note's average, count and Bayesian rating, plus the user's own rating (or None)."""
+    conn = _get_conn()
+    c = conn.cursor()
+    c.execute('SELECT rating, rating_count, bayes_rating FROM notes WHERE id = ?', (note_id,))
+    row = c.fetchone() or (0, 0, RATING_PRIOR_MEAN)
+    c.execute('SELECT rating FROM note_ratings WHERE note_id = ? AND user_id = ?', (note_id, user_id))
+    mine = c.fetchone()
+    conn.close()
+    return {'average': row[0], 'count': row[1], 'bayes_rating': row[2], 'mine': mine[0] if mine else None}
+
+def get_best_rated_notes(subject: str, limit: int = 5) -> List[Dict]:
+    """Get a subject's notes by Bayesian rating (a range scan of idx_notes_subject_bayes)."""
+    conn = _get_conn()
+    c = conn.cursor()
+    c.execute(f'''SELECT {", ".join(NOTE_KEYS)}, rating_count, bayes_rating FROM notes
+                  WHERE lower(trim(subject)) = lower(trim(?)) AND rating_count > 0
+                  ORDER BY bayes_rating DESC LIMIT ?''', (subject, limit))
+    rows = c.fetchall()
+    conn.close()
+    return [dict(zip(NOTE_KEYS + ['rating_count', 'bayes_rating'], row)) for row in rows]
+
+def recompute_ratings():
+    """Repair job: rebuild every note's rating totals from note_ratings."""
+    conn = _get_conn()
+    c = conn.cursor()
+    c.execute('''UPDATE notes SET
+        rating_sum = COALESCE((SELECT SUM(rating) FROM note_ratings WHERE note_id = notes.id), 0),
+        rating_count = (SELECT COUNT(*) FROM note_ratings WHERE note_id = notes.id)''')
+    c.execute(_BAYES_SQL)
     conn.commit()
     conn.close()
 
@@ -100,8 +705,21 @@ def delete_note(note_id: int) -> bool:
     """Delete a note from the database. Returns True if deleted, False if not found."""
     conn = _get_conn()
     c = conn.cursor()
+    c.execute('SELECT uploader_id, subject, downloads FROM notes WHERE id = ?', (note_id,))
+    row = c.fetchone()
     c.execute('DELETE FROM notes WHERE id = ?', (note_id,))
     deleted = c.rowcount > 0
+    if row and row[0]:
+        _remove_contribution(c, row[0], row[1], row[2] or 0)
+    # Co-occurrence is symmetric, so the note's own row set names every reverse row
+    c.execute('SELECT note_b FROM note_cooccurrence WHERE note_a = ?', (note_id,))
+    c.executemany('DELETE FROM note_cooccurrence WHERE note_a = ? AND note_b = ?',
+                  [(other, note_id) for (other,) in c.fetchall()])
+    c.execute('DELETE FROM note_cooccurrence WHERE note_a = ?', (note_id,))
+    c.execute('DELETE FROM note_neighbours WHERE note_id = ?', (note_id,))
+    c.execute('DELETE FROM note_terms WHERE note_id = ?', (note_id,))
+    c.execute('DELETE FROM note_files WHERE note_id = ?', (note_id,))
+    c.execute('DELETE FROM note_ratings WHERE note_id = ?', (note_id,))
     conn.commit()
     conn.close()
     return deleted
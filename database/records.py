@@ -0,0 +1,62 @@
+"""
+Row Records - Compact read-only rows for bulk reads
+
+A record wraps the tuple sqlite3 already returns and looks values up by
+column name through a per-class index, so reading a row costs one small
+object instead of a dict plus its hash table. Records are mappings
+(record['subject'], .get(), .keys(), 'x' in record), so code written for the
+dict rows works unchanged as long as it does not modify them; use
+to_dict() for a mutable copy.
+"""
+
+from collections.abc import Mapping
+from typing import Any, Dict, Tuple
+
+class Record(Mapping):
+    """Read-only mapping view over one database row"""
+    __slots__ = ('_row',)
+    KEYS: Tuple[str, ...] = ()
+    _INDEX: Dict[str, int] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._INDEX = {key: i for i, key in enumerate(cls.KEYS)}
+
+    def __init__(self, row: tuple):
+        self._row = row
+
+    @classmethod
+    def row_factory(cls, cursor, row: tuple) -> 'Record':
+        """For use as sqlite3 Connection.row_factory"""
+        return cls(row)
+
+    def __getitem__(self, key: str) -> Any:
+        return self._row[self._INDEX[key]]
+
+    def __getattr__(self, key: str) -> Any:
+        if key == '_row':
+            raise AttributeError(key)
+        try:
+            return self._row[self._INDEX[key]]
+        except KeyError:
+            raise AttributeError(key) from None
+
+    def __iter__(self):
+        return iter(self.KEYS)
+
+    def __len__(self) -> int:
+        return len(self.KEYS)
+
+    def __contains__(self, key) -> bool:
+        return key in self._INDEX
+
+    def get(self, key: str, default: Any = None) -> Any:
+        index = self._INDEX.get(key)
+        return default if index is None else self._row[index]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Mutable dict copy, as returned by the non-record read functions"""
+        return dict(zip(self.KEYS, self._row))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
@@ -3,18 +3,39 @@
 User Database - SQLite persistent user management with signup/login
 """
 
+import logging
+import secrets
 import sqlite3
-from typing import Dict, Optional
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
 import os
-import hashlib
+from utils import passwords
+
+logger = logging.getLogger(__name__)
 
 DB_PATH = os.path.join(os.path.dirname(__file__), 'users.db')
 
+# Schema setup runs once per process, on first connection rather than at import
+_schema_ready = False
+_schema_lock = threading.Lock()
+
 def _get_conn():
+    if not _schema_ready:
+        _init_db()
     return sqlite3.connect(DB_PATH)
 
 def _init_db():
-    conn = _get_conn()
+    """Create tables if needed. Memoized so repeated calls are free."""
+    global _schema_ready
+    with _schema_lock:
+        if _schema_ready:
+            return
+        _create_schema()
+        _schema_ready = True
+
+def _create_schema():
+    conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
     
     # Check if users table exists and has correct schema
@@ -39,21 +60,63 @@ def _init_db():
         notes_downloaded INTEGER DEFAULT 0,
         FOREIGN KEY(user_id) REFERENCES users(id)
     )''')
+    # Login sessions behind the signed tokens in the app's URL; deleting a row revokes it
+    c.execute('''CREATE TABLE IF NOT EXISTS sessions (
+        id TEXT PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        created_at REAL NOT NULL,
+        expires_at REAL NOT NULL,
+        FOREIGN KEY(user_id) REFERENCES users(id)
+    )''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_sessions_user ON sessions(user_id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_sessions_expiry ON sessions(expires_at)')
+    # Append-only activity log, rolled up per hour and per day (user_id 0 = anonymous)
+    c.execute('''CREATE TABLE IF NOT EXISTS activity_events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        event_type TEXT NOT NULL,
+        occurred_at REAL NOT NULL
+    )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS activity_hourly (
+        hour INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        event_type TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (hour, user_id, event_type)
+    )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS activity_daily (
+        day TEXT NOT NULL,
+        user_id INTEGER NOT NULL,
+        event_type TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (day, user_id, event_type)
+    )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS activity_meta (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS auth_settings (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    )''')
     conn.commit()
     conn.close()
 
-_init_db()
-
 def hash_password(password: str) -> str:
-    return hashlib.sha256(password.encode('utf-8')).hexdigest()
+    """Salted scrypt (or PBKDF2) hash, computed on the password worker pool"""
+    return passwords.hash_password(password)
 
 def signup_user(name: str, roll_no: str, email: str, password: str) -> bool:
-    """Register a new user. Returns True if successful, False if user/email/roll exists."""
+    """Register a new user. Returns True if successful, False if user/email/roll exists.
+
+    Raises passwords.HashingBusy when too many hashes are already queued.
+    """
+    password_hash = hash_password(password)
     conn = _get_conn()
     c = conn.cursor()
     try:
         c.execute('''INSERT INTO users (name, roll_no, email, password_hash) VALUES (?, ?, ?, ?)''',
-                  (name, roll_no, email, hash_password(password)))
+                  (name, roll_no, email, password_hash))
         user_id = c.lastrowid
         c.execute('''INSERT INTO user_activity (user_id) VALUES (?)''', (user_id,))
         conn.commit()
@@ -64,16 +127,30 @@ def signup_user(name: str, roll_no: str, email: str, password: str) -> bool:
         conn.close()
 
 def login_user(email_or_roll: str, password: str) -> Optional[Dict]:
-    """Authenticate user by email or roll_no and password. Returns user dict if valid, else None."""
+    """Authenticate user by email or roll_no and password. Returns user dict if valid, else None.
+
+    Legacy or weaker hashes are replaced with one at the current cost after a
+    successful login (skipped, until a later login, when the pool is busy).
+    Raises passwords.HashingBusy when too many hashes are already queued.
+    """
     conn = _get_conn()
     c = conn.cursor()
     c.execute('''SELECT id, name, roll_no, email, password_hash FROM users WHERE email = ? OR roll_no = ?''',
               (email_or_roll, email_or_roll))
     row = c.fetchone()
     conn.close()
-    if row and row[4] == hash_password(password):
-        return {'id': row[0], 'name': row[1], 'roll_no': row[2], 'email': row[3]}
-    return None
+    if not row or not passwords.verify_password(password, row[4]):
+        return None
+    if passwords.needs_rehash(row[4]):
+        upgraded = passwords.try_hash_password(password)
+        if upgraded:
+            conn = _get_conn()
+            # Only replace the hash that was verified, in case it changed meanwhile
+            conn.execute('UPDATE users SET password_hash = ? WHERE id = ? AND password_hash = ?',
+                         (upgraded, row[0], row[4]))
+            conn.commit()
+            conn.close()
+    return {'id': row[0], 'name': row[1], 'roll_no': row[2], 'email': row[3]}
 
 def get_user_by_id(user_id: int) -> Optional[Dict]:
     conn = _get_conn()
@@ -95,31 +172,100 @@ def get_user_by_email(email: str) -> Optional[Dict]:
         return {'id': row[0], 'name': row[1], 'roll_no': row[2], 'email': row[3]}
     return None
 
-def update_user_activity(user_id: int, activity_type: str):
-    """Update user activity count in DB for a specific user_id
-    
-    Note: Only tracks notes_downloaded cumulatively. 
-    items_reported and notes_uploaded are counted from actual database records.
-    """
-    if not user_id or not isinstance(user_id, (int, float)):
-        return  # Skip if invalid user_id
-    
-    user_id = int(user_id)  # Ensure it's an integer
-    
+def add_activity_events(events: List[Tuple[Optional[int], str, float]]):
+    """Append (user_id, event_type, occurred_at) events in one transaction"""
     conn = _get_conn()
-    c = conn.cursor()
-    
-    # Ensure user_activity record exists for this user
-    c.execute('INSERT OR IGNORE INTO user_activity (user_id) VALUES (?)', (user_id,))
-    
-    # Only track download activity (items_reported and notes_uploaded are counted from DB)
-    if activity_type == 'note_downloaded':
-        c.execute('UPDATE user_activity SET notes_downloaded = notes_downloaded + 1 WHERE user_id = ?', (user_id,))
-    # item_reported and note_uploaded are now counted from actual database records, so we skip incrementing
-    
+    conn.executemany('INSERT INTO activity_events (user_id, event_type, occurred_at) VALUES (?, ?, ?)', events)
     conn.commit()
     conn.close()
 
+def rollup_activity() -> int:
+    """Fold events after the watermark into the hourly and daily rollups
+
+    Returns the number of events rolled up. Safe to run from several
+    processes: the watermark is read and advanced in one write transaction,
+    which is only opened when there are new events.
+    """
+    conn = _get_conn()
+    conn.isolation_level = None
+    try:
+        row = conn.execute("SELECT value FROM activity_meta WHERE key = 'rollup_watermark'").fetchone()
+        if (conn.execute('SELECT MAX(id) FROM activity_events').fetchone()[0] or 0) <= (int(row[0]) if row else 0):
+            return 0
+        conn.execute('BEGIN IMMEDIATE')
+        row = conn.execute("SELECT value FROM activity_meta WHERE key = 'rollup_watermark'").fetchone()
+        watermark = int(row[0]) if row else 0
+        high = conn.execute('SELECT MAX(id) FROM activity_events').fetchone()[0] or 0
+        if high > watermark:
+            conn.execute('''INSERT INTO activity_hourly (hour, user_id, event_type, count)
+                            SELECT CAST(occurred_at / 3600 AS INTEGER) * 3600, COALESCE(user_id, 0), event_type, COUNT(*)
+                            FROM activity_events WHERE id > ? AND id <= ? GROUP BY 1, 2, 3
+                            ON CONFLICT (hour, user_id, event_type) DO UPDATE SET count = count + excluded.count''',
+                         (watermark, high))
+            conn.execute('''INSERT INTO activity_daily (day, user_id, event_type, count)
+                            SELECT date(occurred_at, 'unixepoch', 'localtime'), COALESCE(user_id, 0), event_type, COUNT(*)
+                            FROM activity_events WHERE id > ? AND id <= ? GROUP BY 1, 2, 3
+                            ON CONFLICT (day, user_id, event_type) DO UPDATE SET count = count + excluded.count''',
+                         (watermark, high))
+            conn.execute("INSERT OR REPLACE INTO activity_meta (key, value) VALUES ('rollup_watermark', ?)", (str(high),))
+        conn.execute('COMMIT')
+        return high - watermark
+    except sqlite3.Error:
+        if conn.in_transaction:
+            conn.execute('ROLLBACK')
+        logger.exception("Error rolling up activity")
+        return 0
+    finally:
+        conn.close()
+
+def backfill_activity(events: List[Tuple[Optional[int], str, float]]) -> bool:
+    """Append historical events once; returns False if a backfill already ran"""
+    conn = _get_conn()
+    conn.isolation_level = None
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        if conn.execute("SELECT 1 FROM activity_meta WHERE key = 'backfilled'").fetchone():
+            conn.execute('ROLLBACK')
+            return False
+        conn.executemany('INSERT INTO activity_events (user_id, event_type, occurred_at) VALUES (?, ?, ?)', events)
+        conn.execute("INSERT INTO activity_meta (key, value) VALUES ('backfilled', ?)", (str(time.time()),))
+        conn.execute('COMMIT')
+        return True
+    finally:
+        conn.close()
+
+def activity_backfilled() -> bool:
+    conn = _get_conn()
+    row = conn.execute("SELECT 1 FROM activity_meta WHERE key = 'backfilled'").fetchone()
+    conn.close()
+    return row is not None
+
+def get_activity_totals() -> Dict[int, Dict[str, int]]:
+    """All-time event counts per user id and event type, from the daily rollup"""
+    conn = _get_conn()
+    rows = conn.execute('SELECT user_id, event_type, SUM(count) FROM activity_daily GROUP BY user_id, event_type').fetchall()
+    conn.close()
+    totals: Dict[int, Dict[str, int]] = {}
+    for user_id, event_type, count in rows:
+        totals.setdefault(user_id, {})[event_type] = count
+    return totals
+
+def get_daily_activity_counts(event_type: str) -> Dict[str, int]:
+    """Events of one type per day, in date order"""
+    conn = _get_conn()
+    rows = conn.execute('SELECT day, SUM(count) FROM activity_daily WHERE event_type = ? GROUP BY day ORDER BY day',
+                        (event_type,)).fetchall()
+    conn.close()
+    return {day: count for day, count in rows}
+
+def get_hourly_activity_counts(since: float) -> Dict[int, int]:
+    """All events per hour (epoch seconds of the hour start) since a time"""
+    conn = _get_conn()
+    rows = conn.execute('SELECT hour, SUM(count) FROM activity_hourly WHERE hour >= ? GROUP BY hour ORDER BY hour',
+                        (int(since // 3600) * 3600,)).fetchall()
+    conn.close()
+    return {hour: count for hour, count in rows}
+
 def get_all_users() -> Dict:
     """Get all users and their activity from DB"""
     conn = _get_conn()
@@ -139,3 +285,47 @@ def get_all_users() -> Dict:
             'notes_downloaded': row[6] or 0
         }
     return result
+
+def get_session_secret() -> str:
+    """Key for signing session tokens, generated on first use and kept in the DB"""
+    conn = _get_conn()
+    conn.execute('INSERT OR IGNORE INTO auth_settings (key, value) VALUES (?, ?)',
+                 ('session_secret', secrets.token_hex(32)))
+    conn.commit()
+    secret = conn.execute("SELECT value FROM auth_settings WHERE key = 'session_secret'").fetchone()[0]
+    conn.close()
+    return secret
+
+def add_session(session_id: str, user_id: int, expires_at: float):
+    """Store a new login session, clearing out expired ones"""
+    conn = _get_conn()
+    conn.execute('DELETE FROM sessions WHERE expires_at <= ?', (time.time(),))
+    conn.execute('INSERT INTO sessions (id, user_id, created_at, expires_at) VALUES (?, ?, ?, ?)',
+                 (session_id, int(user_id), time.time(), expires_at))
+    conn.commit()
+    conn.close()
+
+def get_session_user(session_id: str, user_id: int) -> Optional[Dict]:
+    """The user of an unexpired, unrevoked session (primary-key lookups only)"""
+    conn = _get_conn()
+    row = conn.execute('''SELECT u.id, u.name, u.roll_no, u.email FROM sessions s JOIN users u ON u.id = s.user_id
+                          WHERE s.id = ? AND s.user_id = ? AND s.expires_at > ?''',
+                       (session_id, int(user_id), time.time())).fetchone()
+    conn.close()
+    if row:
+        return {'id': row[0], 'name': row[1], 'roll_no': row[2], 'email': row[3]}
+    return None
+
+def delete_session(session_id: str):
+    """Revoke one session"""
+    conn = _get_conn()
+    conn.execute('DELETE FROM sessions WHERE id = ?', (session_id,))
+    conn.commit()
+    conn.close()
+
+def delete_user_sessions(user_id: int):
+    """Revoke every session of a user"""
+    conn = _get_conn()
+    conn.execute('DELETE FROM sessions WHERE user_id = ?', (int(user_id),))
+    conn.commit()
+    conn.close()
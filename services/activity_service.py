@@ -0,0 +1,145 @@
+"""
+Activity Service - Batched user-activity event log with incremental rollups
+
+record_activity() only appends to an in-memory queue. A background thread
+writes the queue to activity_events in one transaction every FLUSH_INTERVAL
+seconds (sooner once BATCH_SIZE events are waiting) and then folds the new
+events into the hourly and daily rollups. Events still queued when the
+process dies are lost, at most a few seconds' worth. Reads are plain
+SELECTs on the rollups and may lag behind by up to FLUSH_INTERVAL.
+
+Items and notes that existed before the log was introduced are backfilled
+once as events, so per-user and per-day stats cover the full history.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from database import lost_found_db, notes_db, users_db
+
+logger = logging.getLogger(__name__)
+
+# Seconds between flushes, and the queue length that triggers an early one
+FLUSH_INTERVAL = 5
+BATCH_SIZE = 100
+
+EVENT_TYPES = ('item_reported', 'note_uploaded', 'note_downloaded', 'claim_item')
+
+_queue: List[Tuple[Optional[int], str, float]] = []
+_queue_lock = threading.Lock()
+_flush_lock = threading.Lock()
+_flusher_lock = threading.Lock()
+_wakeup = threading.Event()
+_flusher_started = False
+_backfill_checked = False
+
+def record_activity(user_id: Optional[int], activity_type: str):
+    """Queue an activity event (user_id None for anonymous actions such as API reports)"""
+    if activity_type not in EVENT_TYPES:
+        logger.warning("Unknown activity type: %s", activity_type)
+        return
+    with _queue_lock:
+        _queue.append((int(user_id) if user_id else None, activity_type, time.time()))
+        full = len(_queue) >= BATCH_SIZE
+    _start_flusher()
+    if full:
+        _wakeup.set()
+
+def flush():
+    """Write queued events and update the rollups now"""
+    with _flush_lock:
+        _backfill()
+        with _queue_lock:
+            batch = _queue[:]
+            del _queue[:]
+        if batch:
+            try:
+                users_db.add_activity_events(batch)
+            except Exception:
+                logger.exception("Error writing %d activity event(s); will retry", len(batch))
+                with _queue_lock:
+                    _queue[:0] = batch
+                return
+        users_db.rollup_activity()
+
+def _start_flusher():
+    global _flusher_started
+    if _flusher_started:
+        return
+    with _flusher_lock:
+        if _flusher_started:
+            return
+
+        def loop():
+            while True:
+                _wakeup.wait(FLUSH_INTERVAL)
+                _wakeup.clear()
+                try:
+                    flush()
+                except Exception:
+                    logger.exception("Activity flush failed")
+
+        threading.Thread(target=loop, name='activity-flusher', daemon=True).start()
+        atexit.register(flush)
+        _flusher_started = True
+
+def _day_start(day: str) -> float:
+    try:
+        return datetime.strptime(day[:10], '%Y-%m-%d').timestamp()
+    except (TypeError, ValueError):
+        return time.time()
+
+def _backfill():
+    """Turn pre-existing items and notes into events, once per database
+
+    Runs before this process writes any events. Items and notes are
+    attributed to the user with the reporter's or uploader's name when exactly
+    one user has that name; other rows count as anonymous activity. Legacy
+    download counters have no dates and stay in user_activity as a baseline.
+    """
+    global _backfill_checked
+    if _backfill_checked:
+        return
+    if not users_db.activity_backfilled():
+        names: Dict[str, List[int]] = {}
+        for user_id, user in users_db.get_all_users().items():
+            names.setdefault(user['name'], []).append(user_id)
+        unique = {name: ids[0] for name, ids in names.items() if len(ids) == 1}
+        events = [(unique.get(item['reporter_name']), 'item_reported', _day_start(item['date']))
+                  for item in lost_found_db.iter_items()]
+        items_read = time.time()
+        events += [(unique.get(note['uploaded_by']), 'note_uploaded', _day_start(note['upload_date']))
+                   for note in notes_db.iter_notes()]
+        notes_read = time.time()
+        if users_db.backfill_activity(events):
+            # A row is committed before its event is queued, and no write commits
+            # while a table is being read, so every report or upload queued before
+            # that table's read finished is already among the backfilled rows.
+            read_end = {'item_reported': items_read, 'note_uploaded': notes_read}
+            with _queue_lock:
+                _queue[:] = [event for event in _queue
+                             if event[2] >= read_end.get(event[1], 0)]
+    _backfill_checked = True
+
+def _ensure_backfilled():
+    """Run the one-time backfill before the first read, so history is never missing"""
+    if not _backfill_checked:
+        flush()
+
+def get_activity_totals() -> Dict[int, Dict[str, int]]:
+    """All-time event counts per user id (0 = anonymous) and event type"""
+    _ensure_backfilled()
+    return users_db.get_activity_totals()
+
+def get_daily_counts(activity_type: str) -> Dict[str, int]:
+    """Events of one type per day ('YYYY-MM-DD'), in date order"""
+    _ensure_backfilled()
+    return users_db.get_daily_activity_counts(activity_type)
+
+def get_hourly_counts(hours: int = 24) -> Dict[int, int]:
+    """All events per hour over the last `hours` hours, keyed by the hour's epoch seconds"""
+    _ensure_backfilled()
+    return users_db.get_hourly_activity_counts(time.time() - hours * 3600)
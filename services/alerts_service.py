@@ -0,0 +1,81 @@
+"""
+Alerts Service - Standing searches that notify owners when a matching found item arrives
+"""
+
+from typing import Dict, List, Set
+from database import alerts_db
+from utils.helpers import tokenize
+
+def item_terms(item: Dict) -> Set[str]:
+    """Index terms describing a lost or found item"""
+    terms = {f"cat:{item['category'].lower()}", f"loc:{item['location'].lower()}"}
+    text = ' '.join([item.get('item_name', ''), item['category'], item['location'], item.get('description', '')])
+    terms.update(f"kw:{word}" for word in tokenize(text))
+    return terms
+
+def subscribe_search(user_id: int, query: str) -> int:
+    """
+    Save a search so the user is notified of new found items matching it.
+    Every word of the query must appear in the item. Returns subscription id,
+    or 0 if the query has no searchable words.
+    """
+    words = tokenize(query)
+    if not words:
+        return 0
+    return alerts_db.add_subscription(
+        {'user_id': user_id, 'source': 'search', 'query': query.strip()},
+        required_terms=[f"kw:{word}" for word in words]
+    )
+
+def subscribe_lost_report(user_id: int, item: Dict) -> int:
+    """
+    Register an open lost report as a standing search. Found items must share
+    the category; location and description words only raise the match score.
+    """
+    required = {f"cat:{item['category'].lower()}"}
+    return alerts_db.add_subscription(
+        {'user_id': user_id, 'source': 'lost_report', 'lost_item_id': item['id'],
+         'query': f"{item['category']} near {item['location']}"},
+        required_terms=required,
+        optional_terms=item_terms(item) - required
+    )
+
+def percolate_found_item(item: Dict, finder_id: int = None) -> int:
+    """
+    Match a newly added found item against standing searches and notify the owners.
+    Returns the number of new inbox entries written.
+    """
+    matches = alerts_db.find_matching_subscriptions(item_terms(item))
+    entries = [
+        {'user_id': sub['user_id'], 'subscription_id': sub['id'], 'item_id': item['id'], 'score': sub['score']}
+        for sub in matches if sub['user_id'] != finder_id
+    ]
+    return alerts_db.add_inbox_entries(entries)
+
+def close_lost_report(item_id: int):
+    """Stop alerting for a lost report once it is resolved"""
+    alerts_db.deactivate_subscriptions_for_item(item_id)
+
+def close_lost_reports_for_claim(claimer_id: int, found_item: Dict) -> int:
+    """Stop alerting a claimer's lost reports in the category of the found item they recovered"""
+    return alerts_db.deactivate_lost_report_subscriptions(claimer_id, f"cat:{found_item['category'].lower()}")
+
+def cancel_subscription(user_id: int, subscription_id: int) -> bool:
+    """Cancel one of the user's standing searches"""
+    return alerts_db.deactivate_subscription(subscription_id, user_id)
+
+def get_user_subscriptions(user_id: int) -> List[Dict]:
+    """Get the user's active standing searches"""
+    return alerts_db.get_user_subscriptions(user_id)
+
+def get_inbox(user_id: int, unread_only: bool = False) -> List[Dict]:
+    """Get the user's match notifications"""
+    return alerts_db.get_inbox(user_id, unread_only)
+
+def count_unread_alerts(user_id: int) -> int:
+    """Count the user's unread match notifications"""
+    return alerts_db.count_unread(user_id)
+
+def mark_alerts_read(user_id: int):
+    """Mark all of the user's notifications as read"""
+    alerts_db.mark_inbox_read(user_id)
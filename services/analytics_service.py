@@ -1,138 +1,130 @@
 """
 Analytics Service - Statistics and charts logic
+
+Aggregations run over columnar snapshots of the tables (see
+snapshot_service), which are refreshed incrementally rather than rebuilt
+from a list of dicts on every call. NumPy is only imported on first use.
 """
 
 
 from typing import Dict, List
-from database.lost_found_db import get_all_items
-from database.notes_db import get_all_notes
+from database.notes_db import get_notes_by_ids
+from utils.page_loader import PageData, load
+
+def _items():
+    from services.snapshot_service import items_snapshot
+    return items_snapshot()
+
+def _notes():
+    from services.snapshot_service import notes_snapshot
+    return notes_snapshot()
 
 def get_lost_found_stats() -> Dict:
     """Get statistics for lost & found items from SQLite DB"""
-    items = get_all_items()
+    items = _items()
     total_items = len(items)
-    lost_count = len([item for item in items if item['type'] == 'lost'])
-    found_count = len([item for item in items if item['type'] == 'found'])
-    open_count = len([item for item in items if item['status'] == 'open'])
-    claimed_count = len([item for item in items if item['status'] == 'claimed'])
+    by_type = items.count_by('type')
+    by_status = items.count_by('status')
+    claimed_count = by_status.get('claimed', 0)
     return {
         'total_items': total_items,
-        'lost_count': lost_count,
-        'found_count': found_count,
-        'open_count': open_count,
+        'lost_count': by_type.get('lost', 0),
+        'found_count': by_type.get('found', 0),
+        'open_count': by_status.get('open', 0),
         'claimed_count': claimed_count,
         'match_rate': round((claimed_count / total_items * 100) if total_items > 0 else 0, 2)
     }
 
 def get_notes_stats() -> Dict:
     """Get statistics for notes exchange from SQLite DB"""
-    all_notes = get_all_notes()
-    total_notes = len(all_notes)
-    total_downloads = sum(note['downloads'] for note in all_notes)
-    subjects = set(note['subject'] for note in all_notes)
-    total_subjects = len(subjects)
+    notes = _notes()
+    total_notes = len(notes)
+    total_downloads = int(notes.numeric['downloads'].sum())
     avg_downloads = round(total_downloads / total_notes, 2) if total_notes > 0 else 0
     return {
         'total_notes': total_notes,
-        'total_subjects': total_subjects,
+        'total_subjects': notes.distinct_count('subject'),
         'total_downloads': total_downloads,
         'avg_downloads': avg_downloads,
-        'contributors': len(set(note['uploaded_by'] for note in all_notes))
+        'contributors': notes.distinct_count('uploaded_by')
     }
 
 def get_category_distribution() -> Dict[str, int]:
     """Get distribution of items by category from SQLite DB"""
-    items = get_all_items()
-    categories = {}
-    for item in items:
-        category = item['category']
-        categories[category] = categories.get(category, 0) + 1
-    sorted_categories = dict(sorted(categories.items(), key=lambda x: x[1], reverse=True))
-    return sorted_categories
+    return _items().count_by('category')
 
 def get_location_distribution() -> Dict[str, int]:
     """Get distribution of items by location from SQLite DB"""
-    items = get_all_items()
-    locations = {}
-    for item in items:
-        location = item['location']
-        locations[location] = locations.get(location, 0) + 1
-    return dict(sorted(locations.items(), key=lambda x: x[1], reverse=True))
-    
-    # Sort by count
-    sorted_locations = dict(sorted(locations.items(), key=lambda x: x[1], reverse=True))
-    return sorted_locations
+    return _items().count_by('location')
 
 def get_top_downloaded_notes(limit: int = 10) -> List[Dict]:
-    """Get top downloaded notes from SQLite DB"""
-    all_notes = get_all_notes()
-    sorted_notes = sorted(all_notes, key=lambda x: x['downloads'], reverse=True)
-    return sorted_notes[:limit]
+    """Get top downloaded notes from SQLite DB, ranked by the snapshot"""
+    return get_notes_by_ids(_notes().top_ids('downloads', limit))
 
 def get_subject_wise_stats() -> Dict[str, Dict]:
     """Get statistics for each subject from SQLite DB"""
-    all_notes = get_all_notes()
-    subject_stats = {}
-    for note in all_notes:
-        subject = note['subject']
-        if subject not in subject_stats:
-            subject_stats[subject] = {'total_notes': 0, 'total_downloads': 0}
-        subject_stats[subject]['total_notes'] += 1
-        subject_stats[subject]['total_downloads'] += note['downloads']
-    for subject in subject_stats:
-        total_notes = subject_stats[subject]['total_notes']
-        total_downloads = subject_stats[subject]['total_downloads']
-        subject_stats[subject]['avg_downloads'] = round(total_downloads / total_notes, 2) if total_notes > 0 else 0
-    return subject_stats
+    counts, downloads = _notes().sum_by('subject', 'downloads')
+    return {
+        subject: {
+            'total_notes': total_notes,
+            'total_downloads': int(downloads[subject]),
+            'avg_downloads': round(downloads[subject] / total_notes, 2)
+        }
+        for subject, total_notes in counts.items()
+    }
 
 def get_user_activity_stats() -> List[Dict]:
-    """Get user activity statistics from SQLite DB with actual note counts"""
+    """Get per-user activity from the activity rollups
+
+    Downloads counted before the activity log existed are added from the
+    legacy user_activity counters.
+    """
     from database.users_db import get_all_users
-    from database.notes_db import get_notes_count_by_user
-    from database.lost_found_db import get_all_items
+    from services.activity_service import get_activity_totals
     
-    users = get_all_users()
-    all_items = get_all_items()
+    totals = get_activity_totals()
     activity_list = []
     
-    for user_id, user_data in users.items():
-        # Count actual notes uploaded by this user (by name)
-        actual_notes_count = get_notes_count_by_user(user_data['name'])
-        
-        # Count actual items reported by this user
-        actual_items_count = len([item for item in all_items if item['reporter_name'] == user_data['name']])
-        
+    for user_id, user_data in get_all_users().items():
+        counts = totals.get(user_id, {})
+        items_reported = counts.get('item_reported', 0)
+        notes_uploaded = counts.get('note_uploaded', 0)
+        notes_downloaded = user_data['notes_downloaded'] + counts.get('note_downloaded', 0)
         activity_list.append({
             'name': user_data['name'],
             'roll_no': user_data['roll_no'],
-            'items_reported': actual_items_count,
-            'notes_uploaded': actual_notes_count,
-            'notes_downloaded': user_data['notes_downloaded'],
-            'total_activity': (
-                actual_items_count +
-                actual_notes_count +
-                user_data['notes_downloaded']
-            )
+            'items_reported': items_reported,
+            'notes_uploaded': notes_uploaded,
+            'notes_downloaded': notes_downloaded,
+            'total_activity': items_reported + notes_uploaded + notes_downloaded
         })
     activity_list.sort(key=lambda x: x['total_activity'], reverse=True)
     return activity_list
 
 def get_daily_activity() -> Dict[str, int]:
-    """Get item reports by date from SQLite DB"""
-    from database.lost_found_db import get_all_items
-    items = get_all_items()
-    daily_counts = {}
-    for item in items:
-        date = item['date']
-        daily_counts[date] = daily_counts.get(date, 0) + 1
-    sorted_daily = dict(sorted(daily_counts.items()))
-    return sorted_daily
+    """Get item reports per day from the daily activity rollup"""
+    from services.activity_service import get_daily_counts
+    return get_daily_counts('item_reported')
 
 def get_semester_wise_notes() -> Dict[str, int]:
     """Get notes distribution by semester from SQLite DB"""
-    all_notes = get_all_notes()
-    semester_counts = {}
-    for note in all_notes:
-        semester = note['semester']
-        semester_counts[semester] = semester_counts.get(semester, 0) + 1
-    return semester_counts
+    return _notes().count_by('semester')
+
+def get_dashboard_stats() -> PageData:
+    """
+    Every dashboard aggregate, fetched concurrently
+
+    Item and note aggregates refresh different snapshots, so the two halves
+    overlap instead of waiting on each other. An aggregate that fails or
+    times out comes back as None in `results` and is named in `errors`.
+    """
+    return load({
+        'lost_found': get_lost_found_stats,
+        'notes': get_notes_stats,
+        'categories': get_category_distribution,
+        'locations': get_location_distribution,
+        'subjects': get_subject_wise_stats,
+        'semesters': get_semester_wise_notes,
+        'daily_activity': get_daily_activity,
+        'top_downloaded': get_top_downloaded_notes,
+    })
@@ -0,0 +1,121 @@
+"""
+Auth Service - Signed session tokens so a browser refresh stays logged in
+
+A token is '<user id>.<session id>.<expiry>.<signature>', signed with a
+secret kept in users.db. Forged or expired tokens are rejected by the
+signature and expiry alone; valid ones are resolved from an in-process LRU,
+and only on a miss (or every CACHE_REVALIDATE_SECONDS, so revocations made
+by other processes take effect) by a primary-key lookup of the session and
+its user. No password hashing is involved after the first login.
+
+Download links for note files carry a signature over the note, user and
+expiry made with the same secret, so downloads can only be attributed to the
+user the link was issued to.
+"""
+
+import base64
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from database import users_db
+
+# How long a login lasts
+SESSION_TTL_SECONDS = 7 * 24 * 60 * 60
+
+# How long a signed download link attributes downloads to its user
+DOWNLOAD_LINK_TTL_SECONDS = 24 * 60 * 60
+
+# Resolved sessions kept in memory, and how long before one is re-checked in the DB
+SESSION_CACHE_SIZE = 1024
+CACHE_REVALIDATE_SECONDS = 60
+
+_secret: Optional[bytes] = None
+# token -> (user, expires_at, checked_at)
+_cache: 'OrderedDict[str, Tuple[Dict, float, float]]' = OrderedDict()
+_lock = threading.Lock()
+
+def _sign(payload: str) -> str:
+    global _secret
+    if _secret is None:
+        _secret = users_db.get_session_secret().encode('ascii')
+    digest = hmac.new(_secret, payload.encode('ascii'), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b'=').decode('ascii')
+
+def _parse(token: str) -> Optional[Tuple[int, str, float]]:
+    """(user id, session id, expiry) of a well-signed, unexpired token"""
+    parts = token.split('.') if token else []
+    if len(parts) != 4 or not parts[0].isdigit() or not parts[2].isdigit():
+        return None
+    payload = '.'.join(parts[:3])
+    if not hmac.compare_digest(_sign(payload), parts[3]) or int(parts[2]) <= time.time():
+        return None
+    return int(parts[0]), parts[1], float(parts[2])
+
+def create_session(user: Dict) -> str:
+    """Start a session for a logged-in user and return its token"""
+    session_id = secrets.token_urlsafe(16)
+    expires_at = int(time.time() + SESSION_TTL_SECONDS)
+    users_db.add_session(session_id, user['id'], expires_at)
+    payload = f"{user['id']}.{session_id}.{expires_at}"
+    token = f"{payload}.{_sign(payload)}"
+    with _lock:
+        _cache[token] = (dict(user), expires_at, time.time())
+        while len(_cache) > SESSION_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return token
+
+def resolve_session(token: str) -> Optional[Dict]:
+    """The user behind a session token, or None if it is invalid, expired or revoked"""
+    now = time.time()
+    with _lock:
+        cached = _cache.get(token)
+        if cached and cached[1] > now and now - cached[2] < CACHE_REVALIDATE_SECONDS:
+            _cache.move_to_end(token)
+            return dict(cached[0])
+    parsed = _parse(token)
+    if not parsed:
+        return None
+    user_id, session_id, expires_at = parsed
+    user = users_db.get_session_user(session_id, user_id)
+    with _lock:
+        if user:
+            _cache[token] = (user, expires_at, now)
+            _cache.move_to_end(token)
+            while len(_cache) > SESSION_CACHE_SIZE:
+                _cache.popitem(last=False)
+        else:
+            _cache.pop(token, None)
+    return dict(user) if user else None
+
+def revoke_session(token: str):
+    """Log a token out everywhere"""
+    with _lock:
+        _cache.pop(token, None)
+    parsed = _parse(token)
+    if parsed:
+        users_db.delete_session(parsed[1])
+
+def revoke_user_sessions(user_id: int):
+    """Log a user out of every session"""
+    with _lock:
+        for token in [token for token, entry in _cache.items() if entry[0]['id'] == user_id]:
+            del _cache[token]
+    users_db.delete_user_sessions(user_id)
+
+def sign_download(note_id: int, user_id: int) -> Tuple[int, str]:
+    """(expiry, signature) for a download link attributed to user_id"""
+    expires_at = int(time.time() + DOWNLOAD_LINK_TTL_SECONDS)
+    return expires_at, _sign(f"download.{int(note_id)}.{int(user_id)}.{expires_at}")
+
+def verify_download(note_id: int, user_id: str, expires_at: str, signature: str) -> Optional[int]:
+    """The user id of a well-signed, unexpired download link, else None"""
+    if not (user_id and user_id.isdigit() and expires_at and expires_at.isdigit() and signature):
+        return None
+    payload = f"download.{int(note_id)}.{int(user_id)}.{int(expires_at)}"
+    if not hmac.compare_digest(_sign(payload), signature) or int(expires_at) <= time.time():
+        return None
+    return int(user_id)
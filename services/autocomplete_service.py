@@ -0,0 +1,59 @@
+"""
+Autocomplete Service - Canonical subjects, topics and locations
+
+Tries are built from the database on first use and updated as notes and
+items are added. Subjects and topics are weighted by note count, locations
+by item count.
+"""
+
+import threading
+from typing import Dict, List
+from database import lost_found_db, notes_db
+from utils.trie import PrefixTrie
+
+FIELDS = ('subject', 'topic', 'location')
+
+_tries: Dict[str, PrefixTrie] = {}
+_lock = threading.Lock()
+
+def _build():
+    tries = {field: PrefixTrie() for field in FIELDS}
+    for note in notes_db.iter_notes():
+        tries['subject'].add(note['subject'])
+        tries['topic'].add(note['topic'])
+    for item in lost_found_db.iter_items():
+        tries['location'].add(item['location'])
+    return tries
+
+def _get_trie(field: str) -> PrefixTrie:
+    if not _tries:
+        with _lock:
+            if not _tries:
+                _tries.update(_build())
+    return _tries[field]
+
+def suggest(field: str, prefix: str, k: int = 10) -> List[str]:
+    """Top-k completions for a 'subject', 'topic' or 'location' prefix"""
+    return _get_trie(field).complete(prefix, k)
+
+def canonical_subject(subject: str) -> str:
+    """Existing spelling of a subject (e.g. 'data  structures' -> 'Data Structures'),
+    or the tidied input if the subject is new"""
+    return _get_trie('subject').canonical(subject) or ' '.join(subject.split())
+
+def get_subjects() -> List[str]:
+    """Canonical subjects, most notes first"""
+    return _get_trie('subject').all_terms()
+
+def learn_note(note: Dict):
+    """Count a new note's subject and topic"""
+    if _tries:
+        with _lock:
+            _tries['subject'].add(note['subject'])
+            _tries['topic'].add(note['topic'])
+
+def learn_item(item: Dict):
+    """Count a new item's location"""
+    if _tries:
+        with _lock:
+            _tries['location'].add(item['location'])
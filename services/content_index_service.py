@@ -0,0 +1,136 @@
+"""
+Content Index Service - Full-text indexing of uploaded note files
+
+Text extraction runs in a process pool so it never blocks the upload or the
+Streamlit script thread. Reindexing is incremental: a file is only re-read
+when its mtime or size changed, and only re-extracted when its hash changed.
+"""
+
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+from collections import Counter
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+from database import notes_db
+from utils.helpers import tokenize
+from utils.text_extract import extract_text
+
+logger = logging.getLogger(__name__)
+
+NOTES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'uploaded_notes')
+
+# Worker processes used for text extraction
+INDEX_WORKERS = 2
+
+_pool = None
+_pool_lock = threading.Lock()
+_backlog_started = False
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Create the extraction pool on first use ('spawn' is safe in threaded servers)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=INDEX_WORKERS,
+                                        mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+def note_file_path(note: Dict) -> str:
+    """Where the uploaded file for a note is stored"""
+    return os.path.join(NOTES_DIR, note['file_name'])
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _extract_terms(path: str, known_hash: Optional[str]) -> Tuple[str, Optional[Dict[str, int]]]:
+    """
+    Worker: hash a file and, if its content changed, extract term counts.
+    Returns (hash, term_counts), with term_counts None when the hash matches.
+    """
+    file_hash = _file_hash(path)
+    if file_hash == known_hash:
+        return file_hash, None
+    return file_hash, dict(Counter(tokenize(extract_text(path))))
+
+def _submit(note_id: int, path: str, known_hash: Optional[str]) -> Future:
+    """Extract in the pool, then store the postings; the returned future resolves once stored"""
+    stat = os.stat(path)
+    stored = Future()
+
+    def store(done: Future):
+        try:
+            file_hash, term_counts = done.result()
+            notes_db.save_note_terms(note_id, file_hash, stat.st_mtime, stat.st_size, term_counts)
+        except Exception as e:
+            logger.exception("Indexing note %s failed", note_id)
+            stored.set_exception(e)
+        else:
+            stored.set_result(note_id)
+
+    _get_pool().submit(_extract_terms, path, known_hash).add_done_callback(store)
+    return stored
+
+def index_note_async(note: Dict) -> Optional[Future]:
+    """Queue a newly uploaded note's file for indexing; returns None if it has no file"""
+    path = note_file_path(note)
+    if not os.path.exists(path):
+        return None
+    return _submit(note['id'], path, None)
+
+def reindex_notes(wait: bool = True) -> Dict[str, int]:
+    """
+    Bring the content index up to date with the files on disk
+
+    Unchanged files (same mtime and size) are skipped without being read.
+    Returns counts of 'queued', 'skipped' and 'removed' notes, and with wait
+    also of 'failed' ones (each failure is logged with its traceback).
+    """
+    states = notes_db.get_note_file_states()
+    stats = {'queued': 0, 'skipped': 0, 'removed': 0}
+    futures = []
+    seen = set()
+    for note in notes_db.iter_notes():
+        path = note_file_path(note)
+        if not os.path.exists(path):
+            continue
+        seen.add(note['id'])
+        stat = os.stat(path)
+        state = states.get(note['id'])
+        if state and state['mtime'] == stat.st_mtime and state['size'] == stat.st_size:
+            stats['skipped'] += 1
+            continue
+        futures.append(_submit(note['id'], path, state['file_hash'] if state else None))
+        stats['queued'] += 1
+    for note_id in set(states) - seen:
+        notes_db.remove_note_terms(note_id)
+        stats['removed'] += 1
+    if wait:
+        stats['failed'] = sum(1 for future in futures if future.exception() is not None)
+        if stats['failed']:
+            logger.error("Content reindex: %d of %d note(s) failed to index", stats['failed'], len(futures))
+    return stats
+
+def start_background_reindex() -> bool:
+    """Catch up on the file backlog in a daemon thread, once per process"""
+    global _backlog_started
+    with _pool_lock:
+        if _backlog_started:
+            return False
+        _backlog_started = True
+    threading.Thread(target=reindex_notes, name='notes-reindex', daemon=True).start()
+    return True
+
+def search_content(query: str) -> Dict[int, float]:
+    """Score notes by how well their file contents match the query"""
+    return notes_db.search_note_terms(tokenize(query))
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    print(reindex_notes())
@@ -0,0 +1,111 @@
+"""
+Duplicate Detection Service - Flags repeated lost/found reports using MinHash + LSH
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from database import lost_found_db
+from services import alerts_service, facets_service
+from utils import minhash
+
+# Estimated Jaccard similarity above which two reports are treated as duplicates
+DUPLICATE_THRESHOLD = 0.5
+
+def _item_text(item: Dict) -> str:
+    return f"{item.get('item_name', '')} {item['location']} {item['description']}"
+
+def _compute_signatures(items: List[Tuple[int, str]]) -> List[Tuple[int, List[int]]]:
+    """Worker: signatures for a chunk of (item_id, text) pairs"""
+    return [(item_id, minhash.signature(text)) for item_id, text in items]
+
+def _is_comparable(a: Dict, b: Dict) -> bool:
+    return (a['id'] != b['id'] and a['type'] == b['type'] and
+            a['category'].lower() == b['category'].lower() and
+            a['status'] == 'open' and b['status'] == 'open')
+
+def index_item(item: Dict, threshold: float = DUPLICATE_THRESHOLD) -> List[Dict]:
+    """
+    Add an item to the duplicate index and return likely duplicates of it
+
+    Only items sharing an LSH bucket are compared, so the cost does not grow
+    with the size of the table. Each returned item has a 'similarity' key.
+    """
+    sig = minhash.signature(_item_text(item))
+    keys = minhash.band_keys(sig)
+    duplicates = []
+    for other_id, other_sig in lost_found_db.find_signature_candidates(keys):
+        score = minhash.similarity(sig, minhash.from_bytes(other_sig))
+        if other_id == item['id'] or score < threshold:
+            continue
+        other = lost_found_db.get_item_by_id(other_id)
+        if other and _is_comparable(item, other):
+            other['similarity'] = round(score, 2)
+            duplicates.append(other)
+    lost_found_db.save_item_signatures([(item['id'], minhash.to_bytes(sig), keys)])
+    duplicates.sort(key=lambda x: x['similarity'], reverse=True)
+    return duplicates
+
+def merge_duplicate(duplicate_id: int, original_id: int) -> bool:
+    """
+    Merge a duplicate report into the original: the duplicate is marked 'merged'
+    and pointed at the original, and leaves the duplicate index and alerts.
+    """
+    duplicate = lost_found_db.get_item_by_id(duplicate_id)
+    original = lost_found_db.get_item_by_id(original_id)
+    if not duplicate or not original or duplicate_id == original_id:
+        return False
+    lost_found_db.update_item_status(duplicate_id, 'merged', matched_with=original_id)
+    lost_found_db.remove_item_signature(duplicate_id)
+    alerts_service.close_lost_report(duplicate_id)
+    facets_service.invalidate('items')
+    return True
+
+def run_batch_dedup(threshold: float = DUPLICATE_THRESHOLD, workers: Optional[int] = None,
+                    chunk_size: int = 500) -> List[Dict]:
+    """
+    Dedup pass over the whole items table
+
+    Signatures missing from the index are computed in parallel worker processes
+    and stored; candidate pairs are then found by LSH bucket and verified.
+    Returns pairs as {'item_id', 'duplicate_of', 'similarity'}, where
+    duplicate_of is the older report.
+    """
+    items = {item['id']: item for item in lost_found_db.get_all_items()}
+    stored = {item_id: minhash.from_bytes(sig) for item_id, sig in lost_found_db.get_item_signatures().items()}
+
+    missing = [(item_id, _item_text(item)) for item_id, item in items.items() if item_id not in stored]
+    if missing:
+        chunks = [missing[i:i + chunk_size] for i in range(0, len(missing), chunk_size)]
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            computed = [pair for chunk in pool.map(_compute_signatures, chunks) for pair in chunk]
+        lost_found_db.save_item_signatures(
+            [(item_id, minhash.to_bytes(sig), minhash.band_keys(sig)) for item_id, sig in computed])
+        stored.update(computed)
+
+    buckets = {}
+    for item_id, sig in stored.items():
+        if item_id in items:
+            for key in minhash.band_keys(sig):
+                buckets.setdefault(key, []).append(item_id)
+
+    pairs, checked = {}, set()
+    for members in buckets.values():
+        for i, a in enumerate(members):
+            for b in members[i + 1:]:
+                newer, older = max(a, b), min(a, b)
+                if (newer, older) in checked:
+                    continue
+                checked.add((newer, older))
+                if not _is_comparable(items[newer], items[older]):
+                    continue
+                score = minhash.similarity(stored[newer], stored[older])
+                if score >= threshold:
+                    pairs[(newer, older)] = round(score, 2)
+
+    return [{'item_id': newer, 'duplicate_of': older, 'similarity': score}
+            for (newer, older), score in sorted(pairs.items())]
+
+if __name__ == '__main__':
+    for pair in run_batch_dedup():
+        print(f"#{pair['item_id']} looks like a duplicate of #{pair['duplicate_of']} ({pair['similarity']:.0%})")
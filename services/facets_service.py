@@ -0,0 +1,96 @@
+"""
+Facets Service - Cached bitmap indexes for the All Items and Browse views
+
+Indexes are built from one table read and reused until a service write
+invalidates them (or MAX_AGE_SECONDS passes, to pick up writes made by other
+processes such as the batch dedup job). Writes that change no facet field,
+such as note downloads and ratings, update the cached rows in place instead.
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from database import lost_found_db, notes_db
+from utils.bitmap_index import BitmapIndex
+from utils.trie import normalize
+
+ITEM_FACETS = ('type', 'status', 'category', 'location')
+NOTE_FACETS = ('subject', 'semester')
+
+ITEM_ORDERS = {
+    'recent': (lambda item: (item['date'], item['id']), True),
+}
+NOTE_ORDERS = {
+    'recent': (lambda note: (note['upload_date'], note['id']), True),
+    'downloads': (lambda note: note['downloads'], True),
+    'subject': (lambda note: normalize(note['subject']), False),
+}
+
+MAX_AGE_SECONDS = 60
+
+_indexes: Dict[str, Tuple[BitmapIndex, float]] = {}
+_lock = threading.Lock()
+
+def _normalize_value(field: str, value: Any) -> Any:
+    """Statuses and subjects are matched case-insensitively"""
+    if field in ('status', 'subject') and isinstance(value, str):
+        return normalize(value)
+    return value
+
+def _build(kind: str) -> BitmapIndex:
+    if kind == 'items':
+        return BitmapIndex(lost_found_db.get_all_items(), ITEM_FACETS, ITEM_ORDERS, _normalize_value)
+    return BitmapIndex(notes_db.get_all_notes(), NOTE_FACETS, NOTE_ORDERS, _normalize_value)
+
+def _get_index(kind: str) -> BitmapIndex:
+    with _lock:
+        cached = _indexes.get(kind)
+        if cached and time.time() - cached[1] < MAX_AGE_SECONDS:
+            return cached[0]
+    index = _build(kind)
+    with _lock:
+        _indexes[kind] = (index, time.time())
+    return index
+
+def invalidate(kind: str):
+    """Drop the cached 'items' or 'notes' index after a write"""
+    with _lock:
+        _indexes.pop(kind, None)
+
+def update_note(note_id: int, values: Dict[str, Any]):
+    """Apply a change to non-facet note fields (downloads, rating) to the cached index, if any"""
+    with _lock:
+        cached = _indexes.get('notes')
+        if cached:
+            cached[0].update_row(note_id, values)
+
+def _filter(kind: str, filters: Dict[str, Any], order: Optional[str]) -> Tuple[List[Dict], Dict[str, Dict[Any, int]]]:
+    index = _get_index(kind)
+    rows = [dict(row) for row in index.rows_for(index.select(filters), order)]
+    return rows, index.facet_counts(filters)
+
+def filter_items(filters: Dict[str, Any], order: Optional[str] = 'recent') -> Tuple[List[Dict], Dict[str, Dict[Any, int]]]:
+    """
+    Filter lost & found items by any combination of type, status, category and location
+
+    Args:
+        filters: {field: value}; fields set to None are not filtered
+        order: 'recent' or None for id order
+
+    Returns:
+        (matching items, facet counts per field and value); status keys are lowercase
+    """
+    return _filter('items', filters, order)
+
+def filter_notes(filters: Dict[str, Any], order: Optional[str] = 'recent') -> Tuple[List[Dict], Dict[str, Dict[Any, int]]]:
+    """
+    Filter notes by subject and semester
+
+    Args:
+        filters: {field: value}; fields set to None are not filtered
+        order: 'recent', 'downloads', 'subject' or None for id order
+
+    Returns:
+        (matching notes, facet counts per field and value); subject keys are normalized
+    """
+    return _filter('notes', filters, order)
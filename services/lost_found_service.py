@@ -5,7 +5,9 @@ Lost & Found Service - Business logic for lost and found items
 from datetime import datetime
 from typing import List, Dict, Optional
 import random
-from database.lost_found_db import add_item, get_all_items as db_get_all_items, get_item_by_id as db_get_item_by_id, update_item_status
+from database.lost_found_db import add_item, get_all_items as db_get_all_items, get_item_by_id as db_get_item_by_id
+from database import lost_found_db
+from services import alerts_service, autocomplete_service, dedup_service, facets_service, spelling_service
 
 def generate_verification_code() -> str:
     """Generate a unique 5-digit verification code"""
@@ -13,8 +15,13 @@ def generate_verification_code() -> str:
 
 def add_lost_item(item_name: str, category: str, location: str, 
                   description: str, reporter_name: str, reporter_contact: str,
-                  image_path: str = None) -> Dict:
-    """Add a new lost item to the database (SQLite)"""
+                  image_path: str = None, reporter_id: int = None) -> Dict:
+    """Add a new lost item to the database (SQLite)
+    
+    If reporter_id is given, the report is also registered as a standing search
+    so the reporter is notified when a matching found item is reported.
+    Likely duplicate reports are returned under `possible_duplicates`.
+    """
     new_item = {
         'type': 'lost',
         'item_name': item_name,
@@ -31,12 +38,23 @@ def add_lost_item(item_name: str, category: str, location: str,
     }
     new_id = add_item(new_item)
     new_item['id'] = new_id
+    new_item['possible_duplicates'] = dedup_service.index_item(new_item)
+    spelling_service.learn_item(new_item)
+    autocomplete_service.learn_item(new_item)
+    facets_service.invalidate('items')
+    if reporter_id:
+        alerts_service.subscribe_lost_report(reporter_id, new_item)
     return new_item
 
 def add_found_item(item_name: str, category: str, location: str,
                    description: str, reporter_name: str, reporter_contact: str,
-                   image_path: str = None) -> Dict:
-    """Add a new found item to the database (SQLite)"""
+                   image_path: str = None, reporter_id: int = None) -> Dict:
+    """Add a new found item to the database (SQLite)
+    
+    The item is matched against standing searches; `notified` in the returned
+    dict is the number of owners alerted. Likely duplicate reports are returned
+    under `possible_duplicates`.
+    """
     new_item = {
         'type': 'found',
         'item_name': item_name,
@@ -53,6 +71,11 @@ def add_found_item(item_name: str, category: str, location: str,
     }
     new_id = add_item(new_item)
     new_item['id'] = new_id
+    new_item['possible_duplicates'] = dedup_service.index_item(new_item)
+    spelling_service.learn_item(new_item)
+    autocomplete_service.learn_item(new_item)
+    facets_service.invalidate('items')
+    new_item['notified'] = alerts_service.percolate_found_item(new_item, finder_id=reporter_id)
     return new_item
 
 def get_all_items() -> List[Dict]:
@@ -61,11 +84,11 @@ def get_all_items() -> List[Dict]:
 
 def get_lost_items() -> List[Dict]:
     """Get only lost items from SQLite DB"""
-    return [item for item in db_get_all_items() if item['type'] == 'lost']
+    return [item.to_dict() for item in lost_found_db.iter_items({'type': 'lost'})]
 
 def get_found_items() -> List[Dict]:
     """Get only found items from SQLite DB"""
-    return [item for item in db_get_all_items() if item['type'] == 'found']
+    return [item.to_dict() for item in lost_found_db.iter_items({'type': 'found'})]
 
 def get_item_by_id(item_id: int) -> Optional[Dict]:
     """Get item by ID from SQLite DB"""
@@ -78,48 +101,72 @@ def find_potential_matches(item_type: str, category: str, location: str) -> List
     """
     opposite_type = 'found' if item_type == 'lost' else 'lost'
     matches = []
-    for item in db_get_all_items():
-        if item['type'] == opposite_type and item['status'] == 'open':
-            if item['category'].lower() == category.lower():
-                item_copy = item.copy()
-                item_copy['match_score'] = 10
-                if item['location'].lower() == location.lower():
-                    item_copy['match_score'] = 20
-                matches.append(item_copy)
+    for item in lost_found_db.iter_items({'type': opposite_type, 'status': 'open'}):
+        if item['category'].lower() == category.lower():
+            item_copy = item.to_dict()
+            item_copy['match_score'] = 10
+            if item['location'].lower() == location.lower():
+                item_copy['match_score'] = 20
+            matches.append(item_copy)
     matches.sort(key=lambda x: x['match_score'], reverse=True)
     return matches
 
 def claim_item(item_id: int, claimer_name: str, verification_detail: str = "", 
-               claimer_email: str = "", claimer_contact: str = "") -> bool:
+               claimer_email: str = "", claimer_contact: str = "",
+               claimer_id: int = None) -> Optional[Dict]:
     """
-    Mark an item as claimed with verification details (SQLite DB)
+    Claim an open item and record the claimer in the claims ledger (SQLite DB)
+    
+    Returns the winning claim for the item. If another claimer got there first
+    this is their claim, so callers should compare it against their own details.
+    Returns None if the item does not exist or cannot be claimed.
+    Claiming a lost report closes its standing search. When a logged-in
+    claimer (claimer_id) wins a found item, their own lost reports in that
+    category stop alerting too.
     """
-    item = db_get_item_by_id(item_id)
-    if not item:
-        return False
-    # Update status in DB
-    update_item_status(item_id, 'claimed')
-    # Optionally, you can extend update_item_status to store claimer details if needed
-    return True
+    claim = {
+        'claimer_name': claimer_name,
+        'claimer_email': claimer_email,
+        'claimer_contact': claimer_contact,
+        'verification_detail': verification_detail
+    }
+    winner = lost_found_db.claim_open_item(item_id, claim)
+    if winner:
+        alerts_service.close_lost_report(item_id)
+        item = lost_found_db.get_item_by_id(item_id)
+        if claimer_id and item and item['type'] == 'found' and winner['claimer_email'] == claimer_email:
+            alerts_service.close_lost_reports_for_claim(claimer_id, item)
+        facets_service.invalidate('items')
+    return winner
+
+def get_item_claims(item_id: int) -> List[Dict]:
+    """Get the claim history for an item from SQLite DB"""
+    return lost_found_db.get_claims_for_item(item_id)
+
+def get_claims_by_claimer(claimer_email: str) -> List[Dict]:
+    """Get all claims made by a claimer from SQLite DB"""
+    return lost_found_db.get_claims_by_claimer(claimer_email)
 
 def get_recent_items(limit: int = 10) -> List[Dict]:
-    """Get most recent items from SQLite DB"""
-    items = db_get_all_items()
-    sorted_items = sorted(items, key=lambda x: x['date'], reverse=True)
-    return sorted_items[:limit]
+    """Get the most recently reported items (read from the created_at index)"""
+    return lost_found_db.get_recent_items(limit)
+
+def items_between(start: float, end: float) -> List[Dict]:
+    """Get items reported between two epoch timestamps (start inclusive), newest first"""
+    return lost_found_db.items_between(start, end)
 
 def search_items(query: str) -> List[Dict]:
     """Search items by name, category, or location from SQLite DB"""
     query_lower = query.lower()
     results = []
-    for item in db_get_all_items():
+    for item in lost_found_db.iter_items():
         if (query_lower in item['item_name'].lower() or 
             query_lower in item['category'].lower() or 
             query_lower in item['location'].lower() or
             query_lower in item['description'].lower()):
-            results.append(item)
+            results.append(item.to_dict())
     return results
 
 def get_items_by_status(status: str) -> List[Dict]:
     """Get items filtered by status from SQLite DB"""
-    return [item for item in db_get_all_items() if item['status'] == status]
+    return [item.to_dict() for item in lost_found_db.iter_items({'status': status})]
@@ -2,28 +2,79 @@
 Notes Exchange Service - Business logic for notes sharing
 """
 
+import logging
+import os
+import threading
+import time
 from datetime import datetime
 from typing import List, Dict, Optional
 from database import notes_db
+from services import auth_service, autocomplete_service, content_index_service, facets_service, spelling_service
+
+logger = logging.getLogger(__name__)
+
+# Co-download weights halve over this many days when the index is rebuilt
+RECOMMENDATION_HALF_LIFE_DAYS = 30
+# Seconds between background rebuilds of the co-download index
+RECOMMENDATION_REBUILD_INTERVAL = 6 * 60 * 60
+
+# Where uploaded note files are stored, relative to the project root
+UPLOAD_DIR = "uploaded_notes"
+# Base URL of the JSON API (python -m api) that serves note files with resumable
+# downloads, e.g. http://localhost:8502. When unset, cards embed the file instead.
+FILE_SERVER_URL = os.environ.get('NOTES_FILE_SERVER_URL', '').rstrip('/')
+
+_rebuilder_started = False
+_rebuilder_lock = threading.Lock()
+_contributors_ready = False
 
 def upload_note(subject: str, topic: str, semester: str, uploaded_by: str,
-                file_name: str, description: str) -> Dict:
-    """Upload a new note to the database (SQLite)"""
+                file_name: str, description: str, uploader_id: int = None) -> Dict:
+    """Upload a new note to the database (SQLite)
+    
+    The subject is stored under its existing canonical spelling when one
+    matches case- and whitespace-insensitively. Notes with an uploader_id
+    count towards that user on the contributors leaderboard.
+    """
     note = {
-        'subject': subject,
+        'subject': autocomplete_service.canonical_subject(subject),
         'topic': topic,
         'semester': semester,
         'uploaded_by': uploaded_by,
         'file_name': file_name,
-        'description': description
+        'description': description,
+        'uploader_id': uploader_id
     }
     note_id = notes_db.add_note(note)
     note['id'] = note_id
+    # Index the file's contents off the request path
+    content_index_service.index_note_async(note)
+    spelling_service.learn_note(note)
+    autocomplete_service.learn_note(note)
+    facets_service.invalidate('notes')
     note['upload_date'] = datetime.now().strftime('%Y-%m-%d')
     note['downloads'] = 0
     note['rating'] = 0.0
     return note
 
+def note_file_exists(file_name: str) -> bool:
+    """Whether a note already uses this file name (stops at the first match)"""
+    return next(notes_db.iter_notes({'file_name': file_name}, batch_size=1), None) is not None
+
+def note_file_path(file_name: str) -> str:
+    """Path of an uploaded note file (the name is reduced to its base name)"""
+    return os.path.join(UPLOAD_DIR, os.path.basename(file_name))
+
+def note_file_url(note_id: int, user_id: int = None) -> Optional[str]:
+    """Download link on the file server, signed for user_id, or None when no file server is configured"""
+    if not FILE_SERVER_URL:
+        return None
+    url = f"{FILE_SERVER_URL}/files/notes/{int(note_id)}"
+    if not user_id:
+        return url
+    expires_at, signature = auth_service.sign_download(note_id, user_id)
+    return f"{url}?user={int(user_id)}&expires={expires_at}&sig={signature}"
+
 def get_notes_by_subject(subject: str) -> List[Dict]:
     """Get all notes for a specific subject from SQLite DB"""
     return notes_db.get_notes_by_subject(subject)
@@ -33,70 +84,150 @@ def get_all_notes_list() -> List[Dict]:
     return notes_db.get_all_notes()
 
 def get_subjects() -> List[str]:
-    """Get list of all available subjects from SQLite DB"""
-    all_notes = notes_db.get_all_notes()
-    return list(set(note['subject'] for note in all_notes))
+    """Get list of all available subjects, most notes first"""
+    return autocomplete_service.get_subjects()
 
 def get_note_by_id(note_id: int) -> Optional[Dict]:
     """Get a specific note by ID from SQLite DB"""
     return notes_db.get_note_by_id(note_id)
 
-def increment_download_count(note_id: int) -> bool:
-    """Increment the download count for a note in SQLite DB"""
-    notes_db.increment_download(note_id)
+def increment_download_count(note_id: int, user_id: int = None) -> bool:
+    """Increment the download count for a note in SQLite DB
+    
+    When the downloading user is known the download is also logged per user,
+    which feeds the "also downloaded" recommendations.
+    """
+    downloads = notes_db.increment_download(note_id)
+    if user_id:
+        notes_db.record_download(int(user_id), note_id)
+    if downloads is not None:
+        facets_service.update_note(note_id, {'downloads': downloads})
+    return True
+
+def get_also_downloaded(note_id: int, limit: int = 5) -> List[Dict]:
+    """Get notes most often downloaded by students who downloaded this one"""
+    return notes_db.get_neighbour_notes(note_id, limit)
+
+def rebuild_recommendations():
+    """Rebuild the co-download index from the event log, decaying old downloads"""
+    notes_db.rebuild_cooccurrence(RECOMMENDATION_HALF_LIFE_DAYS)
+
+def start_recommendation_rebuilder(interval_seconds: int = RECOMMENDATION_REBUILD_INTERVAL) -> bool:
+    """
+    Start a daemon thread that periodically rebuilds the co-download index
+    and rescales trending scores. Called at app and API server startup;
+    only one rebuilder runs per process, and this returns False if already started.
+    """
+    global _rebuilder_started
+    with _rebuilder_lock:
+        if _rebuilder_started:
+            return False
+        _rebuilder_started = True
+    
+    def loop():
+        while True:
+            time.sleep(interval_seconds)
+            try:
+                rebuild_recommendations()
+            except Exception:
+                logger.exception("Recommendation rebuild failed")
+            try:
+                notes_db.rescale_trending()
+            except Exception:
+                logger.exception("Trending rescale failed")
+    
+    threading.Thread(target=loop, name='recommendation-rebuilder', daemon=True).start()
     return True
 
+def rate_note(note_id: int, user_id: int, rating: int) -> bool:
+    """Rate a note from 1 to 5 stars; rating again replaces the user's earlier rating"""
+    if not 1 <= int(rating) <= 5:
+        return False
+    rated = notes_db.rate_note(note_id, int(user_id), int(rating))
+    if rated:
+        facets_service.update_note(note_id, {'rating': notes_db.get_rating_summary(note_id)['average']})
+    return rated
+
+def get_rating_summary(note_id: int, user_id: int = None) -> Dict:
+    """Get a note's average rating, number of ratings and the user's own rating"""
+    return notes_db.get_rating_summary(note_id, user_id)
+
+def get_best_rated_notes(subject: str, limit: int = 5) -> List[Dict]:
+    """Get the best rated notes in a subject (Bayesian average, so a lone 5-star rating does not win)"""
+    return notes_db.get_best_rated_notes(subject, limit)
+
+def recompute_ratings():
+    """Rebuild all rating totals from the per-user ratings table"""
+    notes_db.recompute_ratings()
+    facets_service.invalidate('notes')
+
+def _ensure_contributors():
+    """Build the leaderboard once, matching legacy notes to users by name"""
+    global _contributors_ready
+    if _contributors_ready:
+        return
+    with _rebuilder_lock:
+        if not _contributors_ready and not notes_db.contributors_built():
+            rebuild_contributors()
+        _contributors_ready = True
+
+def rebuild_contributors():
+    """Rebuild the contributors leaderboard from the notes table
+    
+    Notes uploaded before uploader ids were recorded are attributed to the
+    user with the same name, when exactly one user has that name.
+    """
+    from database.users_db import get_all_users
+    names = {}
+    for user_id, user in get_all_users().items():
+        names.setdefault(user['name'], []).append(user_id)
+    notes_db.rebuild_contributors({name: ids[0] for name, ids in names.items() if len(ids) == 1})
+
 def get_top_contributors(limit: int = 10) -> List[Dict]:
-    """Get top note contributors based on upload count from SQLite DB"""
-    all_notes = notes_db.get_all_notes()
-    contributors = {}
-    for note in all_notes:
-        uploader = note['uploaded_by']
-        if uploader not in contributors:
-            contributors[uploader] = {
-                'name': uploader,
-                'uploads': 0,
-                'total_downloads': 0,
-                'subjects': set()
-            }
-        contributors[uploader]['uploads'] += 1
-        contributors[uploader]['total_downloads'] += note['downloads']
-        contributors[uploader]['subjects'].add(note['subject'])
-    contributor_list = []
-    for contrib in contributors.values():
-        contrib['subjects'] = list(contrib['subjects'])
-        contributor_list.append(contrib)
-    contributor_list.sort(key=lambda x: x['uploads'], reverse=True)
-    return contributor_list[:limit]
+    """Get top note contributors by uploads, then downloads"""
+    _ensure_contributors()
+    return notes_db.get_top_contributors(limit)
+
+def get_contributor_rank(user_id: int) -> Optional[Dict]:
+    """Get a user's leaderboard stats and 'rank', or None if they have not uploaded"""
+    _ensure_contributors()
+    return notes_db.get_contributor_rank(int(user_id))
 
 def search_notes(query: str) -> List[Dict]:
-    """Search notes by subject, topic, or description from SQLite DB"""
+    """Search notes by subject, topic, description, uploader and file contents
+    
+    Results are ranked: metadata matches score highest, and matches inside the
+    uploaded file add a TF-IDF score from the content index. Each result has
+    a 'search_score' key.
+    """
     query_lower = query.lower()
+    content_scores = content_index_service.search_content(query)
     results = []
-    for note in notes_db.get_all_notes():
-        if (query_lower in note['subject'].lower() or
-            query_lower in note['topic'].lower() or
-            query_lower in note['description'].lower() or
-            query_lower in note['uploaded_by'].lower()):
+    for note in notes_db.iter_notes():
+        score = content_scores.get(note['id'], 0.0)
+        if query_lower in note['subject'].lower() or query_lower in note['topic'].lower():
+            score += 20
+        if query_lower in note['description'].lower() or query_lower in note['uploaded_by'].lower():
+            score += 10
+        if score > 0:
+            note = note.to_dict()
+            note['search_score'] = round(score, 2)
             results.append(note)
+    results.sort(key=lambda x: x['search_score'], reverse=True)
     return results
 
 def get_notes_by_semester(semester: str) -> List[Dict]:
     """Get all notes for a specific semester from SQLite DB"""
-    results = []
-    for note in notes_db.get_all_notes():
-        if note['semester'] == semester:
-            results.append(note)
-    return results
+    return [note.to_dict() for note in notes_db.iter_notes({'semester': semester})]
 
 def get_recent_notes(limit: int = 10) -> List[Dict]:
-    """Get most recently uploaded notes"""
-    all_notes = notes_db.get_all_notes()
-    sorted_notes = sorted(all_notes, key=lambda x: x['upload_date'], reverse=True)
-    return sorted_notes[:limit]
+    """Get the most recently uploaded notes (read from the created_at index)"""
+    return notes_db.get_recent_notes(limit)
+
+def notes_since(timestamp: float) -> List[Dict]:
+    """Get notes uploaded at or after an epoch timestamp, newest first"""
+    return notes_db.notes_since(timestamp)
 
 def get_popular_notes(limit: int = 10) -> List[Dict]:
-    """Get most downloaded notes"""
-    all_notes = notes_db.get_all_notes()
-    sorted_notes = sorted(all_notes, key=lambda x: x['downloads'], reverse=True)
-    return sorted_notes[:limit]
+    """Get trending notes: downloads weighted by recency (one-week half-life)"""
+    return notes_db.get_trending_notes(limit)
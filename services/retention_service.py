@@ -0,0 +1,115 @@
+"""
+Retention Service - Expire stale open reports into the lost & found archive
+
+An open item older than its category's TTL is moved from lost_found_items to
+lost_found_archive by a background sweeper, BATCH_SIZE rows per transaction
+with a short pause between batches so app writes are never held up for long.
+Hot-path queries only ever see lost_found_items; the archive is searched
+only when a user asks for it.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+from database import lost_found_db
+from services import alerts_service, facets_service
+
+logger = logging.getLogger(__name__)
+
+# Days an open report stays listed, per category; others use DEFAULT_TTL_DAYS
+DEFAULT_TTL_DAYS = int(os.environ.get('ITEM_TTL_DAYS', 90))
+CATEGORY_TTL_DAYS = {
+    'ID Card': 180,
+    'Wallet': 180,
+    'Laptop': 180,
+    'Phone': 120,
+    'Keys': 120,
+    'Bottle': 30,
+    'Umbrella': 30,
+    'Charger': 60,
+}
+
+# Items moved per transaction, seconds to pause between batches, and seconds between sweeps
+BATCH_SIZE = 200
+BATCH_PAUSE = 0.05
+SWEEP_INTERVAL = 6 * 60 * 60
+
+_sweeper_started = False
+_sweeper_lock = threading.Lock()
+_sweep_lock = threading.Lock()
+_last_sweep: Optional[Dict] = None
+
+def sweep(now: float = None) -> Dict:
+    """Archive every expired open item now and return the run's throughput stats"""
+    global _last_sweep
+    now = time.time() if now is None else now
+    cutoffs = {category: now - days * 86400 for category, days in CATEGORY_TTL_DAYS.items()}
+    default_cutoff = now - DEFAULT_TTL_DAYS * 86400
+    with _sweep_lock:
+        start = time.perf_counter()
+        archived, batches, longest = 0, 0, 0.0
+        while True:
+            batch_start = time.perf_counter()
+            rows = lost_found_db.archive_expired_items(cutoffs, default_cutoff, BATCH_SIZE)
+            longest = max(longest, time.perf_counter() - batch_start)
+            if not rows:
+                break
+            archived += len(rows)
+            batches += 1
+            for item_id, item_type in rows:
+                if item_type == 'lost':
+                    alerts_service.close_lost_report(item_id)
+            if len(rows) < BATCH_SIZE:
+                break
+            time.sleep(BATCH_PAUSE)
+        if archived:
+            facets_service.invalidate('items')
+        seconds = time.perf_counter() - start
+        _last_sweep = {
+            'finished_at': time.time(),
+            'archived': archived,
+            'batches': batches,
+            'seconds': seconds,
+            'items_per_second': archived / seconds if seconds else 0.0,
+            'longest_batch_ms': longest * 1000,
+        }
+    logger.info("Retention sweep: archived %d item(s) in %d batch(es), %.2fs (%.0f items/s, longest batch %.1f ms)",
+                archived, batches, seconds, _last_sweep['items_per_second'], longest * 1000)
+    return dict(_last_sweep)
+
+def get_last_sweep() -> Optional[Dict]:
+    """Stats of the most recent sweep in this process, or None"""
+    return dict(_last_sweep) if _last_sweep else None
+
+def search_archived_items(query: str) -> List[Dict]:
+    """Search archived reports; never part of the regular item search"""
+    return lost_found_db.search_archive(query)
+
+def count_archived_items() -> int:
+    """Number of archived reports"""
+    return lost_found_db.count_archived_items()
+
+def start_archive_sweeper(interval_seconds: int = SWEEP_INTERVAL) -> bool:
+    """
+    Start a daemon thread that sweeps now and then every interval_seconds.
+    Called at app and API server startup; only one sweeper runs per process,
+    and this returns False if it is already started.
+    """
+    global _sweeper_started
+    with _sweeper_lock:
+        if _sweeper_started:
+            return False
+        _sweeper_started = True
+
+    def loop():
+        while True:
+            try:
+                sweep()
+            except Exception:
+                logger.exception("Retention sweep failed")
+            time.sleep(interval_seconds)
+
+    threading.Thread(target=loop, name='archive-sweeper', daemon=True).start()
+    return True
@@ -0,0 +1,51 @@
+"""
+Snapshot Service - Columnar copies of the items and notes tables for analytics
+
+Each snapshot loads its table once and then refreshes incrementally: rows
+with an id above the watermark are appended, and only the rows listed in
+the table's change log (status or download count changes, and deletions,
+recorded by triggers) past the last sequence number seen are re-read.
+A refresh with nothing new costs two indexed lookups.
+"""
+
+import threading
+from database import lost_found_db, notes_db
+from utils.columnar import ColumnarTable
+
+_items = None
+_notes = None
+# Last change-log sequence number applied to each snapshot
+_items_seq = 0
+_notes_seq = 0
+# Separate locks so an items refresh never waits on a notes refresh
+_items_lock = threading.Lock()
+_notes_lock = threading.Lock()
+
+def items_snapshot() -> ColumnarTable:
+    """Up-to-date columnar copy of lost_found_items"""
+    global _items, _items_seq
+    with _items_lock:
+        if _items is None:
+            _items = ColumnarTable(dates=['date'],
+                                   categorical=['type', 'status', 'category', 'location', 'reporter_name'])
+            # Changes logged before the full load are already in it
+            _items_seq = lost_found_db.get_item_change_seq()
+        seq, changes = lost_found_db.get_item_changes(_items_seq)
+        _items.append(lost_found_db.get_items_after(_items.watermark))
+        _items.apply_changes('status', changes)
+        _items_seq = seq
+        return _items
+
+def notes_snapshot() -> ColumnarTable:
+    """Up-to-date columnar copy of notes"""
+    global _notes, _notes_seq
+    with _notes_lock:
+        if _notes is None:
+            _notes = ColumnarTable(numeric=['downloads'], dates=['upload_date'],
+                                   categorical=['subject', 'semester', 'uploaded_by'])
+            _notes_seq = notes_db.get_note_change_seq()
+        seq, changes = notes_db.get_note_changes(_notes_seq)
+        _notes.append(notes_db.get_notes_after(_notes.watermark))
+        _notes.apply_changes('downloads', changes)
+        _notes_seq = seq
+        return _notes
@@ -0,0 +1,71 @@
+"""
+Spelling Service - Typo-tolerant search queries
+
+Keeps one SymSpell dictionary for notes (subjects, topics, descriptions) and
+one for lost & found items (names, categories, locations, descriptions).
+Each is built on first use and then extended as new notes and items are
+added, so a restart is never needed to learn new vocabulary.
+"""
+
+import re
+import threading
+from typing import Dict, Optional
+from database import lost_found_db, notes_db
+from utils.symspell import SymSpell
+
+_dictionaries: Dict[str, SymSpell] = {}
+_lock = threading.Lock()
+
+def _note_text(note: Dict) -> str:
+    return f"{note['subject']} {note['topic']} {note.get('description', '')}"
+
+def _item_text(item: Dict) -> str:
+    return f"{item['item_name']} {item['category']} {item['location']} {item.get('description', '')}"
+
+def _learn(dictionary: SymSpell, text: str):
+    for word in re.findall(r'[a-z]+', text.lower()):
+        dictionary.add_word(word)
+
+def _get_dictionary(kind: str) -> SymSpell:
+    """The 'notes' or 'items' dictionary, built from the database on first use"""
+    dictionary = _dictionaries.get(kind)
+    if dictionary is not None:
+        return dictionary
+    with _lock:
+        if kind not in _dictionaries:
+            dictionary = SymSpell()
+            if kind == 'notes':
+                for note in notes_db.iter_notes():
+                    _learn(dictionary, _note_text(note))
+            else:
+                for item in lost_found_db.iter_items():
+                    _learn(dictionary, _item_text(item))
+            _dictionaries[kind] = dictionary
+        return _dictionaries[kind]
+
+def learn_note(note: Dict):
+    """Add a new note's vocabulary (no-op until the dictionary is first used)"""
+    with _lock:
+        if 'notes' in _dictionaries:
+            _learn(_dictionaries['notes'], _note_text(note))
+
+def learn_item(item: Dict):
+    """Add a new item's vocabulary (no-op until the dictionary is first used)"""
+    with _lock:
+        if 'items' in _dictionaries:
+            _learn(_dictionaries['items'], _item_text(item))
+
+def correct_query(query: str, kind: str) -> Optional[str]:
+    """
+    Suggest a corrected query, e.g. "Data Structurs" -> "Data Structures"
+
+    Args:
+        query: Search text as typed
+        kind: 'notes' or 'items'
+
+    Returns:
+        The corrected query, or None if every word is already known or
+        nothing close enough was found
+    """
+    corrected = _get_dictionary(kind).correct(query)
+    return corrected if corrected != query else None
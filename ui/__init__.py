@@ -1,9 +1,23 @@
 """
 UI package - Streamlit user interface components
+
+Page modules are imported on first attribute access so that importing one
+page does not pull in the others.
 """
 
-from .dashboard_ui import render_dashboard
-from .lost_found_ui import render_lost_found
-from .notes_ui import render_notes_exchange
+import importlib
+
+_RENDERERS = {
+    'render_dashboard': 'dashboard_ui',
+    'render_lost_found': 'lost_found_ui',
+    'render_notes_exchange': 'notes_ui',
+}
 
 __all__ = ['render_dashboard', 'render_lost_found', 'render_notes_exchange']
+
+
+def __getattr__(name):
+    if name in _RENDERERS:
+        module = importlib.import_module(f'.{_RENDERERS[name]}', __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
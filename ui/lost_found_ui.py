@@ -3,33 +3,32 @@ Lost & Found UI - User interface for lost and found items
 """
 
 import streamlit as st
-st.markdown(
-    """
-    <style>
-    /* Make all Streamlit form labels dark and bold */
-    label, .stTextInput label, .stSelectbox label, .stTextArea label, .css-1c7y2kd, .css-1n76uvr {
-        color: #222 !important;
-        font-weight: 700 !important;
-        background: transparent !important;
-    }
-    </style>
-    """,
-    unsafe_allow_html=True
-)
 import os
 from datetime import datetime
 from services.lost_found_service import (
     add_lost_item,
     add_found_item,
     get_all_items,
-    get_lost_items,
-    get_found_items,
     find_potential_matches,
     claim_item,
-    search_items
+    search_items,
+    get_item_by_id
+)
+from services.dedup_service import merge_duplicate
+from services.spelling_service import correct_query
+from services.facets_service import filter_items
+from services.alerts_service import (
+    subscribe_search,
+    get_inbox,
+    count_unread_alerts,
+    mark_alerts_read,
+    get_user_subscriptions,
+    cancel_subscription
 )
-from database.users_db import update_user_activity
-from utils.helpers import format_date, get_date_difference, truncate_text
+from services.activity_service import record_activity
+from services.retention_service import search_archived_items
+from utils.helpers import days_since, format_date, format_timestamp, get_date_difference, truncate_text
+from utils.session_state import clear_card_state, get_card_state, set_card_state
 from utils.validators import validate_name, validate_description
 
 # Categories for items
@@ -84,11 +83,13 @@ def render_lost_found():
     """, unsafe_allow_html=True)
     
     # Action Tabs
-    tab1, tab2, tab3, tab4 = st.tabs([
+    unread = count_unread_alerts(st.session_state.user['id'])
+    tab1, tab2, tab3, tab4, tab5 = st.tabs([
         "📢 Report Lost", 
         "✅ Report Found", 
         "🔎 Search Items", 
-        "📋 All Items"
+        "📋 All Items",
+        f"🔔 Alerts ({unread})" if unread else "🔔 Alerts"
     ])
     
     with tab1:
@@ -102,6 +103,9 @@ def render_lost_found():
     
     with tab4:
         render_all_items()
+    
+    with tab5:
+        render_alerts()
 
 def render_report_lost():
     """Form to report a lost item"""
@@ -202,10 +206,15 @@ def render_report_lost():
                     description=description,
                     reporter_name=reporter_name,
                     reporter_contact=reporter_contact,
-                    image_path=image_path
+                    image_path=image_path,
+                    reporter_id=st.session_state.user['id']
                 )
+                st.session_state['duplicate_offer_lost'] = {
+                    'item_id': item['id'],
+                    'duplicates': item['possible_duplicates']
+                }
                 
-                update_user_activity(st.session_state.user['id'], 'item_reported')
+                record_activity(st.session_state.user['id'], 'item_reported')
                 
                 st.success("✅ Lost item reported successfully!")
                 st.balloons()
@@ -228,6 +237,8 @@ def render_report_lost():
                         </p>
                     </div>
                 """, unsafe_allow_html=True)
+    
+    render_duplicate_offer('lost')
 
 def render_report_found():
     """Form to report a found item"""
@@ -329,14 +340,22 @@ def render_report_found():
                     description=description,
                     reporter_name=reporter_name,
                     reporter_contact=reporter_contact,
-                    image_path=image_path
+                    image_path=image_path,
+                    reporter_id=st.session_state.user['id']
                 )
+                st.session_state['duplicate_offer_found'] = {
+                    'item_id': item['id'],
+                    'duplicates': item['possible_duplicates']
+                }
                 
-                update_user_activity(st.session_state.user['id'], 'item_reported')
+                record_activity(st.session_state.user['id'], 'item_reported')
                 
                 st.success("✅ Found item reported successfully!")
                 st.balloons()
                 
+                if item.get('notified'):
+                    st.info(f"🔔 {item['notified']} owner(s) with a matching lost report or saved search have been notified.")
+                
                 # Show potential matches
                 matches = find_potential_matches('found', category, location)
                 if matches:
@@ -355,6 +374,34 @@ def render_report_found():
                         </p>
                     </div>
                 """, unsafe_allow_html=True)
+    
+    render_duplicate_offer('found')
+
+def render_duplicate_offer(kind):
+    """Offer to merge a just-submitted report into an existing one that looks the same
+    
+    Rendered outside the report form because forms cannot contain buttons.
+    """
+    offer = st.session_state.get(f'duplicate_offer_{kind}')
+    if not offer or not offer['duplicates']:
+        return
+    
+    st.warning(f"🧐 Your report looks similar to {len(offer['duplicates'])} existing {kind} report(s). "
+               "If it is the same item, merge your report into the existing one.")
+    for duplicate in offer['duplicates']:
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            st.markdown(f"**#{duplicate['id']}** {duplicate['item_name']} at {duplicate['location']} "
+                        f"({duplicate['similarity']:.0%} similar): {truncate_text(duplicate['description'], 80)}")
+        with col2:
+            if st.button("🔗 Merge", key=f"merge_{kind}_{offer['item_id']}_{duplicate['id']}"):
+                merge_duplicate(offer['item_id'], duplicate['id'])
+                del st.session_state[f'duplicate_offer_{kind}']
+                st.success(f"Merged into report #{duplicate['id']}.")
+                st.rerun()
+    if st.button("Keep as a separate report", key=f"keep_{kind}_{offer['item_id']}"):
+        del st.session_state[f'duplicate_offer_{kind}']
+        st.rerun()
 
 def render_search_items():
     """Search and view matching items"""
@@ -370,13 +417,30 @@ def render_search_items():
     with col2:
         st.markdown("<br>", unsafe_allow_html=True)
         search_btn = st.button("🔍 Search", use_container_width=True)
+    include_archived = st.checkbox("Include archived reports", key="search_include_archived",
+                                   help="Also search older reports that expired without being claimed")
     
     if search_query or search_btn:
         results = search_items(search_query) if search_query else get_all_items()
         
-        if not results:
+        if not results and search_query:
+            corrected = correct_query(search_query, 'items')
+            if corrected:
+                results = search_items(corrected)
+                if results:
+                    st.info(f"Showing results for **{corrected}**")
+        
+        archived = search_archived_items(search_query) if include_archived and search_query else []
+        
+        if search_query and st.button("🔔 Notify me about new matches", key="save_item_search"):
+            if subscribe_search(st.session_state.user['id'], search_query):
+                st.success("🔔 Search saved! You'll see new matching found items in the Alerts tab.")
+            else:
+                st.warning("⚠️ Add a more specific word to your search before saving it.")
+        
+        if not results and not archived:
             st.info("No items found matching your search.")
-        else:
+        elif results:
             st.success(f"Found {len(results)} item(s)")
             
             # Separate lost and found
@@ -392,46 +456,85 @@ def render_search_items():
                 st.markdown("#### ✅ Found Items")
                 for item in found_results:
                     render_item_card(item, context='search_found')
+        
+        if archived:
+            st.markdown(f"#### 🗄️ Archived Reports ({len(archived)})")
+            for item in archived:
+                render_item_card(item, context='search_archived')
 
 def render_all_items():
     """Display all items with filters"""
     st.markdown("### 📋 All Items")
     
+    # Counts for each option depend on the other filters, so read the
+    # current selections before drawing the dropdowns
+    filter_type = st.session_state.get('all_items_type', "All")
+    filter_category = st.session_state.get('all_items_category', "All")
+    filter_status = st.session_state.get('all_items_status', "All")
+    items, counts = filter_items({
+        'type': None if filter_type == "All" else filter_type.lower(),
+        'category': None if filter_category == "All" else filter_category,
+        'status': None if filter_status == "All" else filter_status.lower()
+    })
+    
+    def with_count(field, key=None):
+        return lambda option: option if option == "All" else f"{option} ({counts[field].get(key(option) if key else option, 0)})"
+    
     col1, col2, col3 = st.columns(3)
     with col1:
-        filter_type = st.selectbox("Filter by Type", ["All", "Lost", "Found"])
+        st.selectbox("Filter by Type", ["All", "Lost", "Found"],
+                     format_func=with_count('type', str.lower), key="all_items_type")
     with col2:
-        filter_category = st.selectbox("Filter by Category", ["All"] + CATEGORIES)
+        st.selectbox("Filter by Category", ["All"] + CATEGORIES,
+                     format_func=with_count('category'), key="all_items_category")
     with col3:
-        filter_status = st.selectbox("Filter by Status", ["All", "Open", "Claimed"])
-    
-    # Get items based on filter
-    if filter_type == "Lost":
-        items = get_lost_items()
-    elif filter_type == "Found":
-        items = get_found_items()
-    else:
-        items = get_all_items()
-    
-    # Apply category filter
-    if filter_category != "All":
-        items = [item for item in items if item['category'] == filter_category]
-    
-    # Apply status filter
-    if filter_status != "All":
-        items = [item for item in items if item['status'].lower() == filter_status.lower()]
+        st.selectbox("Filter by Status", ["All", "Open", "Claimed"],
+                     format_func=with_count('status', str.lower), key="all_items_status")
     
     if not items:
         st.info("No items found with the selected filters.")
     else:
         st.success(f"Showing {len(items)} item(s)")
         
-        # Sort by date (most recent first)
-        items_sorted = sorted(items, key=lambda x: x['date'], reverse=True)
-        
-        for item in items_sorted:
+        # Already sorted by date (most recent first)
+        for item in items:
             render_item_card(item, context='all_items')
 
+def render_alerts():
+    """Show found items that matched the user's lost reports and saved searches"""
+    st.markdown("### 🔔 Alerts")
+    st.markdown("New found items that match your lost reports and saved searches.")
+    
+    user_id = st.session_state.user['id']
+    entries = get_inbox(user_id)
+    
+    if not entries:
+        st.info("No alerts yet. Report a lost item or save a search to get notified.")
+    else:
+        if any(not entry['is_read'] for entry in entries):
+            if st.button("✔️ Mark all as read", key="mark_alerts_read"):
+                mark_alerts_read(user_id)
+                st.rerun()
+        for entry in entries:
+            item = get_item_by_id(entry['item_id'])
+            if item:
+                if not entry['is_read']:
+                    st.markdown("**🆕 New match**")
+                render_item_card(item, context=f"alert_{entry['id']}")
+    
+    subscriptions = get_user_subscriptions(user_id)
+    if subscriptions:
+        st.markdown("#### 📌 Your Standing Searches")
+        for sub in subscriptions:
+            col1, col2 = st.columns([4, 1])
+            with col1:
+                label = "Lost report" if sub['source'] == 'lost_report' else "Saved search"
+                st.markdown(f"{label}: **{sub['query']}**")
+            with col2:
+                if st.button("🗑️ Stop", key=f"cancel_sub_{sub['id']}"):
+                    cancel_subscription(user_id, sub['id'])
+                    st.rerun()
+
 def render_item_card(item, context='default'):
     """Render a single item card
     
@@ -443,6 +546,9 @@ def render_item_card(item, context='default'):
     if item['status'] == 'claimed':
         border_color = '#4caf50'
         status_emoji = '✅'
+    elif item['status'] == 'archived':
+        border_color = '#9e9e9e'
+        status_emoji = '🗄️'
     elif item['type'] == 'lost':
         border_color = '#f44336'
         status_emoji = '📢'
@@ -450,8 +556,12 @@ def render_item_card(item, context='default'):
         border_color = '#2196f3'
         status_emoji = '✅'
     
-    days_ago = get_date_difference(item['date'])
-    date_text = format_date(item['date'], 'display')
+    if item.get('created_at'):
+        days_ago = days_since(item['created_at'])
+        date_text = format_timestamp(item['created_at'])
+    else:
+        days_ago = get_date_difference(item['date'])
+        date_text = format_date(item['date'], 'display')
     
     # Show image if available
     if item.get('image_path'):
@@ -526,10 +636,10 @@ def render_item_card(item, context='default'):
             col1, col2, col3 = st.columns([2, 1, 1])
             with col2:
                 if st.button(f"🏆 Claim Item #{item['id']}", key=f"claim_{context}_{item['id']}"):
-                    st.session_state[f'claiming_{context}_{item["id"]}'] = True
+                    set_card_state(st.session_state, f'item_{context}', item['id'], 'claiming', True)
             
             # Show claim form if button clicked
-            if st.session_state.get(f'claiming_{context}_{item["id"]}', False):
+            if get_card_state(st.session_state, f'item_{context}', item['id'], 'claiming', False):
                 user = st.session_state.user
                 st.markdown("""
                     <div style='background: #fff3cd; padding: 1rem; border-radius: 10px; 
@@ -586,7 +696,7 @@ def render_item_card(item, context='default'):
                     with col2:
                         cancel = st.form_submit_button("❌ Cancel", use_container_width=True)
                     if cancel:
-                        st.session_state[f'claiming_{item["id"]}'] = False
+                        clear_card_state(st.session_state, f'item_{context}', item['id'], 'claiming')
                         st.rerun()
                     if submitted:
                         # Validate inputs
@@ -603,14 +713,15 @@ def render_item_card(item, context='default'):
                             st.error("⚠️ Please provide a valid contact number!")
                         else:
                             # Submit claim with logged-in user details
-                            success = claim_item(
+                            winner = claim_item(
                                 item_id=item['id'],
                                 claimer_name=user['name'],
                                 verification_detail=verification.strip(),
                                 claimer_email=user['email'],
-                                claimer_contact=contact.strip()
+                                claimer_contact=contact.strip(),
+                                claimer_id=user['id']
                             )
-                            if success:
+                            if winner and winner['claimer_email'] == user['email']:
                                 st.success(f"🎉 Claim submitted successfully!")
                                 st.markdown(f"""
                                     <div style='background: #d4edda; padding: 1rem; border-radius: 10px; 
@@ -626,12 +737,15 @@ def render_item_card(item, context='default'):
                                 """, unsafe_allow_html=True)
                                 st.balloons()
                                 # Update user activity
-                                update_user_activity(st.session_state.user['id'], 'claim_item')
+                                record_activity(st.session_state.user['id'], 'claim_item')
                                 # Clear claiming state
-                                st.session_state[f'claiming_{item["id"]}'] = False
+                                clear_card_state(st.session_state, f'item_{context}', item['id'], 'claiming')
                                 # Wait a bit and rerun
                                 import time
                                 time.sleep(3)
                                 st.rerun()
+                            elif winner:
+                                # Someone else's claim won; never show who they are
+                                st.error("❌ This item has already been claimed.")
                             else:
                                 st.error("❌ Failed to submit claim. Please try again.")
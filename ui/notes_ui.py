@@ -3,38 +3,43 @@ Notes Exchange UI - User interface for notes sharing
 """
 
 import streamlit as st
-st.markdown(
-    """
-    <style>
-    /* Make all Streamlit form labels dark and bold */
-    label, .stTextInput label, .stSelectbox label, .stTextArea label, .css-1c7y2kd, .css-1n76uvr {
-        color: #222 !important;
-        font-weight: 700 !important;
-        background: transparent !important;
-    }
-    </style>
-    """,
-    unsafe_allow_html=True
-)
 from services.notes_service import (
     upload_note,
-    get_notes_by_subject,
     get_subjects,
     get_all_notes_list,
     increment_download_count,
     get_top_contributors,
+    get_contributor_rank,
     search_notes,
     get_recent_notes,
-    get_popular_notes
+    get_popular_notes,
+    get_also_downloaded,
+    note_file_exists,
+    note_file_path,
+    note_file_url,
+    rate_note,
+    get_rating_summary,
+    get_best_rated_notes
 )
-from database.users_db import update_user_activity
-from utils.helpers import format_date, format_number, truncate_text
+from services.spelling_service import correct_query
+from services.facets_service import filter_notes
+from services.activity_service import record_activity
+from utils.helpers import format_date, format_number, format_timestamp, truncate_text
+from utils.page_loader import load as load_page_data
+from utils.session_state import clear_card_state, get_card_state, set_card_state
+from utils.trie import normalize
 from utils.validators import validate_name, validate_file_name, validate_description
 
 # Semesters
 SEMESTERS = ['Semester 1', 'Semester 2', 'Semester 3', 'Semester 4', 
              'Semester 5', 'Semester 6', 'Semester 7', 'Semester 8']
 
+# Browse sort choices and the presorted index order behind each
+BROWSE_ORDERS = {"Most Recent": 'recent', "Most Downloaded": 'downloads', "Subject Name": 'subject'}
+
+# First option of the upload form's subject picker
+NEW_SUBJECT = "➕ New subject"
+
 def render_notes_exchange():
     """Main render function for Notes Exchange section"""
     
@@ -110,10 +115,15 @@ def render_upload_notes():
         col1, col2 = st.columns(2)
         
         with col1:
-            subject = st.text_input(
-                "Subject Name *",
+            existing_subject = st.selectbox(
+                "Subject *",
+                options=[NEW_SUBJECT] + get_subjects(),
+                help="Pick an existing subject (type to filter) or add a new one"
+            )
+            new_subject = st.text_input(
+                "New Subject Name",
                 placeholder="e.g., Data Structures",
-                help="Enter the subject name"
+                help="Only used when adding a new subject"
             )
             
             semester = st.selectbox(
@@ -149,8 +159,9 @@ def render_upload_notes():
         submit = st.form_submit_button("🚀 Upload Notes", use_container_width=True)
         
         if submit:
+            subject = new_subject if existing_subject == NEW_SUBJECT else existing_subject
             # Validate inputs
-            if not all([subject, semester, uploaded_by, uploaded_file, description]):
+            if not all([subject.strip(), semester, uploaded_by, uploaded_file, description]):
                 st.error("❌ Please fill all required fields and upload a file")
             else:
                 # Validate name
@@ -166,6 +177,11 @@ def render_upload_notes():
                 # Auto-generate topic from filename (without extension)
                 topic = file_name.rsplit('.', 1)[0].replace('_', ' ').replace('-', ' ')
                 
+                # Another note's file with the same name would be overwritten
+                if note_file_exists(file_name):
+                    st.error("❌ A note with this file name already exists. Please rename your file.")
+                    return
+                
                 # Validate file size (max 10MB)
                 if file_size > 10 * 1024 * 1024:
                     st.error("❌ File size too large. Maximum 10MB allowed.")
@@ -194,10 +210,11 @@ def render_upload_notes():
                     semester=semester,
                     uploaded_by=uploaded_by,
                     file_name=file_name,
-                    description=description
+                    description=description,
+                    uploader_id=st.session_state.user['id']
                 )
                 
-                update_user_activity(st.session_state.user['id'], 'note_uploaded')
+                record_activity(st.session_state.user['id'], 'note_uploaded')
                 
                 st.success("✅ Notes uploaded successfully!")
                 st.balloons()
@@ -224,8 +241,7 @@ def render_upload_notes():
                 """, unsafe_allow_html=True)
                 
                 # Show contribution stats
-                contributors = get_top_contributors()
-                user_contrib = next((c for c in contributors if c['name'] == uploaded_by), None)
+                user_contrib = get_contributor_rank(st.session_state.user['id'])
                 if user_contrib:
                     st.markdown(f"""
                         <div style='background: #fff3e0; padding: 1rem; border-radius: 10px; margin-top: 1rem;'>
@@ -233,7 +249,8 @@ def render_upload_notes():
                                 🎉 <strong>Your Contribution Stats:</strong><br>
                                 Total Uploads: {user_contrib['uploads']} | 
                                 Total Downloads: {user_contrib['total_downloads']} | 
-                                Subjects: {len(user_contrib['subjects'])}
+                                Subjects: {user_contrib['subject_count']} | 
+                                Rank: #{user_contrib['rank']} of {user_contrib['contributors']}
                             </p>
                         </div>
                     """, unsafe_allow_html=True)
@@ -242,36 +259,55 @@ def render_browse_notes():
     """Browse notes by subject"""
     st.markdown("### 📥 Browse All Notes")
     
+    # Counts for each option depend on the other filter, so read the current
+    # selections before drawing the dropdowns
+    selected_subject = st.session_state.get('browse_subject_filter', "All Subjects")
+    selected_semester = st.session_state.get('browse_semester_filter', "All Semesters")
+    sort_by = st.session_state.get('browse_sort', "Most Recent")
+    fetches = {
+        'subjects': get_subjects,
+        'notes': lambda: filter_notes({
+            'subject': None if selected_subject == "All Subjects" else selected_subject,
+            'semester': None if selected_semester == "All Semesters" else selected_semester
+        }, order=BROWSE_ORDERS[sort_by])
+    }
+    if selected_subject != "All Subjects":
+        fetches['best_rated'] = lambda: get_best_rated_notes(selected_subject, limit=3)
+    data = load_page_data(fetches, defaults={'subjects': [], 'notes': ([], {'subject': {}, 'semester': {}})})
+    if data.errors:
+        st.warning("⚠️ Some notes could not be loaded right now; the list may be incomplete. Please try again shortly.")
+    notes, counts = data['notes']
+    
     # Filter options
-    col1, col2 = st.columns(2)
+    col1, col2, col3 = st.columns(3)
     with col1:
-        subjects = get_subjects()
-        selected_subject = st.selectbox(
+        st.selectbox(
             "Filter by Subject",
-            options=["All Subjects"] + subjects,
+            options=["All Subjects"] + data['subjects'],
+            format_func=lambda s: s if s == "All Subjects" else f"{s} ({counts['subject'].get(normalize(s), 0)})",
             key="browse_subject_filter"
         )
     
     with col2:
-        sort_by = st.selectbox(
+        st.selectbox(
+            "Filter by Semester",
+            options=["All Semesters"] + SEMESTERS,
+            format_func=lambda s: s if s == "All Semesters" else f"{s} ({counts['semester'].get(s, 0)})",
+            key="browse_semester_filter"
+        )
+    
+    with col3:
+        st.selectbox(
             "Sort by",
-            options=["Most Recent", "Most Downloaded", "Subject Name"],
+            options=list(BROWSE_ORDERS),
             key="browse_sort"
         )
     
-    # Get notes
-    if selected_subject == "All Subjects":
-        notes = get_all_notes_list()
-    else:
-        notes = get_notes_by_subject(selected_subject)
-    
-    # Sort notes
-    if sort_by == "Most Recent":
-        notes = sorted(notes, key=lambda x: x['upload_date'], reverse=True)
-    elif sort_by == "Most Downloaded":
-        notes = sorted(notes, key=lambda x: x['downloads'], reverse=True)
-    else:  # Subject Name
-        notes = sorted(notes, key=lambda x: x['subject'])
+    if selected_subject != "All Subjects":
+        best_rated = data['best_rated']
+        if best_rated:
+            st.markdown(f"**⭐ Best rated in {selected_subject}:** " + ", ".join(
+                f"{best['topic']} ({best['rating']}★, {best['rating_count']})" for best in best_rated))
     
     if not notes:
         st.info("No notes found. Be the first to upload!")
@@ -290,7 +326,7 @@ def render_browse_notes():
 def render_popular_notes():
     """Display popular/trending notes"""
     st.markdown("### 🔥 Popular Notes")
-    st.markdown("Most downloaded notes by your peers")
+    st.markdown("Trending with your peers: recent downloads count the most")
     
     popular = get_popular_notes(limit=12)
     
@@ -313,7 +349,7 @@ def render_search_notes():
     col1, col2 = st.columns([3, 1])
     with col1:
         search_query = st.text_input(
-            "Search by subject, topic, or uploader",
+            "Search by subject, topic, uploader, or words inside the notes",
             placeholder="e.g., database, sorting algorithms, John...",
             key="search_notes_query"
         )
@@ -324,6 +360,13 @@ def render_search_notes():
     if search_query or search_btn:
         results = search_notes(search_query) if search_query else get_all_notes_list()
         
+        if not results and search_query:
+            corrected = correct_query(search_query, 'notes')
+            if corrected:
+                results = search_notes(corrected)
+                if results:
+                    st.info(f"Showing results for **{corrected}**")
+        
         if not results:
             st.info("No notes found matching your search.")
         else:
@@ -343,7 +386,19 @@ def render_contributors():
     st.markdown("### 🏆 Top Contributors")
     st.markdown("Celebrating students who share their knowledge!")
     
-    contributors = get_top_contributors(limit=20)
+    user_id = st.session_state.user['id']
+    data = load_page_data({
+        'contributors': lambda: get_top_contributors(limit=20),
+        'my_rank': lambda: get_contributor_rank(user_id)
+    }, defaults={'contributors': []})
+    if data.errors:
+        st.warning("⚠️ The leaderboard could not be fully loaded right now. Please try again shortly.")
+    contributors = data['contributors']
+    
+    my_rank = data['my_rank']
+    if my_rank:
+        st.info(f"📈 You are **#{my_rank['rank']}** of {my_rank['contributors']} contributors "
+                f"with {my_rank['uploads']} upload(s).")
     
     if not contributors:
         st.info("No contributors yet. Be the first!")
@@ -387,7 +442,7 @@ def render_contributors():
                         <span style='float: right; color: #666;'>
                             📤 {contributor['uploads']} uploads | 
                             📥 {contributor['total_downloads']} downloads | 
-                            📚 {len(contributor['subjects'])} subjects
+                            📚 {contributor['subject_count']} subjects
                         </span>
                     </div>
                 """, unsafe_allow_html=True)
@@ -407,15 +462,17 @@ def render_contributor_podium(contributor, medal, color):
                 {contributor['total_downloads']} downloads
             </p>
             <p style='margin: 0.5rem 0 0 0; color: #666; font-size: 0.9rem;'>
-                {len(contributor['subjects'])} subjects
+                {contributor['subject_count']} subjects
             </p>
         </div>
     """, unsafe_allow_html=True)
 
 def render_note_card(note, show_popularity=False, context='default'):
     """Render a single note card"""
-    date_text = format_date(note['upload_date'], 'display')
+    date_text = format_timestamp(note['created_at']) if note.get('created_at') else format_date(note['upload_date'], 'display')
     downloads_text = format_number(note['downloads'])
+    if show_popularity and note.get('trending'):
+        downloads_text += f" • 🔥 {note['trending']:g} recent"
     
     # Determine file icon based on extension
     file_name = note.get('file_name', '')
@@ -468,9 +525,13 @@ def render_note_card(note, show_popularity=False, context='default'):
     with col1:
         # Check if file exists
         import os
-        file_path = os.path.join("uploaded_notes", note['file_name'])
+        file_path = note_file_path(note['file_name'])
+        file_url = note_file_url(note['id'], st.session_state.user['id'])
         
-        if os.path.exists(file_path):
+        if file_url and os.path.exists(file_path):
+            # Resumable download from the file server, which counts it
+            st.link_button("📥 Download", file_url, use_container_width=True)
+        elif os.path.exists(file_path):
             # Read file for download
             with open(file_path, "rb") as file:
                 file_data = file.read()
@@ -483,22 +544,23 @@ def render_note_card(note, show_popularity=False, context='default'):
                 key=f"download_{context}_{note['id']}",
                 use_container_width=True
             ):
-                increment_download_count(note['id'])
-                update_user_activity(st.session_state.user['id'], 'note_downloaded')
+                increment_download_count(note['id'], st.session_state.user['id'])
+                record_activity(st.session_state.user['id'], 'note_downloaded')
         else:
             # For sample data that doesn't have actual files
             if st.button(f"📥 Download", key=f"download_{context}_{note['id']}", use_container_width=True):
-                increment_download_count(note['id'])
-                update_user_activity(st.session_state.user['id'], 'note_downloaded')
+                increment_download_count(note['id'], st.session_state.user['id'])
+                record_activity(st.session_state.user['id'], 'note_downloaded')
                 st.info(f"ℹ️ Sample file: {note['file_name']} (Demo mode - actual file not available)")
     
     with col2:
         if st.button(f"ℹ️ Details", key=f"details_{context}_{note['id']}", use_container_width=True):
-            st.session_state[f'show_details_{context}_{note["id"]}'] = True
+            set_card_state(st.session_state, f'note_{context}', note['id'], 'details', True)
     
     # Show details if button clicked
-    if st.session_state.get(f'show_details_{context}_{note["id"]}', False):
+    if get_card_state(st.session_state, f'note_{context}', note['id'], 'details', False):
         with st.expander("📋 Full Details", expanded=True):
+            summary = get_rating_summary(note['id'], st.session_state.user['id'])
             st.markdown(f"""
                 **Note ID:** {note['id']}  
                 **Subject:** {note['subject']}  
@@ -508,12 +570,33 @@ def render_note_card(note, show_popularity=False, context='default'):
                 **Uploaded By:** {note['uploaded_by']}  
                 **Upload Date:** {date_text}  
                 **Downloads:** {note['downloads']}  
-                **Rating:** {'⭐' * int(note.get('rating', 0))} ({note.get('rating', 0)})  
+                **Rating:** {'⭐' * int(summary['average'])} ({summary['average']} from {summary['count']} rating(s))  
                 
                 **Description:**  
                 {note['description']}
             """)
             
+            rating_col, rate_col = st.columns([3, 1])
+            with rating_col:
+                my_rating = st.select_slider(
+                    "Your rating",
+                    options=[1, 2, 3, 4, 5],
+                    value=summary['mine'] or 5,
+                    format_func=lambda stars: '⭐' * stars,
+                    key=f"rating_{context}_{note['id']}"
+                )
+            with rate_col:
+                st.markdown("<br>", unsafe_allow_html=True)
+                if st.button("Rate" if summary['mine'] is None else "Update", key=f"rate_{context}_{note['id']}"):
+                    rate_note(note['id'], st.session_state.user['id'], my_rating)
+                    st.rerun()
+            
+            also_downloaded = get_also_downloaded(note['id'])
+            if also_downloaded:
+                st.markdown("**👥 Students who downloaded this also downloaded:**")
+                for other in also_downloaded:
+                    st.markdown(f"- {other['topic']} ({other['subject']}, {other['semester']})")
+            
             if st.button("❌ Close", key=f"close_details_{context}_{note['id']}"):
-                st.session_state[f'show_details_{context}_{note["id"]}'] = False
+                clear_card_state(st.session_state, f'note_{context}', note['id'], 'details')
                 st.rerun()
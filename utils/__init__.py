@@ -13,10 +13,12 @@ from .helpers import (
     format_date,
     get_date_difference,
     truncate_text,
-    generate_id
+    generate_id,
+    tokenize
 )
 
 __all__ = [
     'validate_email', 'validate_roll_no', 'validate_name', 'validate_file_name',
-    'format_date', 'get_date_difference', 'truncate_text', 'generate_id'
+    'format_date', 'get_date_difference', 'truncate_text', 'generate_id',
+    'tokenize'
 ]
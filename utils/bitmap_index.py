@@ -0,0 +1,115 @@
+"""
+Bitmap Index - Faceted filtering over an in-memory list of rows
+
+Every (field, value) pair gets a bitmap stored as a Python int, with bit i
+set when row i has that value. Any combination of filters is a bitwise AND,
+and a facet count is the popcount of an AND, so filtering and counting every
+dropdown option never loops over the rows in Python. Sort orders are
+computed once at build time and reused for every filter combination.
+Fields that are not facets (download counts, ratings) can be changed in
+place with update_row; only the sort orders are redone.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+if hasattr(int, 'bit_count'):
+    popcount = int.bit_count
+else:  # Python < 3.10
+    def popcount(bits: int) -> int:
+        """Number of set bits"""
+        return bin(bits).count('1')
+
+def _to_bitmap(positions: List[int], size: int) -> int:
+    """Build a bitmap in one step (OR-ing bits one at a time is quadratic)"""
+    flags = bytearray(b'0' * size)
+    for i in positions:
+        flags[size - 1 - i] = 0x31  # '1'
+    return int(flags, 2) if size else 0
+
+class BitmapIndex:
+    """Per-value bitmaps and presorted orders over a fixed list of rows"""
+
+    def __init__(self, rows: List[Dict], fields: Sequence[str],
+                 orders: Optional[Dict[str, Tuple[Callable[[Dict], Any], bool]]] = None,
+                 normalize: Optional[Callable[[str, Any], Any]] = None, key_field: str = 'id'):
+        """
+        Args:
+            rows: Rows to index; bit i refers to rows[i]
+            fields: Fields to build bitmaps for
+            orders: Named sort orders as {name: (key function, reverse)}
+            normalize: Optional (field, value) -> bitmap key, e.g. to ignore case
+            key_field: Field identifying a row for update_row
+        """
+        self.rows = rows
+        self.positions = {row.get(key_field): i for i, row in enumerate(rows)}
+        self.order_keys = dict(orders or {})
+        self.fields = tuple(fields)
+        self.normalize = normalize or (lambda field, value: value)
+        self.all = (1 << len(rows)) - 1
+        self.bitmaps: Dict[str, Dict[Any, int]] = {}
+        for field in self.fields:
+            positions: Dict[Any, List[int]] = {}
+            for i, row in enumerate(rows):
+                positions.setdefault(self.normalize(field, row.get(field)), []).append(i)
+            self.bitmaps[field] = {value: _to_bitmap(rows_with, len(rows)) for value, rows_with in positions.items()}
+        self.orders: Dict[str, List[int]] = {}
+        for name, (key, reverse) in (orders or {}).items():
+            self.orders[name] = sorted(range(len(rows)), key=lambda i: key(rows[i]), reverse=reverse)
+
+    def _field_masks(self, filters: Dict[str, Any]) -> Dict[str, int]:
+        return {field: self.bitmaps[field].get(self.normalize(field, value), 0)
+                for field, value in filters.items() if value is not None}
+
+    def select(self, filters: Dict[str, Any]) -> int:
+        """Bitmap of rows matching every filter; None values are ignored"""
+        mask = self.all
+        for bits in self._field_masks(filters).values():
+            mask &= bits
+        return mask
+
+    def facet_counts(self, filters: Dict[str, Any]) -> Dict[str, Dict[Any, int]]:
+        """
+        Counts for every value of every field under the current filters
+
+        A field's own filter is left out of its counts, so each option shows
+        how many rows selecting it would give.
+        """
+        masks = self._field_masks(filters)
+        counts = {}
+        for field in self.fields:
+            others = self.all
+            for other, bits in masks.items():
+                if other != field:
+                    others &= bits
+            counts[field] = {value: popcount(others & bits) for value, bits in self.bitmaps[field].items()}
+        return counts
+
+    def update_row(self, key: Any, values: Dict[str, Any]) -> bool:
+        """
+        Change non-facet fields of a row in place; returns False if no row has that key
+
+        Each order is re-sorted from its previous state, which is nearly sorted,
+        so ties keep the order a fresh build would give them.
+        """
+        if set(values) & set(self.fields):
+            raise ValueError('Facet fields cannot be updated in place; rebuild the index')
+        i = self.positions.get(key)
+        if i is None:
+            return False
+        self.rows[i].update(values)
+        rows = self.rows
+        for name, (sort_key, reverse) in self.order_keys.items():
+            self.orders[name] = sorted(self.orders[name], key=lambda j: sort_key(rows[j]), reverse=reverse)
+        return True
+
+    def rows_for(self, mask: int, order: Optional[str] = None) -> List[Dict]:
+        """
+        Rows in a bitmap, in a presorted order or in row order
+
+        Unlike select() and facet_counts() this is not a bitmap operation: it
+        walks every position of the order in Python, so it costs O(rows)
+        whatever the size of the selection.
+        """
+        flags = bin(mask)[:1:-1]  # flags[i] == '1' when bit i is set
+        positions = self.orders[order] if order else range(len(self.rows))
+        return [self.rows[i] for i in positions if i < len(flags) and flags[i] == '1']
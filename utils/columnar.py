@@ -0,0 +1,123 @@
+"""
+Columnar Table - Compact NumPy columns for vectorized aggregation
+
+Rows are stored column by column: numbers and dates as NumPy arrays and
+repeated strings (category, subject, ...) dictionary-encoded as integer codes
+into a list of distinct values. Group-bys become bincounts over the codes.
+"""
+
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+
+class ColumnarTable:
+    """Columnar copy of a table keyed by increasing integer id, kept current by appends and changes"""
+
+    def __init__(self, numeric: Sequence[str] = (), dates: Sequence[str] = (),
+                 categorical: Sequence[str] = ()):
+        self.ids = np.empty(0, dtype=np.int64)
+        self.numeric = {name: np.empty(0, dtype=np.float64) for name in numeric}
+        self.dates = {name: np.empty(0, dtype='datetime64[D]') for name in dates}
+        self.codes = {name: np.empty(0, dtype=np.int32) for name in categorical}
+        self.values: Dict[str, List[str]] = {name: [] for name in categorical}
+        self._lookup: Dict[str, Dict[str, int]] = {name: {} for name in categorical}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def watermark(self) -> int:
+        """Highest id loaded so far (0 when empty)"""
+        return int(self.ids[-1]) if len(self.ids) else 0
+
+    def _encode(self, name: str, values: List[str]) -> np.ndarray:
+        lookup, distinct = self._lookup[name], self.values[name]
+        codes = np.empty(len(values), dtype=np.int32)
+        for i, value in enumerate(values):
+            code = lookup.get(value)
+            if code is None:
+                code = lookup[value] = len(distinct)
+                distinct.append(value)
+            codes[i] = code
+        return codes
+
+    def append(self, rows: List[Dict]):
+        """Add rows with ids above the watermark, in id order"""
+        if not rows:
+            return
+        self.ids = np.concatenate([self.ids, np.fromiter((row['id'] for row in rows), np.int64, len(rows))])
+        for name in self.numeric:
+            new = np.array([row[name] or 0 for row in rows], dtype=np.float64)
+            self.numeric[name] = np.concatenate([self.numeric[name], new])
+        for name in self.dates:
+            new = np.array([row[name] or 'NaT' for row in rows], dtype='datetime64[D]')
+            self.dates[name] = np.concatenate([self.dates[name], new])
+        for name in self.codes:
+            self.codes[name] = np.concatenate([self.codes[name], self._encode(name, [row[name] for row in rows])])
+
+    def apply_changes(self, column: str, changes: List[Tuple[int, object]]):
+        """
+        Apply (id, value) changes to one mutable column
+
+        A value of None removes the row. Ids that were never loaded are
+        ignored; rows added later arrive through append() with fresh values.
+        """
+        if not changes:
+            return
+        ids = np.fromiter((change[0] for change in changes), np.int64, len(changes))
+        positions = np.searchsorted(self.ids, ids)
+        loaded = positions < len(self.ids)
+        loaded[loaded] = self.ids[positions[loaded]] == ids[loaded]
+        updates = [(position, change[1]) for position, change, ok in zip(positions, changes, loaded)
+                   if ok and change[1] is not None]
+        if updates:
+            at = np.fromiter((position for position, _ in updates), np.int64, len(updates))
+            values = [value for _, value in updates]
+            if column in self.numeric:
+                self.numeric[column][at] = np.asarray(values, dtype=np.float64)
+            else:
+                self.codes[column][at] = self._encode(column, values)
+        removed = [position for position, change, ok in zip(positions, changes, loaded)
+                   if ok and change[1] is None]
+        if removed:
+            keep = np.ones(len(self.ids), dtype=bool)
+            keep[removed] = False
+            self.ids = self.ids[keep]
+            for store in (self.numeric, self.dates, self.codes):
+                for name in store:
+                    store[name] = store[name][keep]
+
+    def count_by(self, name: str) -> Dict[str, int]:
+        """Row count per distinct value of a categorical column, largest first"""
+        counts = np.bincount(self.codes[name], minlength=len(self.values[name]))
+        return self._ranked(name, counts)
+
+    def sum_by(self, name: str, column: str) -> Tuple[Dict[str, int], Dict[str, float]]:
+        """(row count, column sum) per distinct value of a categorical column"""
+        size = len(self.values[name])
+        counts = np.bincount(self.codes[name], minlength=size)
+        sums = np.bincount(self.codes[name], weights=self.numeric[column], minlength=size)
+        return self._ranked(name, counts), {self.values[name][i]: float(sums[i]) for i in np.flatnonzero(counts)}
+
+    def _ranked(self, name: str, counts: np.ndarray) -> Dict[str, int]:
+        order = np.argsort(-counts, kind='stable')
+        return {self.values[name][i]: int(counts[i]) for i in order if counts[i]}
+
+    def count_by_date(self, name: str) -> Dict[str, int]:
+        """Row count per day of a date column, in date order"""
+        dates = self.dates[name]
+        days, counts = np.unique(dates[~np.isnat(dates)], return_counts=True)
+        return {str(day): int(count) for day, count in zip(days, counts)}
+
+    def distinct_count(self, name: str) -> int:
+        """Number of distinct values actually present in a categorical column"""
+        return int(np.count_nonzero(np.bincount(self.codes[name], minlength=len(self.values[name]))))
+
+    def top_ids(self, column: str, k: int) -> List[int]:
+        """Ids of the k rows with the largest values of a numeric column"""
+        values = self.numeric[column]
+        if len(values) > k:
+            part = np.argpartition(-values, k)[:k]
+        else:
+            part = np.arange(len(values))
+        order = np.lexsort((self.ids[part], -values[part]))  # ties broken by id
+        return [int(self.ids[i]) for i in part[order]]
@@ -2,9 +2,18 @@
 Helpers - Common helper functions
 """
 
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import List, Optional
 import hashlib
+import re
+import time
+
+# Words too common to be useful for matching or indexing
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'have',
+    'in', 'is', 'it', 'its', 'my', 'of', 'on', 'or', 'that', 'the', 'this', 'to',
+    'was', 'were', 'with'
+}
 
 def format_date(date_str: str, format_type: str = 'display') -> str:
     """
@@ -28,11 +37,9 @@ def format_date(date_str: str, format_type: str = 'display') -> str:
 
 def get_relative_date(date_obj: datetime) -> str:
     """Get relative date string (e.g., '2 days ago')"""
-    now = datetime.now()
-    diff = now - date_obj
-    
-    days = diff.days
-    
+    return _relative_days((datetime.now() - date_obj).days)
+
+def _relative_days(days: int) -> str:
     if days == 0:
         return "Today"
     elif days == 1:
@@ -46,6 +53,30 @@ def get_relative_date(date_obj: datetime) -> str:
         months = days // 30
         return f"{months} month{'s' if months > 1 else ''} ago"
 
+def date_to_epoch(date_str: Optional[str]) -> int:
+    """
+    Epoch seconds for a stored creation date
+    
+    Today's date (or a missing one) means "now"; any other YYYY-MM-DD date
+    maps to local midnight of that day.
+    """
+    if not date_str or date_str == datetime.now().strftime('%Y-%m-%d'):
+        return int(time.time())
+    try:
+        return int(datetime.strptime(date_str, '%Y-%m-%d').timestamp())
+    except ValueError:
+        return int(time.time())
+
+def days_since(timestamp: float) -> int:
+    """Calendar days from an epoch timestamp to today (integer math, no string parsing)"""
+    return date.today().toordinal() - date.fromtimestamp(timestamp).toordinal()
+
+def format_timestamp(timestamp: float, format_type: str = 'display') -> str:
+    """Format an epoch timestamp like format_date: 'display' (e.g. 05 Mar 2025) or 'relative'"""
+    if format_type == 'relative':
+        return _relative_days(days_since(timestamp))
+    return datetime.fromtimestamp(timestamp).strftime('%d %b %Y')
+
 def get_date_difference(date_str: str) -> int:
     """
     Get number of days between date and today
@@ -167,3 +198,16 @@ def calculate_match_percentage(item1: dict, item2: dict) -> float:
         score += 1
     
     return (score / max_score) * 100
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase word tokens for matching and indexing
+    
+    Args:
+        text: Free text (description, search query, etc.)
+    
+    Returns:
+        Tokens in order, without stopwords or single characters
+    """
+    return [word for word in re.findall(r'[a-z0-9]+', (text or '').lower())
+            if len(word) > 1 and word not in STOPWORDS]
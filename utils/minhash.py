@@ -0,0 +1,67 @@
+"""
+MinHash - Near-duplicate detection for short free-text descriptions
+
+A signature is NUM_PERM minimum hash values over the character shingles of
+a text; the fraction of equal positions estimates Jaccard similarity. For
+locality-sensitive hashing the signature is split into BANDS bands of ROWS
+values, and texts sharing any band bucket become duplicate candidates.
+"""
+
+import random
+import struct
+import zlib
+from array import array
+from typing import List, Set, Tuple
+
+from utils.helpers import tokenize
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 4
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = 0xFFFFFFFF
+
+# Fixed seed so signatures stay comparable across processes and restarts
+_rng = random.Random(20260119)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Set[str]:
+    """
+    Character shingles of the normalized text
+
+    Args:
+        text: Free text
+        size: Shingle length in characters
+    """
+    normalized = ' '.join(tokenize(text))
+    if len(normalized) <= size:
+        return {normalized} if normalized else set()
+    return {normalized[i:i + size] for i in range(len(normalized) - size + 1)}
+
+def signature(text: str) -> List[int]:
+    """Compute the MinHash signature of a text"""
+    hashes = [zlib.crc32(s.encode('utf-8')) for s in shingles(text)]
+    if not hashes:
+        return [_MAX_HASH] * NUM_PERM
+    return [min(((a * h + b) % _PRIME) & _MAX_HASH for h in hashes) for a, b in _PERMUTATIONS]
+
+def similarity(sig1: List[int], sig2: List[int]) -> float:
+    """Estimate Jaccard similarity from two signatures"""
+    return sum(1 for x, y in zip(sig1, sig2) if x == y) / NUM_PERM
+
+def band_keys(sig: List[int]) -> List[Tuple[int, int]]:
+    """(band, bucket) pairs for the LSH index"""
+    return [(band, zlib.crc32(struct.pack(f'{ROWS}I', *sig[band * ROWS:(band + 1) * ROWS])))
+            for band in range(BANDS)]
+
+def to_bytes(sig: List[int]) -> bytes:
+    """Serialize a signature for storage"""
+    return array('I', sig).tobytes()
+
+def from_bytes(data: bytes) -> List[int]:
+    """Deserialize a stored signature"""
+    sig = array('I')
+    sig.frombytes(data)
+    return sig.tolist()
@@ -0,0 +1,98 @@
+"""
+Page Loader - Fetch the independent data a view needs concurrently
+
+A view declares its fetches as name -> zero-argument callable and gets back
+every result at once. The callables run on a shared thread pool (SQLite
+releases the GIL while it works), so the wait is roughly the slowest fetch
+rather than the sum of them all.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Threads shared by all page loads
+MAX_WORKERS = 8
+
+# Seconds to wait for a fetch before falling back to its default
+FETCH_TIMEOUT = 5.0
+
+# Fetches slower than this are logged
+SLOW_FETCH_SECONDS = 0.5
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+class PageData:
+    """Results of a page load, with per-fetch timings (seconds) and errors"""
+
+    def __init__(self):
+        self.results: Dict[str, Any] = {}
+        self.timings: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+        self.elapsed = 0.0
+
+    def __getitem__(self, name: str) -> Any:
+        return self.results[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.results
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='page-loader')
+        return _pool
+
+def _timed(fetch: Callable[[], Any]):
+    start = time.perf_counter()
+    result = fetch()
+    return result, time.perf_counter() - start
+
+def load(fetches: Dict[str, Callable[[], Any]], timeout: float = FETCH_TIMEOUT,
+         timeouts: Optional[Dict[str, float]] = None, defaults: Optional[Dict[str, Any]] = None) -> PageData:
+    """
+    Run independent fetches concurrently and collect their results
+
+    Args:
+        fetches: Result name -> zero-argument callable (wrap arguments in a lambda)
+        timeout: Seconds each fetch may take, counted from the start of the load
+        timeouts: Per-name overrides of `timeout`
+        defaults: Per-name results to use when a fetch fails or times out (else None)
+
+    Returns:
+        PageData with every name present in `results`. A fetch that fails or
+        times out gets its default, is recorded in `errors` and is logged; a
+        timed-out fetch keeps running in the background, but its result is
+        discarded. Callers should tell the user when `errors` is non-empty.
+    """
+    timeouts = timeouts or {}
+    defaults = defaults or {}
+    data = PageData()
+    start = time.perf_counter()
+    pool = _get_pool()
+    futures = {name: pool.submit(_timed, fetch) for name, fetch in fetches.items()}
+
+    for name, future in futures.items():
+        remaining = max(0.0, timeouts.get(name, timeout) - (time.perf_counter() - start))
+        try:
+            data.results[name], data.timings[name] = future.result(timeout=remaining)
+        except Exception as e:
+            message = repr(e) if future.done() else 'timed out'
+            if future.done():
+                logger.error("Page fetch '%s' failed", name, exc_info=e)
+            else:
+                logger.warning("Page fetch '%s' timed out", name)
+            data.errors[name] = message
+            data.results[name] = defaults.get(name)
+            data.timings[name] = time.perf_counter() - start
+            continue
+        if data.timings[name] > SLOW_FETCH_SECONDS:
+            logger.warning("Slow page fetch '%s': %.2fs", name, data.timings[name])
+    data.elapsed = time.perf_counter() - start
+    return data
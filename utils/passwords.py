@@ -0,0 +1,123 @@
+"""
+Passwords - Salted, cost-tunable password hashing on a bounded worker pool
+
+Hashes are stored as 'scrypt$<log2 n>$<r>$<p>$<salt>$<hash>' (base64 salt and
+hash), or 'pbkdf2_sha256$<iterations>$<salt>$<hash>' where OpenSSL lacks
+scrypt. Bare 64-character hex strings are legacy unsalted SHA-256 hashes;
+they still verify, and needs_rehash() flags them for an upgrade.
+
+Both KDFs release the GIL, so hashing runs on a small thread pool. At most
+MAX_PENDING_HASHES hashes may be queued or running; beyond that callers wait
+up to ADMISSION_TIMEOUT seconds and then get HashingBusy, so a login storm
+sheds load instead of piling up CPU and scrypt's memory.
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+# Work factor as log2 of scrypt's n (PBKDF2 uses 40 * 2**cost iterations)
+HASH_COST = int(os.environ.get('PASSWORD_HASH_COST', 14))
+SCRYPT_R = 8
+SCRYPT_P = 1
+
+# Threads computing hashes, and how many hashes may be queued or running at once
+HASH_WORKERS = max(2, os.cpu_count() or 1)
+MAX_PENDING_HASHES = HASH_WORKERS * 4
+
+# Seconds a caller waits for a free slot before HashingBusy
+ADMISSION_TIMEOUT = 2.0
+
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+_HAS_SCRYPT = hasattr(hashlib, 'scrypt')
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(MAX_PENDING_HASHES)
+
+class HashingBusy(Exception):
+    """Too many password hashes are already queued; try again shortly"""
+
+def _b64(raw: bytes) -> str:
+    return base64.b64encode(raw).decode('ascii')
+
+def _scrypt(password: str, salt: bytes, log_n: int, r: int, p: int) -> bytes:
+    # maxmem must cover 128 * r * n bytes (16 MB at the default cost)
+    return hashlib.scrypt(password.encode('utf-8'), salt=salt, n=2 ** log_n, r=r, p=p,
+                          maxmem=256 * r * 2 ** log_n, dklen=KEY_BYTES)
+
+def _pbkdf2(password: str, salt: bytes, iterations: int) -> bytes:
+    return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations, KEY_BYTES)
+
+def compute_hash(password: str, cost: int = None) -> str:
+    """Hash a password with a fresh salt, on the calling thread"""
+    cost = HASH_COST if cost is None else cost
+    salt = os.urandom(SALT_BYTES)
+    if _HAS_SCRYPT:
+        key = _scrypt(password, salt, cost, SCRYPT_R, SCRYPT_P)
+        return f"scrypt${cost}${SCRYPT_R}${SCRYPT_P}${_b64(salt)}${_b64(key)}"
+    iterations = 40 * 2 ** cost
+    return f"pbkdf2_sha256${iterations}${_b64(salt)}${_b64(_pbkdf2(password, salt, iterations))}"
+
+def check_hash(password: str, stored: str) -> bool:
+    """Whether a password matches a stored hash of any supported format, on the calling thread"""
+    parts = stored.split('$')
+    try:
+        if parts[0] == 'scrypt' and len(parts) == 6:
+            expected = base64.b64decode(parts[5])
+            actual = _scrypt(password, base64.b64decode(parts[4]), int(parts[1]), int(parts[2]), int(parts[3]))
+        elif parts[0] == 'pbkdf2_sha256' and len(parts) == 4:
+            expected = base64.b64decode(parts[3])
+            actual = _pbkdf2(password, base64.b64decode(parts[2]), int(parts[1]))
+        elif len(stored) == 64:
+            expected = stored.encode('ascii')
+            actual = hashlib.sha256(password.encode('utf-8')).hexdigest().encode('ascii')
+        else:
+            return False
+    except (ValueError, TypeError):
+        return False
+    return hmac.compare_digest(actual, expected)
+
+def needs_rehash(stored: str, cost: int = None) -> bool:
+    """Whether a stored hash is legacy or weaker than the current cost"""
+    cost = HASH_COST if cost is None else cost
+    parts = stored.split('$')
+    if _HAS_SCRYPT:
+        return not (parts[0] == 'scrypt' and len(parts) == 6 and int(parts[1]) >= cost)
+    return not (parts[0] == 'pbkdf2_sha256' and len(parts) == 4 and int(parts[1]) >= 40 * 2 ** cost)
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix='password-hash')
+        return _pool
+
+def _run(func: Callable, *args, wait: bool = True):
+    """Run func on the pool once admitted; raises HashingBusy when no slot frees up in time"""
+    if not _slots.acquire(timeout=ADMISSION_TIMEOUT if wait else 0):
+        raise HashingBusy()
+    future = _get_pool().submit(func, *args)
+    future.add_done_callback(lambda _: _slots.release())
+    return future.result()
+
+def hash_password(password: str, cost: int = None) -> str:
+    """Hash a password on the worker pool (may raise HashingBusy)"""
+    return _run(compute_hash, password, cost)
+
+def verify_password(password: str, stored: str) -> bool:
+    """Check a password on the worker pool (may raise HashingBusy)"""
+    return _run(check_hash, password, stored)
+
+def try_hash_password(password: str, cost: int = None) -> Optional[str]:
+    """Hash only if a slot is free right now, else None; for optional work like upgrades"""
+    try:
+        return _run(compute_hash, password, cost, wait=False)
+    except HashingBusy:
+        return None
@@ -0,0 +1,102 @@
+"""
+Session State - Bounded per-card UI state and session memory accounting
+
+Cards used to keep flags such as "details open" or "claim form open" under
+their own session-state keys, which were never removed. Here every card's
+flags live in one LRU store per session: a card that is not touched for a
+while is evicted once MAX_CARD_STATES cards have state, and a card whose
+flags are all cleared is dropped immediately. Functions take the session
+mapping (st.session_state) so this module does not depend on Streamlit.
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, MutableMapping
+
+# Cards with UI state kept per session before the least recently used is evicted
+MAX_CARD_STATES = 200
+
+# Sessions not seen for this many seconds drop out of the usage report
+SESSION_REPORT_TTL = 30 * 60
+
+_STORE_KEY = '_card_state'
+
+_usage: Dict[str, Dict] = {}
+_usage_lock = threading.Lock()
+
+def _store(session: MutableMapping) -> 'OrderedDict':
+    if _STORE_KEY not in session:
+        session[_STORE_KEY] = OrderedDict()
+    return session[_STORE_KEY]
+
+def get_card_state(session: MutableMapping, scope: str, card_id: Hashable, name: str, default: Any = None) -> Any:
+    """A card's flag; reading it marks the card as recently used"""
+    store = _store(session)
+    key = (scope, card_id)
+    if key not in store:
+        return default
+    store.move_to_end(key)
+    return store[key].get(name, default)
+
+def set_card_state(session: MutableMapping, scope: str, card_id: Hashable, name: str, value: Any):
+    """Set a card's flag, evicting the least recently used cards over the cap"""
+    store = _store(session)
+    key = (scope, card_id)
+    store.setdefault(key, {})[name] = value
+    store.move_to_end(key)
+    while len(store) > MAX_CARD_STATES:
+        store.popitem(last=False)
+
+def clear_card_state(session: MutableMapping, scope: str, card_id: Hashable, name: str = None):
+    """Remove one flag (or all of them) from a card; empty cards are dropped"""
+    store = _store(session)
+    key = (scope, card_id)
+    if key in store and name is not None:
+        store[key].pop(name, None)
+    if key in store and (name is None or not store[key]):
+        del store[key]
+
+def reset_card_states(session: MutableMapping):
+    """Drop every card's state, e.g. on logout"""
+    session.pop(_STORE_KEY, None)
+
+def deep_size(obj: Any, seen: set = None) -> int:
+    """Approximate bytes held by an object and everything it contains"""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(key, seen) + deep_size(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in obj)
+    return size
+
+def session_usage(session: MutableMapping) -> Dict:
+    """Approximate bytes per session-state key, largest first, with the total"""
+    keys = sorted(((str(key), deep_size(session[key])) for key in list(session.keys())),
+                  key=lambda pair: pair[1], reverse=True)
+    return {
+        'bytes': sum(size for _, size in keys),
+        'keys': keys,
+        'card_states': len(session.get(_STORE_KEY, ())),
+    }
+
+def record_session_usage(session_id: str, session: MutableMapping, user: str = None):
+    """Remember a session's current usage for the process-wide report"""
+    usage = session_usage(session)
+    usage.update({'user': user, 'seen': time.time()})
+    with _usage_lock:
+        _usage[session_id] = usage
+
+def get_session_report() -> List[Dict]:
+    """Recently seen sessions with their approximate bytes, largest first"""
+    cutoff = time.time() - SESSION_REPORT_TTL
+    with _usage_lock:
+        for session_id in [sid for sid, usage in _usage.items() if usage['seen'] < cutoff]:
+            del _usage[session_id]
+        report = [dict(usage, session_id=session_id) for session_id, usage in _usage.items()]
+    return sorted(report, key=lambda usage: usage['bytes'], reverse=True)
@@ -0,0 +1,115 @@
+"""
+SymSpell - Fast spelling correction with a precomputed deletion index
+
+Every vocabulary word is stored under all strings reachable by deleting up
+to `max_edit_distance` characters. A misspelled query word is looked up by
+generating its own deletes, so correction costs a few dictionary lookups
+instead of a scan of the vocabulary.
+"""
+
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+class SymSpell:
+    """Deletion-neighbourhood dictionary with incremental updates"""
+
+    def __init__(self, max_edit_distance: int = 2, prefix_length: int = 7, min_word_length: int = 4):
+        self.max_edit_distance = max_edit_distance
+        self.prefix_length = prefix_length
+        self.min_word_length = min_word_length
+        self.words: Dict[str, int] = {}
+        self.deletes: Dict[str, List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def _edits(self, word: str) -> Set[str]:
+        """All strings reachable by deleting up to max_edit_distance characters"""
+        results = {word}
+        frontier = {word}
+        for _ in range(self.max_edit_distance):
+            next_frontier = set()
+            for candidate in frontier:
+                if len(candidate) <= 1:
+                    continue
+                for i in range(len(candidate)):
+                    deleted = candidate[:i] + candidate[i + 1:]
+                    if deleted not in results:
+                        next_frontier.add(deleted)
+            results |= next_frontier
+            frontier = next_frontier
+        return results
+
+    def add_word(self, word: str, count: int = 1) -> bool:
+        """Add a word (or bump its count). Returns True if the word is new."""
+        if word in self.words:
+            self.words[word] += count
+            return False
+        self.words[word] = count
+        for deleted in self._edits(word[:self.prefix_length]):
+            self.deletes.setdefault(deleted, []).append(word)
+        return True
+
+    def lookup(self, term: str) -> Optional[Tuple[str, int]]:
+        """
+        Best correction for a single word
+
+        Returns:
+            (word, edit distance) with the smallest distance, ties broken by
+            frequency, or None if nothing is within max_edit_distance
+        """
+        if term in self.words:
+            return term, 0
+        if len(term) < self.min_word_length:
+            return None
+        best = None
+        seen = set()
+        for deleted in self._edits(term[:self.prefix_length]):
+            for word in self.deletes.get(deleted, ()):
+                if word in seen:
+                    continue
+                seen.add(word)
+                if abs(len(word) - len(term)) > self.max_edit_distance:
+                    continue
+                distance = edit_distance(term, word, self.max_edit_distance)
+                if distance > self.max_edit_distance:
+                    continue
+                key = (distance, -self.words[word])
+                if best is None or key < best[0]:
+                    best = (key, word)
+        return (best[1], best[0][0]) if best else None
+
+    def correct(self, text: str) -> str:
+        """Correct each word of a phrase, keeping punctuation, spacing and capitalization"""
+        def fix(match):
+            word = match.group()
+            found = self.lookup(word.lower())
+            if not found or found[1] == 0:
+                return word
+            corrected = found[0]
+            if word.istitle():
+                return corrected.title()
+            if word.isupper():
+                return corrected.upper()
+            return corrected
+        return re.sub(r'[A-Za-z]+', fix, text)
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Optimal string alignment distance (Levenshtein plus adjacent transpositions),
+    returning max_distance + 1 as soon as the bound is exceeded"""
+    if a == b:
+        return 0
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (previous2 is not None and i > 1 and j > 1 and
+                    a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous2, previous = previous, current
+    return previous[-1]
@@ -0,0 +1,239 @@
+"""
+Text Extraction - Plain text from uploaded note files (TXT, DOCX, PDF)
+
+Pure Python, standard library only. PDF support is best effort: it reads
+text-showing operators from Flate-compressed or uncompressed content
+streams, which covers most notes exported from word processors but not
+scanned documents or fonts with custom glyph encodings.
+"""
+
+import html
+import re
+import zipfile
+import zlib
+from typing import Dict, List, Optional
+
+def extract_text(path: str) -> str:
+    """
+    Extract plain text from a note file, chosen by extension
+
+    Args:
+        path: Path to a .txt, .docx or .pdf file
+
+    Returns:
+        Extracted text, or '' for unsupported or unreadable files
+    """
+    ext = path.rsplit('.', 1)[-1].lower() if '.' in path else ''
+    try:
+        if ext == 'txt':
+            return extract_txt(path)
+        elif ext == 'docx':
+            return extract_docx(path)
+        elif ext == 'pdf':
+            return extract_pdf(path)
+    except (OSError, ValueError, zipfile.BadZipFile, KeyError):
+        pass
+    return ''
+
+def extract_txt(path: str) -> str:
+    """Read a text file, tolerating unknown encodings"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        return data.decode('latin-1')
+
+def extract_docx(path: str) -> str:
+    """Read the body text of a DOCX file (word/document.xml)"""
+    with zipfile.ZipFile(path) as archive:
+        xml = archive.read('word/document.xml').decode('utf-8', errors='replace')
+    xml = re.sub(r'</w:p>|<w:br/>|<w:tab/>', '\n', xml)
+    return html.unescape(re.sub(r'<[^>]+>', '', xml))
+
+_OBJ_RE = re.compile(rb'(\d+)\s+\d+\s+obj\b(.*?)\bendobj', re.S)
+_STREAM_RE = re.compile(rb'(?<!end)stream\r?\n')
+_REF_RE = re.compile(rb'/([^\s/\[\]()<>]+)\s+(\d+)\s+\d+\s+R')
+_TOKEN_RE = re.compile(rb"/[^\s/\[\]()<>{}%]+|[A-Za-z'\"*]+|-?\d*\.?\d+")
+
+def extract_pdf(path: str) -> str:
+    """Read text from the content streams of a PDF file
+    
+    Fonts with a ToUnicode CMap (common in PDFs from browsers and Google Docs,
+    which show glyph ids rather than characters) are decoded through it.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    objects = {}
+    for match in _OBJ_RE.finditer(data):
+        objects[int(match.group(1))] = _split_object(match.group(2))
+    cmaps = _font_cmaps(objects)
+    parts = []
+    for header, stream in objects.values():
+        if stream and b'BT' in stream and (b'Tj' in stream or b'TJ' in stream):
+            parts.append(_pdf_content_text(stream, cmaps))
+    return '\n'.join(parts)
+
+def _split_object(body: bytes):
+    """Split an object body into (dictionary bytes, decoded stream or None)"""
+    match = _STREAM_RE.search(body)
+    if not match:
+        return body, None
+    header = body[:match.start()]
+    end = body.rfind(b'endstream')
+    raw = body[match.end():end if end >= 0 else len(body)]
+    if b'/FlateDecode' in header:
+        try:
+            raw = zlib.decompressobj().decompress(raw)
+        except zlib.error:
+            return header, None
+    elif b'/Filter' in header:
+        return header, None  # images and other encodings carry no text
+    return header, raw
+
+def _font_cmaps(objects) -> Dict[bytes, Dict[bytes, str]]:
+    """Map font resource names (e.g. b'F4') to their ToUnicode code -> text tables"""
+    by_font_obj = {}
+    for num, (header, _) in objects.items():
+        match = re.search(rb'/ToUnicode\s+(\d+)\s+\d+\s+R', header)
+        if match and int(match.group(1)) in objects:
+            stream = objects[int(match.group(1))][1]
+            if stream:
+                by_font_obj[num] = _parse_cmap(stream)
+    cmaps = {}
+    if not by_font_obj:
+        return cmaps
+    for header, _ in objects.values():
+        for font_dict in re.findall(rb'/Font\s*<<(.*?)>>', header, re.S):
+            for name, ref in _REF_RE.findall(font_dict):
+                if int(ref) in by_font_obj:
+                    cmaps[name] = by_font_obj[int(ref)]
+        match = re.search(rb'/Font\s+(\d+)\s+\d+\s+R', header)
+        if match and int(match.group(1)) in objects:
+            for name, ref in _REF_RE.findall(objects[int(match.group(1))][0]):
+                if int(ref) in by_font_obj:
+                    cmaps[name] = by_font_obj[int(ref)]
+    return cmaps
+
+def _hex_text(hex_digits: bytes) -> str:
+    try:
+        return bytes.fromhex(hex_digits.decode('ascii')).decode('utf-16-be', errors='ignore')
+    except ValueError:
+        return ''
+
+def _parse_cmap(stream: bytes) -> Dict[bytes, str]:
+    """Parse bfchar/bfrange sections of a ToUnicode CMap into code bytes -> text"""
+    table = {}
+    for section in re.findall(rb'beginbfchar(.*?)endbfchar', stream, re.S):
+        for src, dst in re.findall(rb'<([0-9A-Fa-f]+)>\s*<([0-9A-Fa-f]*)>', section):
+            table[bytes.fromhex(src.decode('ascii'))] = _hex_text(dst)
+    for section in re.findall(rb'beginbfrange(.*?)endbfrange', stream, re.S):
+        for lo, hi, dst in re.findall(rb'<([0-9A-Fa-f]+)>\s*<([0-9A-Fa-f]+)>\s*(<[0-9A-Fa-f]*>|\[[^\]]*\])', section):
+            width = len(lo) // 2
+            lo_val, hi_val = int(lo, 16), int(hi, 16)
+            if dst.startswith(b'['):
+                targets = [_hex_text(d) for d in re.findall(rb'<([0-9A-Fa-f]*)>', dst)]
+                for offset, text in enumerate(targets[:hi_val - lo_val + 1]):
+                    table[(lo_val + offset).to_bytes(width, 'big')] = text
+            else:
+                base = dst[1:-1]
+                if not base or hi_val - lo_val > 0xFFFF:
+                    continue
+                base_val = int(base, 16)
+                for offset in range(hi_val - lo_val + 1):
+                    code = (base_val + offset).to_bytes(len(base) // 2, 'big')
+                    table[(lo_val + offset).to_bytes(width, 'big')] = code.decode('utf-16-be', errors='ignore')
+    return table
+
+def _decode_string(raw: bytes, cmap: Optional[Dict[bytes, str]]) -> str:
+    """Decode string bytes through the current font's CMap, if it has one"""
+    if not cmap:
+        if raw.startswith(b'\xfe\xff'):
+            return raw[2:].decode('utf-16-be', errors='ignore')
+        return raw.decode('latin-1')
+    width = len(next(iter(cmap)))
+    return ''.join(cmap.get(raw[i:i + width], '') for i in range(0, len(raw), width))
+
+def _pdf_content_text(content: bytes, cmaps: Dict[bytes, Dict[bytes, str]]) -> str:
+    """Collect the strings shown by Tj/TJ/'/" operators in a content stream"""
+    out: List[str] = []
+    pending: List[str] = []
+    cmap = None
+    last_name = b''
+    i, n = 0, len(content)
+    while i < n:
+        ch = content[i]
+        if ch == 0x28:  # (
+            raw, i = _read_literal(content, i)
+            pending.append(_decode_string(raw, cmap))
+        elif ch == 0x3C and content[i + 1:i + 2] != b'<':  # <hex>
+            j = content.find(b'>', i)
+            if j < 0:
+                break
+            digits = re.sub(rb'\s', b'', content[i + 1:j])
+            try:
+                pending.append(_decode_string(bytes.fromhex((digits + b'0' * (len(digits) % 2)).decode('ascii')), cmap))
+            except ValueError:
+                pass
+            i = j + 1
+        else:
+            match = _TOKEN_RE.match(content, i)
+            if not match:
+                i += 1
+                continue
+            token = match.group()
+            i = match.end()
+            if token[:1] == b'/':
+                last_name = token[1:]
+                continue
+            if token[:1].isdigit() or token[:1] in (b'-', b'.'):
+                # Large negative kerning inside a TJ array usually means a space
+                if pending and float(token) <= -200:
+                    pending.append(' ')
+                continue
+            if token in (b'Tj', b'TJ', b"'", b'"'):
+                if token in (b"'", b'"'):
+                    out.append('\n')
+                out.append(''.join(pending))
+            elif token == b'Tf':
+                cmap = cmaps.get(last_name)
+            elif token in (b'T*', b'Td', b'TD', b'ET'):
+                out.append('\n')
+            elif token == b'Tm':
+                out.append(' ')
+            pending = []
+    return ''.join(out)
+
+_ESCAPES = {ord('n'): b'\n', ord('r'): b'\r', ord('t'): b'\t', ord('b'): b'\b', ord('f'): b'\f'}
+
+def _read_literal(content: bytes, i: int):
+    """Read a (literal string) starting at content[i]; returns (raw bytes, next index)"""
+    depth, i = 1, i + 1
+    chars = bytearray()
+    n = len(content)
+    while i < n and depth:
+        ch = content[i]
+        if ch == 0x5C:  # backslash
+            i += 1
+            if i >= n:
+                break
+            esc = content[i]
+            if esc in _ESCAPES:
+                chars += _ESCAPES[esc]
+            elif 0x30 <= esc <= 0x37:
+                digits = len(re.match(rb'[0-7]{1,3}', content[i:i + 3]).group())
+                chars.append(int(content[i:i + digits], 8) & 0xFF)
+                i += digits - 1
+            elif esc not in (0x0A, 0x0D):
+                chars.append(esc)
+        elif ch == 0x28:
+            depth += 1
+            chars.append(ch)
+        elif ch == 0x29:
+            depth -= 1
+            if depth:
+                chars.append(ch)
+        else:
+            chars.append(ch)
+        i += 1
+    return bytes(chars), i
@@ -0,0 +1,71 @@
+"""
+Prefix Trie - Weighted autocomplete with cached top-k completions
+
+Each node keeps the best `k` completions below it, so answering a keystroke
+is a walk down the prefix plus returning a short list, independent of how
+many terms are stored. Terms are matched case- and whitespace-insensitively;
+the first spelling seen is kept as the canonical display form.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+def normalize(term: str) -> str:
+    """Matching key for a term: casefolded, with runs of whitespace collapsed"""
+    return ' '.join(term.casefold().split())
+
+class _Node:
+    __slots__ = ('children', 'top')
+
+    def __init__(self):
+        self.children: Dict[str, '_Node'] = {}
+        self.top: List[Tuple[int, str]] = []  # (-weight, key), best first
+
+class PrefixTrie:
+    """Trie of weighted terms serving top-k completions per prefix"""
+
+    def __init__(self, k: int = 10):
+        self.k = k
+        self.root = _Node()
+        self.weights: Dict[str, int] = {}
+        self.display: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.weights)
+
+    def add(self, term: str, weight: int = 1) -> str:
+        """Add weight to a term and return its canonical spelling"""
+        key = normalize(term)
+        if not key:
+            return ''
+        self.display.setdefault(key, ' '.join(term.split()))
+        self.weights[key] = self.weights.get(key, 0) + weight
+        entry = (-self.weights[key], key)
+        node = self.root
+        self._update_top(node, key, entry)
+        for ch in key:
+            node = node.children.setdefault(ch, _Node())
+            self._update_top(node, key, entry)
+        return self.display[key]
+
+    def _update_top(self, node: _Node, key: str, entry: Tuple[int, str]):
+        top = [e for e in node.top if e[1] != key]
+        top.append(entry)
+        top.sort()
+        node.top = top[:self.k]
+
+    def canonical(self, term: str) -> Optional[str]:
+        """Canonical spelling of a known term, or None"""
+        return self.display.get(normalize(term))
+
+    def complete(self, prefix: str, k: Optional[int] = None) -> List[str]:
+        """Best completions for a prefix, highest weight first"""
+        node = self.root
+        for ch in normalize(prefix):
+            node = node.children.get(ch)
+            if node is None:
+                return []
+        return [self.display[key] for _, key in node.top[:k or self.k]]
+
+    def all_terms(self) -> List[str]:
+        """Every term, highest weight first"""
+        return [self.display[key] for key in sorted(self.weights, key=lambda key: (-self.weights[key], key))]